@@ -1,59 +1,26 @@
 import os
 import sys
-import shutil
-import hashlib
+import json
+import time
 import platform
+import queue
 import subprocess
 import threading
-from datetime import datetime
+# Medido antes das importações da interface: ttkbootstrap e o núcleo
+STARTED = time.perf_counter()
 import tkinter as tk
 from tkinter import filedialog, messagebox
+from tkinter import font as tkfont
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import cm
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import Paragraph
-
-# -------------------- Validação do CPF e CNPJ --------------------
-def validar_cpf(cpf: str) -> bool:
-    cpf_numeros = "".join([d for d in cpf if d.isdigit()])
-    if len(cpf_numeros) != 11:
-        return False
-    if len(set(cpf_numeros)) == 1:
-        return False
-    soma = sum(int(cpf_numeros[i]) * (10 - i) for i in range(9))
-    resto = soma % 11
-    dv1 = 11 - resto if resto > 1 else 0
-    if dv1 != int(cpf_numeros[9]):
-        return False
-    soma = sum(int(cpf_numeros[i]) * (11 - i) for i in range(10))
-    resto = soma % 11
-    dv2 = 11 - resto if resto > 1 else 0
-    if dv2 != int(cpf_numeros[10]):
-        return False
-    return True
-
-def validar_cnpj(cnpj: str) -> bool:
-    cnpj_numeros = "".join([d for d in cnpj if d.isdigit()])
-    if len(cnpj_numeros) != 14:
-        return False
-    if len(set(cnpj_numeros)) == 1:
-        return False
-    pesos1 = [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
-    soma = sum(int(cnpj_numeros[i]) * pesos1[i] for i in range(12))
-    resto = soma % 11
-    dv1 = 0 if resto < 2 else 11 - resto
-    if dv1 != int(cnpj_numeros[12]):
-        return False
-    pesos2 = [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
-    soma = sum(int(cnpj_numeros[i]) * pesos2[i] for i in range(13))
-    resto = soma % 11
-    dv2 = 0 if resto < 2 else 11 - resto
-    if dv2 != int(cnpj_numeros[13]):
-        return False
-    return True
+from hashpm_core import (
+    APREENSOR_FIELDS, PROPRIETARIO_FIELDS, COPY_MODES, IO_MODES, HASH_ALGORITHMS, DEFAULT_ALGORITHMS, DEFAULT_WORKERS,
+    AcquisitionError, IncompleteDataError, ProgressMonitor, prepare_acquisition_data
+)
+from hashpm_verify import VERIFY_MODES, run_verification
+from hashpm_queue import JOB_STATES, AcquisitionQueue
+
+IMPORTED = time.perf_counter()
 
 # -------------------- Classes de Entrada com Máscaras --------------------
 class CPFEntry(ttk.Entry):
@@ -82,6 +49,128 @@ class CNPJEntry(ttk.Entry):
             formatted = f"{digits[:2]}.{digits[2:5]}.{digits[5:8]}/{digits[8:12]}-{digits[12:]}"
             self.var.set(formatted)
 
+# -------------------- Lista de Arquivos Selecionados --------------------
+class FileSelection:
+    # Lista ordenada e sem repetições: o dict dá inclusão e remoção em O(1) e a
+    # lista dá acesso por posição à visualização virtualizada. Remoções em lote
+    # reconstroem a lista uma única vez.
+    def __init__(self):
+        self._index = {}
+        self._items = []
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __contains__(self, path):
+        return path in self._index
+
+    def __getitem__(self, position):
+        return self._items[position]
+
+    def add_many(self, paths):
+        added = 0
+        for path in paths:
+            if path not in self._index:
+                self._index[path] = len(self._items)
+                self._items.append(path)
+                added += 1
+        return added
+
+    def remove_many(self, paths):
+        removed = [path for path in set(paths) if self._index.pop(path, None) is not None]
+        if removed:
+            self._items = [path for path in self._items if path in self._index]
+            self._index = {path: i for i, path in enumerate(self._items)}
+        return len(removed)
+
+    def clear(self):
+        self._index = {}
+        self._items = []
+
+class VirtualListView(ttk.Frame):
+    # Exibe apenas as linhas visíveis de uma lista grande: o Listbox contém
+    # somente a janela atual e a barra de rolagem é controlada manualmente.
+    # A seleção é guardada por item, e não por linha, para sobreviver à rolagem.
+    def __init__(self, master, items, label_func=str, **kwargs):
+        super().__init__(master)
+        self.items = items
+        self.label_func = label_func
+        self.offset = 0
+        self.selected = set()
+        self.extend_selection = False
+        self.listbox = tk.Listbox(self, selectmode="extended", activestyle="none", **kwargs)
+        self.listbox.pack(side="left", fill="both", expand=True)
+        self.scrollbar = ttk.Scrollbar(self, command=self.on_scrollbar)
+        self.scrollbar.pack(side="left", fill="y")
+        self.row_height = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace") + 1
+        self.listbox.bind("<Configure>", lambda event: self.refresh())
+        self.listbox.bind("<Button-1>", self.on_click)
+        self.listbox.bind("<<ListboxSelect>>", self.on_select)
+        self.listbox.bind("<MouseWheel>", lambda event: self.scroll(-1 if event.delta > 0 else 1, "units"))
+        self.listbox.bind("<Button-4>", lambda event: self.scroll(-1, "units"))
+        self.listbox.bind("<Button-5>", lambda event: self.scroll(1, "units"))
+        self.listbox.bind("<Prior>", lambda event: self.scroll(-1, "pages"))
+        self.listbox.bind("<Next>", lambda event: self.scroll(1, "pages"))
+        self.listbox.bind("<Control-a>", self.select_all)
+
+    def visible_rows(self):
+        return max(1, self.listbox.winfo_height() // self.row_height)
+
+    def on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self.offset = int(float(args[0]) * len(self.items))
+            self.refresh()
+        elif action == "scroll":
+            self.scroll(int(args[0]), args[1])
+
+    def scroll(self, amount, what):
+        step = self.visible_rows() if what == "pages" else 3
+        self.offset += amount * step
+        self.refresh()
+        return "break"
+
+    def on_click(self, event):
+        # Sem Shift/Ctrl, um clique substitui também a seleção fora da janela visível
+        self.extend_selection = bool(event.state & (0x0001 | 0x0004))
+
+    def on_select(self, event=None):
+        if not self.extend_selection:
+            self.selected.clear()
+        visible = set(self.listbox.curselection())
+        for row in range(self.listbox.size()):
+            item = self.items[self.offset + row]
+            if row in visible:
+                self.selected.add(item)
+            else:
+                self.selected.discard(item)
+
+    def select_all(self, event=None):
+        self.selected = set(self.items)
+        self.refresh()
+        return "break"
+
+    def selection(self):
+        return [item for item in self.selected if item in self.items]
+
+    def refresh(self):
+        total = len(self.items)
+        rows = self.visible_rows()
+        self.offset = max(0, min(self.offset, total - rows))
+        window_end = min(total, self.offset + rows + 1)
+        self.listbox.delete(0, tk.END)
+        for position in range(self.offset, window_end):
+            item = self.items[position]
+            self.listbox.insert(tk.END, self.label_func(item))
+            if item in self.selected:
+                self.listbox.selection_set(tk.END)
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
 # -------------------- Função para Abrir Pasta --------------------
 def open_folder(path):
     if platform.system() == "Windows":
@@ -93,14 +182,96 @@ def open_folder(path):
     else:
         print("Sistema operacional não suportado para abrir pastas automaticamente.")
 
+# -------------------- Formatação da Telemetria --------------------
+# Intervalo com que a interface lê o progresso publicado pelos workers
+PROGRESS_POLL_MS = 200
+ACTIVE_FILES_SHOWN = 4
+
+def format_bytes(n):
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} TB"
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+def format_telemetry(snapshot):
+    parts = [
+        f"{format_bytes(snapshot['done_bytes'])} de {format_bytes(snapshot['total_bytes'])}",
+        f"{format_bytes(snapshot['bytes_per_second'])}/s",
+    ]
+    if snapshot["total_files"]:
+        parts.append(f"{snapshot['done_files']} de {snapshot['total_files']} arquivo(s)")
+    parts.append(f"decorrido {format_duration(snapshot['elapsed'])}")
+    if snapshot["eta"] is not None:
+        parts.append(f"restante {format_duration(snapshot['eta'])}")
+    return "  |  ".join(parts)
+
+def format_active(snapshot):
+    lines = [
+        f"{name}: {done * 100 // weight if weight else 100}%"
+        for name, done, weight in snapshot["active"][:ACTIVE_FILES_SHOWN]
+    ]
+    if len(snapshot["active"]) > ACTIVE_FILES_SHOWN:
+        lines.append(f"... e mais {len(snapshot['active']) - ACTIVE_FILES_SHOWN} em andamento")
+    return "\n".join(lines)
+
+# -------------------- Inicialização --------------------
+# ReportLab (hashpm_pdf) e multiprocessing não são importados na abertura:
+# o PDF é carregado em segundo plano depois que a janela aparece, e o pool de
+# processos só quando usado. "python HashPM.py --medir-inicio" mede o tempo
+# até a janela e encerra (usado por hashpm_bench.py, etapa "inicio").
+DEFERRED_MODULES = ("reportlab", "hashpm_pdf", "multiprocessing")
+MEASURE_STARTUP_FLAG = "--medir-inicio"
+
+def warm_up_pdf():
+    try:
+        import hashpm_pdf
+        hashpm_pdf.warm_up()
+    except Exception:
+        pass  # o erro, se persistir, aparece ao gerar a certidão
+
+def startup_report(window_shown=None, error=None):
+    return {
+        "import_seconds": round(IMPORTED - STARTED, 4),
+        "window_seconds": round(window_shown - STARTED, 4) if window_shown else None,
+        "eager_modules": sorted(name for name in DEFERRED_MODULES if name in sys.modules),
+        "error": error,
+    }
+
 # -------------------- Classe Principal do Aplicativo --------------------
 class HashReporterApp:
     def __init__(self, root):
         self.root = root
         self.root.title("Hash PM - Aquisição de Evidência Digital - Versão 1.0")
         self.root.geometry("1400x800")
-        self.file_paths = []
+        self.file_paths = FileSelection()
+        self.folder_paths = set()
+        # Workers nunca tocam o Tk: publicam no monitor ou enfileiram chamadas
+        # em ui_calls, e poll_progress as executa na thread principal
+        self.monitor = ProgressMonitor()
+        self.ui_calls = queue.SimpleQueue()
+        self.busy = False
+        # Aquisições vão para a fila, que respeita o limite por dispositivo de
+        # origem; a verificação continua sendo uma tarefa avulsa (busy)
+        self.acquisition_queue = AcquisitionQueue(on_finished=lambda job: self.call_in_ui(self.job_finished, job))
+        self.queue_view = None
+        self.startup = None
         self.setup_ui()
+        self.poll_progress()
+        # Executado depois que a janela é desenhada
+        self.root.after_idle(self.window_shown)
+
+    def window_shown(self):
+        self.startup = startup_report(time.perf_counter())
+        self.setup_secondary_ui()
+        threading.Thread(target=warm_up_pdf, daemon=True).start()
+        if MEASURE_STARTUP_FLAG in sys.argv:
+            print(json.dumps(self.startup))
+            self.root.destroy()
 
     def setup_ui(self):
         self.style = ttk.Style("litera")
@@ -117,17 +288,14 @@ class HashReporterApp:
         file_frame = ttk.Labelframe(main_frame, text="Arquivos para Análise", padding=10)
         file_frame.pack(fill='both', expand=True, pady=5)
 
-        self.file_listbox = tk.Listbox(file_frame, width=80, height=10)
-        self.file_listbox.pack(side="left", fill="both", expand=True, padx=5)
-
-        scrollbar = ttk.Scrollbar(file_frame)
-        scrollbar.pack(side="left", fill="y")
-        self.file_listbox.config(yscrollcommand=scrollbar.set)
-        scrollbar.config(command=self.file_listbox.yview)
+        self.file_view = VirtualListView(file_frame, self.file_paths, self.file_label, width=80, height=10)
+        self.file_view.pack(side="left", fill="both", expand=True, padx=5)
 
         button_frame = ttk.Frame(file_frame)
         button_frame.pack(side="right", fill="y", padx=10, pady=5)
         ttk.Button(button_frame, text="Adicionar", command=self.browse_files, width=15).pack(pady=5)
+        ttk.Button(button_frame, text="Adicionar Pasta", command=self.browse_folder, width=15).pack(pady=5)
+        ttk.Button(button_frame, text="Adicionar Disco", command=self.browse_device, width=15).pack(pady=5)
         ttk.Button(button_frame, text="Remover", command=self.remove_selected, width=15).pack(pady=5)
         ttk.Button(button_frame, text="Limpar", command=self.clear_list, width=15).pack(pady=5)
 
@@ -142,7 +310,7 @@ class HashReporterApp:
         apreensor_frame.grid(row=0, column=0, sticky="nsew", padx=(0, 5))
         apreensor_frame.grid_columnconfigure(1, weight=1)
 
-        labels_apreensor = ["Nome", "Posto/Graduação", "CPF", "Função", "Orgão", "Portaria", "Unidade da Federação"]
+        labels_apreensor = APREENSOR_FIELDS
         self.entries_apreensor = {}
         posto_options = ["Cel PM", "TCel PM", "Major PM", "Cap PM", "1ºTen PM", "2ºTen PM", "SubTen PM", "1ºSgt PM", "2ºSgt PM", "3ºSgt PM", "Cabo", "Sd PM"]
         funcao_options = ["Autoridade de PJM", "Autoridade Delegada de PJM", "Escrivão PJM"]
@@ -175,7 +343,7 @@ class HashReporterApp:
         proprietario_frame.grid(row=0, column=1, sticky="nsew", padx=(5, 0))
         proprietario_frame.grid_columnconfigure(1, weight=1)
 
-        labels_proprietario = ["Nome", "Tipo", "CPF/CNPJ"]
+        labels_proprietario = PROPRIETARIO_FIELDS
         self.entries_proprietario = {}
         tipo_options = ["Pessoa Física", "Pessoa Jurídica", "Indeterminado"]
 
@@ -192,8 +360,89 @@ class HashReporterApp:
             entry.grid(row=row, column=1, padx=5, pady=5, sticky='ew')
             self.entries_proprietario[label_text] = entry
 
+        options_frame = ttk.Labelframe(main_frame, text="Opções de Aquisição", padding=10)
+        options_frame.pack(fill="x", pady=5)
+        self.verify_var = ttk.BooleanVar(value=True)
+        ttk.Checkbutton(
+            options_frame,
+            text="Verificar cópia após gravação",
+            variable=self.verify_var
+        ).pack(side="left", padx=5)
+        ttk.Label(options_frame, text="Processos paralelos:").pack(side="left", padx=(20, 5))
+        self.workers_var = ttk.IntVar(value=DEFAULT_WORKERS)
+        ttk.Spinbox(options_frame, from_=1, to=64, textvariable=self.workers_var, width=5).pack(side="left")
+        self.processes_var = ttk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            options_frame,
+            text="Usar processos em vez de threads",
+            variable=self.processes_var
+        ).pack(side="left", padx=5)
+
+        ttk.Label(options_frame, text="Modo de cópia:").pack(side="left", padx=(20, 5))
+        self.copy_mode_combo = ttk.Combobox(options_frame, values=list(COPY_MODES), width=32, state="readonly")
+        self.copy_mode_combo.current(0)
+        self.copy_mode_combo.pack(side="left")
+
+        ttk.Label(options_frame, text="Leitura:").pack(side="left", padx=(20, 5))
+        self.io_mode_combo = ttk.Combobox(options_frame, values=list(IO_MODES), width=26, state="readonly")
+        self.io_mode_combo.current(0)
+        self.io_mode_combo.pack(side="left")
+
+        self.strict_var = ttk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            options_frame,
+            text="Modo forense estrito (não reutilizar hashes)",
+            variable=self.strict_var
+        ).pack(side="left", padx=(20, 5))
+        self.content_addressed_var = ttk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            options_frame,
+            text="Armazenar por conteúdo (sem duplicatas)",
+            variable=self.content_addressed_var
+        ).pack(side="left", padx=5)
+        self.archives_var = ttk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            options_frame,
+            text="Hashes dos itens de ZIP/TAR",
+            variable=self.archives_var
+        ).pack(side="left", padx=5)
+        self.device_image_var = ttk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            options_frame,
+            text="Imagem bruta (discos e imagens)",
+            variable=self.device_image_var
+        ).pack(side="left", padx=5)
+        self.package_var = ttk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            options_frame,
+            text="Gerar pacote compactado",
+            variable=self.package_var
+        ).pack(side="left", padx=5)
+        self.profile_var = ttk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            options_frame,
+            text="Registrar desempenho",
+            variable=self.profile_var
+        ).pack(side="left", padx=5)
+
+        algorithms_frame = ttk.Frame(options_frame)
+        algorithms_frame.pack(side="right", padx=5)
+        ttk.Label(algorithms_frame, text="Algoritmos:").pack(side="left", padx=5)
+        self.algorithm_vars = {}
+        for name in HASH_ALGORITHMS:
+            var = ttk.BooleanVar(value=name in DEFAULT_ALGORITHMS)
+            check = ttk.Checkbutton(algorithms_frame, text=name, variable=var)
+            if name == "SHA-256":
+                check.configure(state="disabled")
+            check.pack(side="left", padx=3)
+            self.algorithm_vars[name] = var
+
         self.progress = ttk.Progressbar(main_frame, orient="horizontal", length=400, mode="determinate")
-        self.progress.pack(pady=10)
+        self.progress.pack(pady=(10, 2))
+        self.telemetry_var = ttk.StringVar()
+        ttk.Label(main_frame, textvariable=self.telemetry_var).pack()
+        self.active_var = ttk.StringVar()
+        ttk.Label(main_frame, textvariable=self.active_var, justify="left").pack()
 
         self.status_var = ttk.StringVar()
         self.status_var.set("Pronto.")
@@ -207,6 +456,38 @@ class HashReporterApp:
             bootstyle=SUCCESS,
             width=20
         ).pack(pady=10)
+        self.main_frame = main_frame
+
+    def setup_secondary_ui(self):
+        # Verificação e "Sobre" não são necessários no primeiro quadro
+        verify_frame = ttk.Frame(self.main_frame)
+        verify_frame.pack(pady=5)
+        self.verify_mode_combo = ttk.Combobox(verify_frame, values=list(VERIFY_MODES), width=36, state="readonly")
+        self.verify_mode_combo.current(0)
+        self.verify_mode_combo.pack(side="left", padx=5)
+        ttk.Button(
+            verify_frame,
+            text="Verificar Pasta de Evidências",
+            command=self.verify_evidence_folder,
+            bootstyle=INFO
+        ).pack(side="left", padx=5)
+
+        queue_frame = ttk.Labelframe(self.main_frame, text="Fila de Aquisições", padding=5)
+        queue_frame.pack(fill="x", pady=5)
+        self.queue_view = ttk.Treeview(
+            queue_frame, columns=("portaria", "itens", "situacao", "progresso"), show="headings", height=4
+        )
+        for column, heading, width in (("portaria", "Portaria", 120), ("itens", "Itens", 60),
+                                       ("situacao", "Situação", 700), ("progresso", "Progresso", 90)):
+            self.queue_view.heading(column, text=heading)
+            self.queue_view.column(column, width=width, stretch=column == "situacao")
+        self.queue_view.pack(side="left", fill="x", expand=True, padx=5)
+        self.queue_view.bind("<Double-1>", self.open_job_folder)
+        queue_buttons = ttk.Frame(queue_frame)
+        queue_buttons.pack(side="right", fill="y", padx=5)
+        ttk.Button(queue_buttons, text="Remover da Fila", command=self.cancel_selected_jobs, width=18).pack(pady=2)
+        ttk.Button(queue_buttons, text="Limpar Concluídas", command=self.clear_finished_jobs, width=18).pack(pady=2)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         sobre_frame = ttk.Frame(self.root)
         sobre_frame.pack(side="bottom", anchor="se", padx=10, pady=10)
@@ -226,397 +507,322 @@ class HashReporterApp:
         self.entries_proprietario["CPF/CNPJ"] = entry
 
     def update_status(self, message):
+        # Apenas na thread principal; os workers usam self.monitor.status
         self.status_var.set(message)
-        self.root.update_idletasks()
+
+    def file_label(self, path):
+        if path in self.folder_paths:
+            return f"{path}{os.sep} (pasta completa)"
+        return path
 
     def browse_files(self):
         filepaths = filedialog.askopenfilenames()
         if filepaths:
-            for filepath in filepaths:
-                if filepath not in self.file_paths:
-                    self.file_paths.append(filepath)
-                    self.file_listbox.insert(tk.END, filepath)
-            self.update_status(f"{len(self.file_paths)} arquivo(s) selecionado(s).")
+            self.file_paths.add_many(filepaths)
+            self.file_view.refresh()
+            self.update_status(f"{len(self.file_paths)} item(ns) selecionado(s).")
+
+    def browse_folder(self):
+        # A pasta é percorrida apenas na aquisição, em fluxo; a lista guarda só a raiz
+        folder = filedialog.askdirectory(mustexist=True)
+        if folder and self.file_paths.add_many([folder]):
+            self.folder_paths.add(folder)
+            self.file_view.refresh()
+            self.update_status(f"{len(self.file_paths)} item(ns) selecionado(s).")
+
+    def browse_device(self):
+        # Discos e partições detectados (Linux) ou um caminho digitado, como
+        # \\.\PhysicalDrive1 no Windows; a aquisição passa a ser por imagem bruta
+        from hashpm_image import list_block_devices  # import local: só ao selecionar um disco
+        devices = list_block_devices()
+        window = tk.Toplevel(self.root)
+        window.title("Adicionar Disco")
+        window.transient(self.root)
+        listbox = tk.Listbox(window, width=70, height=min(max(len(devices), 3), 15))
+        for path, size, description in devices:
+            listbox.insert("end", f"{path}   {size / 1024 ** 3:.1f} GB   {description}")
+        listbox.pack(fill="both", expand=True, padx=10, pady=(10, 5))
+        path_var = ttk.StringVar()
+
+        def select(event):
+            if listbox.curselection():
+                path_var.set(devices[listbox.curselection()[0]][0])
+        listbox.bind("<<ListboxSelect>>", select)
+        entry_frame = ttk.Frame(window)
+        entry_frame.pack(fill="x", padx=10, pady=5)
+        ttk.Label(entry_frame, text="Dispositivo ou arquivo de imagem:").pack(side="left")
+        ttk.Entry(entry_frame, textvariable=path_var).pack(side="left", fill="x", expand=True, padx=5)
+
+        def add():
+            path = path_var.get().strip()
+            if not path:
+                return
+            self.file_paths.add_many([path])
+            self.device_image_var.set(True)
+            self.file_view.refresh()
+            self.update_status(f"{path} será adquirido como imagem bruta.")
+            window.destroy()
+        ttk.Button(window, text="Adicionar", command=add, bootstyle=SUCCESS).pack(pady=(0, 10))
 
     def remove_selected(self):
-        selected = self.file_listbox.curselection()
+        selected = self.file_view.selection()
         if selected:
-            index = selected[0]
-            del self.file_paths[index]
-            self.file_listbox.delete(index)
-            self.update_status("Arquivo removido.")
+            removed = self.file_paths.remove_many(selected)
+            self.folder_paths.difference_update(selected)
+            self.file_view.selected.clear()
+            self.file_view.refresh()
+            self.update_status(f"{removed} item(ns) removido(s).")
 
     def clear_list(self):
-        self.file_paths = []
-        self.file_listbox.delete(0, tk.END)
+        self.file_paths.clear()
+        self.folder_paths.clear()
+        self.file_view.selected.clear()
+        self.file_view.refresh()
         self.update_status("Lista de arquivos limpa.")
 
-    def calculate_hashes(self, file_paths, progress_callback=None):
-        hashes = {}
-        total_files = len(file_paths)
-        for i, file_path in enumerate(file_paths):
-            sha256 = hashlib.sha256()
-            try:
-                file_size = os.path.getsize(file_path)
-                chunk_size = 8192
-                bytes_read = 0
-                with open(file_path, "rb") as f:
-                    while True:
-                        chunk = f.read(chunk_size)
-                        if not chunk:
-                            break
-                        sha256.update(chunk)
-                        bytes_read += len(chunk)
-                        if progress_callback and file_size > 0:
-                            progress = int(((i + (bytes_read / file_size)) / total_files) * 100)
-                            progress_callback(progress)
-                hashes[file_path] = {"SHA-256": sha256.hexdigest()}
-            except Exception as e:
-                messagebox.showerror("Erro", f"Falha ao calcular hash para {os.path.basename(file_path)}:\n{e}")
-                return None
-        return hashes
-
-    def create_evidence_folders(self, portaria):
-        base_folder = f"Evidencias_Adquiridas_Portaria_{portaria}"
-        arquivos_folder = os.path.join(base_folder, "Arquivos")
-        certidoes_folder = os.path.join(base_folder, "Certidões")
-        os.makedirs(base_folder, exist_ok=True)
-        os.makedirs(arquivos_folder, exist_ok=True)
-        os.makedirs(certidoes_folder, exist_ok=True)
-        return base_folder, arquivos_folder, certidoes_folder
-
-    def copy_files_to_evidence(self, file_paths, destination_folder):
-        copied_files = []
-        for file_path in file_paths:
+    # -------------------- Progresso e Tarefas em Segundo Plano --------------------
+    def poll_progress(self):
+        for message in self.monitor.messages():
+            self.status_var.set(message)
+        jobs = self.acquisition_queue.snapshot()
+        for job in list(self.acquisition_queue.jobs):
+            for message in job["monitor"].messages():
+                self.status_var.set(f"Portaria {job['portaria']}: {message}")
+        if self.busy:
+            self.show_snapshot(self.monitor.snapshot())
+        else:
+            self.show_job_progress(jobs)
+        self.refresh_queue_view(jobs)
+        while True:
             try:
-                filename = os.path.basename(file_path)
-                dest_path = os.path.join(destination_folder, filename)
-                shutil.copy2(file_path, dest_path)
-                copied_files.append(dest_path)
-            except Exception as e:
-                messagebox.showerror("Erro", f"Falha ao copiar arquivo {filename}:\n{e}")
-                return None
-        return copied_files
-
-    def generate_minuta_juntada(self, file_paths, output_path):
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write("MINUTA DE JUNTADA\n\n")
-            f.write(f"Data: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n\n")
-            f.write("LISTA DE ARQUIVOS ADQUIRIDOS:\n\n")
-            for i, file_path in enumerate(file_paths, 1):
-                f.write(f"{i}. {os.path.basename(file_path)}\n")
-
-    def generate_pdf(self, file_paths, user_data, proprietario_data, hashes, output_path):
-        # Mapping of Unidade da Federação to header details
-        state_headers = {
-            "Acre": ("Estado do Acre", "Secretaria de Estado de Justiça e Segurança Pública", "Polícia Militar do Acre"),
-            "Amapá": ("Estado do Amapá", "Secretaria de Estado da Justiça e Segurança Pública", "Polícia Militar do Amapá"),
-            "Amazonas": ("Estado do Amazonas", "Secretaria de Estado de Segurança Pública", "Polícia Militar do Amazonas"),
-            "Pará": ("Estado do Pará", "Secretaria de Estado de Segurança Pública e Defesa Social", "Polícia Militar do Pará"),
-            "Rondônia": ("Estado de Rondônia", "Secretaria de Estado da Segurança, Defesa e Cidadania", "Polícia Militar do Estado de Rondônia"),
-            "Roraima": ("Estado de Roraima", "Secretaria de Estado da Segurança Pública", "Polícia Militar de Roraima"),
-            "Tocantins": ("Estado do Tocantins", "Secretaria da Segurança Pública", "Polícia Militar do Tocantins"),
-            "Alagoas": ("Estado de Alagoas", "Secretaria de Estado da Segurança Pública", "Polícia Militar de Alagoas"),
-            "Bahia": ("Estado da Bahia", "Secretaria de Segurança Pública", "Polícia Militar da Bahia"),
-            "Ceará": ("Estado do Ceará", "Secretaria da Segurança Pública e Defesa Social", "Polícia Militar do Ceará"),
-            "Maranhão": ("Estado do Maranhão", "Secretaria de Estado da Segurança Pública", "Polícia Militar do Maranhão"),
-            "Paraíba": ("Estado da Paraíba", "Secretaria de Estado da Segurança e da Defesa Social", "Polícia Militar da Paraíba"),
-            "Pernambuco": ("Estado de Pernambuco", "Secretaria de Defesa Social", "Polícia Militar de Pernambuco"),
-            "Piauí": ("Estado do Piauí", "Secretaria de Estado da Segurança Pública", "Polícia Militar do Piauí"),
-            "Rio Grande do Norte": ("Estado do Rio Grande do Norte", "Secretaria de Estado da Segurança Pública e da Defesa Social", "Polícia Militar do Rio Grande do Norte"),
-            "Sergipe": ("Estado de Sergipe", "Secretaria de Estado da Segurança Pública", "Polícia Militar do Estado de Sergipe"),
-            "Goiás": ("Estado de Goiás", "Secretaria de Estado de Segurança Pública", "Polícia Militar do Estado de Goiás"),
-            "Mato Grosso": ("Estado de Mato Grosso", "Secretaria de Estado de Segurança Pública", "Polícia Militar do Estado de Mato Grosso"),
-            "Mato Grosso do Sul": ("Estado de Mato Grosso do Sul", "Secretaria de Estado de Justiça e Segurança Pública", "Polícia Militar de Mato Grosso do Sul"),
-            "Distrito Federal": ("Distrito Federal", "Secretaria de Estado de Segurança Pública do Distrito Federal", "Polícia Militar do Distrito Federal"),
-            "Espírito Santo": ("Estado do Espírito Santo", "Secretaria de Estado da Segurança Pública e Defesa Social", "Polícia Militar do Espírito Santo"),
-            "Minas Gerais": ("Estado de Minas Gerais", "Secretaria de Estado de Justiça e Segurança Pública", "Polícia Militar de Minas Gerais"),
-            "Rio de Janeiro": ("Estado do Rio de Janeiro", "Secretaria de Estado de Polícia Militar", "Polícia Militar do Estado do Rio de Janeiro"),
-            "São Paulo": ("Estado de São Paulo", "Secretaria da Segurança Pública", "Polícia Militar do Estado de São Paulo"),
-            "Paraná": ("Estado do Paraná", "Secretaria de Estado da Segurança Pública", "Polícia Militar do Paraná"),
-            "Santa Catarina": ("Estado de Santa Catarina", "Secretaria de Estado da Segurança Pública", "Polícia Militar de Santa Catarina"),
-            "Rio Grande do Sul": ("Estado do Rio Grande do Sul", "Secretaria de Segurança Pública", "Brigada Militar")
-        }
+                call = self.ui_calls.get_nowait()
+            except queue.Empty:
+                break
+            call()
+        self.root.after(PROGRESS_POLL_MS, self.poll_progress)
+
+    def show_snapshot(self, snapshot):
+        self.progress["value"] = snapshot["percent"]
+        self.telemetry_var.set(format_telemetry(snapshot))
+        self.active_var.set(format_active(snapshot))
+
+    def show_job_progress(self, jobs):
+        # Aquisição em andamento selecionada na fila ou, sem seleção, a primeira
+        running = [job for job in jobs if job["progress"]]
+        if not running:
+            return
+        selected = set(self.queue_view.selection()) if self.queue_view else set()
+        job = next((job for job in running if str(job["id"]) in selected), running[0])
+        self.show_snapshot(job["progress"])
+        self.telemetry_var.set(f"Portaria {job['portaria']}  |  " + format_telemetry(job["progress"]))
 
-        selected_uf = user_data.get("Unidade da Federação", "Rio Grande do Sul")
-        state, secretariat, police = state_headers.get(selected_uf, state_headers["Rio Grande do Sul"])
-
-        now = datetime.now()
-        c = canvas.Canvas(output_path, pagesize=A4)
-        width, height = A4
-
-        margin_left = 2 * cm
-        margin_right = width - 1.5 * cm
-        margin_top = height - 1.5 * cm
-        margin_bottom = 1.5 * cm
-
-        available_height = height - margin_top - margin_bottom
-
-        styles = getSampleStyleSheet()
-        normal_style = styles['Normal']
-        certidao_style = ParagraphStyle('Certidao', parent=normal_style, fontSize=12, leading=14, alignment=4)
-        title_style = ParagraphStyle('Title', parent=normal_style, fontName='Helvetica-Bold', fontSize=14, alignment=1)
-        header_style = ParagraphStyle('Header', parent=normal_style, fontName='Helvetica', fontSize=12, alignment=1, leading=14)
-        info_style = ParagraphStyle('Info', parent=normal_style, fontSize=10, leading=14, spaceAfter=5)
-        file_info_style = ParagraphStyle('FileInfo', parent=normal_style, fontSize=10, leading=14, leftIndent=12)
-        section_title_style = ParagraphStyle('SectionTitle', parent=normal_style, fontName='Helvetica-Bold', fontSize=10, leading=14)
-
-        current_y = margin_top
-
-        def check_space(required_height):
-            nonlocal current_y
-            if current_y - required_height < margin_bottom:
-                self.add_footer(c, width, height, now)
-                c.showPage()
-                current_y = margin_top
-                return True
-            return False
-
-        def draw_centered_text(text, style, y):
-            available_width = margin_right - margin_left
-            p = Paragraph(text, style)
-            w, h = p.wrap(available_width, available_height)
-            if check_space(h):
-                y = margin_top
-            x = margin_left + (available_width - w) / 2
-            p.drawOn(c, x, y - h)
-            return h
+    def refresh_queue_view(self, jobs):
+        if self.queue_view is None:
+            return
+        ids = set()
+        for job in jobs:
+            iid = str(job["id"])
+            ids.add(iid)
+            state = JOB_STATES[job["state"]]
+            if job["error"]:
+                state += ": " + " ".join(job["error"].split())
+            values = (job["portaria"], job["items"], state, f"{job['progress']['percent']}%" if job["progress"] else "")
+            if self.queue_view.exists(iid):
+                self.queue_view.item(iid, values=values)
+            else:
+                self.queue_view.insert("", "end", iid=iid, values=values)
+        for iid in self.queue_view.get_children():
+            if iid not in ids:
+                self.queue_view.delete(iid)
+
+    def selected_jobs(self):
+        selected = set(self.queue_view.selection()) if self.queue_view else set()
+        return [job for job in self.acquisition_queue.snapshot() if str(job["id"]) in selected]
+
+    def cancel_selected_jobs(self):
+        cancelled = sum(self.acquisition_queue.cancel(job["id"]) for job in self.selected_jobs())
+        if cancelled:
+            self.update_status(f"{cancelled} aquisição(ões) removida(s) da fila.")
+        elif self.selected_jobs():
+            messagebox.showinfo("Fila", "Apenas aquisições ainda não iniciadas podem ser removidas.")
+
+    def clear_finished_jobs(self):
+        self.acquisition_queue.clear_finished()
+
+    def open_job_folder(self, event=None):
+        for job in self.selected_jobs():
+            if job["base_folder"]:
+                open_folder(job["base_folder"])
+
+    def on_close(self):
+        pending = self.acquisition_queue.pending()
+        if pending and not messagebox.askyesno(
+            "Aquisições pendentes",
+            f"Há {pending} aquisição(ões) na fila ou em andamento. Encerrar assim mesmo?\n"
+            "Uma aquisição interrompida é retomada ao ser repetida com a mesma portaria."
+        ):
+            return
+        self.root.destroy()
 
-        try:
-            brasao_path = self.get_resource_path("brasao.png")
-            brasao_width = 2.5 * cm
-            brasao_height = 3 * cm
-            if check_space(brasao_height + 0.5 * cm):
-                current_y = margin_top
-            c.drawImage(brasao_path, (width - brasao_width) / 2, current_y - brasao_height,
-                        width=brasao_width, height=brasao_height, preserveAspectRatio=True, mask='auto')
-            current_y -= brasao_height + 0.5 * cm
-        except Exception:
-            pass
-
-        current_y -= draw_centered_text(state, header_style, current_y)
-        current_y -= 0.3 * cm  # Reduced spacing for single spacing
-        current_y -= draw_centered_text(secretariat, header_style, current_y)
-        current_y -= 0.3 * cm  # Reduced spacing for single spacing
-        current_y -= draw_centered_text(police, header_style, current_y)
-        current_y -= 1 * cm  # Reduced spacing after header
-
-        current_y -= draw_centered_text("CERTIDÃO DE AQUISIÇÃO", title_style, current_y)
-        current_y -= 0.3 * cm  # Reduced spacing for single spacing
-        current_y -= draw_centered_text("DE EVIDÊNCIA DIGITAL", title_style, current_y)
-        current_y -= 1 * cm  # Reduced spacing after title
-
-        cert_text = (
-            f"Certifico a aquisição da evidência digital abaixo relacionada em {now.strftime('%d/%m/%Y %H:%M')}, "
-            f"por {user_data['Posto/Graduação']} {user_data['Nome']}, em conformidade com os Artigos 158-A a 158-D "
-            "do CPP e Norma ABNT NBR ISO/IEC 27037:2013.<br/>"
-            "O arquivo foi copiado para dispositivo seguro, com hash SHA-256 para integridade.<br/>"
-            "Esta aquisição observa os princípios da cadeia de custódia, conforme a legislação vigente, para preservar "
-            "a autenticidade e integridade da prova digital."
-        )
-        p = Paragraph(cert_text, certidao_style)
-        w, h = p.wrap(margin_right - margin_left, available_height)
-        if check_space(h + 0.5 * cm):
-            current_y = margin_top
-        p.drawOn(c, margin_left, current_y - h)
-        current_y -= h + 0.5 * cm
-
-        if check_space(0.1 * cm):
-            current_y = margin_top
-        c.line(margin_left, current_y, margin_right, current_y)
-        current_y -= 0.5 * cm
-
-        # Dados do apreensor e proprietário lado a lado com títulos alinhados
-        column_width = (margin_right - margin_left - 1 * cm) / 2
-        apreensor_title = "<b>Apreensor:</b>"
-        proprietario_title = "<b>Proprietário das Evidências:</b>"
-        apreensor_text = (
-            f"<b>Nome:</b> {user_data['Posto/Graduação']} {user_data['Nome']}<br/>"
-            f"<b>CPF:</b> {user_data['CPF']}<br/>"
-            f"<b>Função:</b> {user_data['Função']}<br/>"
-            f"<b>Orgão:</b> {user_data['Orgão']}<br/>"
-            f"<b>Portaria:</b> {user_data['Portaria']}<br/>"
-            f"<b>Data e hora:</b> {now.strftime('%d/%m/%Y %H:%M:%S')}"
-        )
-        proprietario_text = (
-            f"<b>Nome:</b> {proprietario_data['Nome']}<br/>"
-            f"<b>Tipo:</b> {proprietario_data['Tipo']}<br/>"
-            f"<b>CPF/CNPJ:</b> {proprietario_data['CPF/CNPJ']}"
-        )
+    def call_in_ui(self, func, *args):
+        self.ui_calls.put(lambda: func(*args))
+
+    def start_task(self, target, *args):
+        # Uma verificação por vez; as aquisições seguem pela fila
+        if self.busy:
+            messagebox.showinfo("Aguarde", "Há uma operação em andamento.")
+            return
+        self.busy = True
+        self.monitor.reset()
+        self.progress["value"] = 0
+        threading.Thread(target=self.run_task, args=(target,) + args, daemon=True).start()
 
-        p_apreensor_title = Paragraph(apreensor_title, section_title_style)
-        p_proprietario_title = Paragraph(proprietario_title, section_title_style)
-        p_apreensor_content = Paragraph(apreensor_text, info_style)
-        p_proprietario_content = Paragraph(proprietario_text, info_style)
-
-        w, h_apre_title = p_apreensor_title.wrap(column_width, available_height)
-        w, h_proprio_title = p_proprietario_title.wrap(column_width, available_height)
-        w, h_apre_content = p_apreensor_content.wrap(column_width, available_height - h_apre_title)
-        w, h_proprio_content = p_proprietario_content.wrap(column_width, available_height - h_proprio_title)
-
-        title_height = max(h_apre_title, h_proprio_title)
-        content_height = max(h_apre_content, h_proprio_content)
-        total_height = title_height + content_height + 0.2 * cm
-
-        if check_space(total_height + 0.5 * cm):
-            current_y = margin_top
-
-        p_apreensor_title.drawOn(c, margin_left, current_y - title_height)
-        p_proprietario_title.drawOn(c, margin_left + column_width + 1 * cm, current_y - title_height)
-        current_y -= title_height + 0.2 * cm
-
-        p_apreensor_content.drawOn(c, margin_left, current_y - h_apre_content)
-        p_proprietario_content.drawOn(c, margin_left + column_width + 1 * cm, current_y - h_proprio_content)
-        current_y -= content_height + 0.5 * cm
-
-        if check_space(0.1 * cm):
-            current_y = margin_top
-        c.line(margin_left, current_y, margin_right, current_y)
-        current_y -= 0.5 * cm
-
-        for file_path in file_paths:
-            base = os.path.basename(file_path)
-            file_size = os.path.getsize(file_path)
-            size_kb = round(file_size / 1024, 2)
-            file_text = (
-                f"<b>Nome:</b> {base}<br/>"
-                f"<b>Tamanho:</b> {size_kb} KB<br/>"
-                f"<b>Hash SHA-256:</b> {hashes[file_path]['SHA-256']}"
+    def run_task(self, target, *args):
+        # target devolve a chamada (função e argumentos) que exibe o resultado
+        # na interface, executada depois de encerrado o progresso
+        outcome = None
+        try:
+            outcome = target(*args)
+        finally:
+            self.call_in_ui(self.finish_task)
+            if outcome:
+                self.call_in_ui(*outcome)
+
+    def finish_task(self):
+        # Mensagens ainda na fila são exibidas antes do resumo final
+        for message in self.monitor.messages():
+            self.status_var.set(message)
+        self.busy = False
+        self.show_summary(self.monitor.snapshot())
+
+    def show_summary(self, snapshot):
+        self.show_snapshot(snapshot)
+        self.active_var.set("")
+        if snapshot["elapsed"]:
+            self.telemetry_var.set(
+                f"{format_bytes(snapshot['done_bytes'])} em {format_duration(snapshot['elapsed'])} "
+                f"(média de {format_bytes(snapshot['done_bytes'] / snapshot['elapsed'])}/s)"
             )
-            p = Paragraph(file_text, file_info_style)
-            w, h = p.wrap(margin_right - margin_left, available_height)
-            if check_space(h + 0.5 * cm):
-                current_y = margin_top
-            p.drawOn(c, margin_left, current_y - h)
-            current_y -= h + 0.5 * cm
-
-            if check_space(0.1 * cm):
-                current_y = margin_top
-            c.setDash([2, 2], 0)
-            c.line(margin_left, current_y, margin_right, current_y)
-            c.setDash([])
-            current_y -= 0.5 * cm
-
-        if check_space(0.1 * cm):
-            current_y = margin_top
-        c.line(margin_left, current_y, margin_right, current_y)
-        current_y -= 0.5 * cm
-
-        nota_text = (
-            "<b>Nota Técnica de Extração:</b><br/>"
-            "A extração de hash SHA-256 é utilizada para garantir a integridade de arquivos digitais. "
-            "O software Hash BM utiliza linguagem Python e a biblioteca hashlib para ler o arquivo em blocos binários, "
-            "gerando um hash que funciona como uma 'impressão digital' do arquivo."
-        )
-        p = Paragraph(nota_text, file_info_style)
-        w, h = p.wrap(margin_right - margin_left, available_height)
-        if check_space(h + 0.5 * cm):
-            current_y = margin_top
-        p.drawOn(c, margin_left, current_y - h)
-        current_y -= h + 0.5 * cm
-
-        if check_space(0.1 * cm):
-            current_y = margin_top
-        c.line(margin_left, current_y, margin_right, current_y)
-        current_y -= 3 * cm
-
-        assinatura_area = 3 * cm
-        if check_space(assinatura_area):
-            current_y = margin_top
-
-        signature_y = margin_bottom + assinatura_area
-        sig_width = 8 * cm
-        line_left = width / 2 - 4 * cm
-        line_right = width / 2 + 4 * cm
-        c.line(line_left, signature_y, line_right, signature_y)
-
-        p_assinatura = Paragraph(
-            f"{user_data['Posto/Graduação']} {user_data['Nome']}",
-            ParagraphStyle('Assinatura', parent=normal_style, fontSize=11, alignment=1)
-        )
-        w, h = p_assinatura.wrap(sig_width, available_height)
-        x = width / 2 - w / 2
-        p_assinatura.drawOn(c, x, signature_y - (h + 0.7 * cm))
-
-        self.add_footer(c, width, height, now)
-        c.showPage()
-        c.save()
-
-    def add_footer(self, c, width, height, now):
-        c.setFont("Helvetica", 8)
-        footer_text = f"Gerado por Hash PM - Aquisição em {now.strftime('%d/%m/%Y %H:%M')}"
-        c.drawString(2 * cm, 1 * cm, footer_text)
-        page_num = c.getPageNumber()
-        c.drawRightString(width - 1.5 * cm, 1 * cm, f"Página {page_num}")
-
-    def get_resource_path(self, relative_path):
-        if hasattr(sys, '_MEIPASS'):
-            return os.path.join(sys._MEIPASS, relative_path)
-        return os.path.abspath(relative_path)
-
-    def update_progress(self, value):
-        self.progress["value"] = int(value)
-        self.root.update_idletasks()
 
     def thread_generate_report(self):
-        t = threading.Thread(target=self.generate_report)
-        t.start()
-
-    def generate_report(self):
-        if not self.file_paths:
-            messagebox.showwarning("Aviso", "Selecione pelo menos um arquivo!")
-            return
-
+        # Os widgets são lidos aqui, na thread principal; a aquisição entra na fila
+        # e roda em outra thread assim que o dispositivo de origem estiver livre
         if isinstance(self.entries_apreensor["CPF"], CPFEntry):
             self.entries_apreensor["CPF"].apply_mask()
         if isinstance(self.entries_proprietario["CPF/CNPJ"], (CPFEntry, CNPJEntry)):
             self.entries_proprietario["CPF/CNPJ"].apply_mask()
 
-        user_data = {key: entry.get().strip() or "Não informado" for key, entry in self.entries_apreensor.items()}
-        proprietario_data = {key: entry.get().strip() or "Indeterminado" for key, entry in self.entries_proprietario.items()}
-
-        if not validar_cpf(user_data['CPF']):
-            messagebox.showerror("Erro", "CPF do Apreensor inválido! Verifique e tente novamente.")
+        user_data, proprietario_data = prepare_acquisition_data(
+            {key: entry.get() for key, entry in self.entries_apreensor.items()},
+            {key: entry.get() for key, entry in self.entries_proprietario.items()}
+        )
+        options = {
+            "verify": self.verify_var.get(),
+            "workers": self.workers_var.get(),
+            "use_processes": self.processes_var.get(),
+            "algorithms": [name for name, var in self.algorithm_vars.items() if var.get()],
+            "copy_mode": COPY_MODES[self.copy_mode_combo.get()],
+            "io_mode": IO_MODES[self.io_mode_combo.get()],
+            "strict": self.strict_var.get(),
+            "content_addressed": self.content_addressed_var.get(),
+            # Com a pré-varredura o total é conhecido desde o início e a estimativa de término é confiável
+            "prescan": True,
+            "archives": self.archives_var.get(),
+            "device_image": self.device_image_var.get(),
+            "package": self.package_var.get(),
+            "profile": self.profile_var.get(),
+        }
+        try:
+            job = self.acquisition_queue.submit(list(self.file_paths), user_data, proprietario_data, options)
+        except IncompleteDataError as e:
+            messagebox.showwarning("Aviso", str(e))
             return
-
-        if proprietario_data['Tipo'] == "Pessoa Física" and proprietario_data['CPF/CNPJ'] != "Indeterminado":
-            if not validar_cpf(proprietario_data['CPF/CNPJ']):
-                messagebox.showerror("Erro", "CPF do Proprietário inválido! Verifique e tente novamente.")
-                return
-        elif proprietario_data['Tipo'] == "Pessoa Jurídica" and proprietario_data['CPF/CNPJ'] != "Indeterminado":
-            if not validar_cnpj(proprietario_data['CPF/CNPJ']):
-                messagebox.showerror("Erro", "CNPJ do Proprietário inválido! Verifique e tente novamente.")
-                return
-
-        if (not user_data['Nome'] or not user_data['Posto/Graduação'] or
-                not user_data['CPF'] or not user_data['Portaria']):
-            messagebox.showwarning("Aviso", "Preencha todos os dados obrigatórios do Apreensor!")
+        except AcquisitionError as e:
+            messagebox.showerror("Erro", str(e))
+            return
+        position = sum(other["state"] == "fila" for other in self.acquisition_queue.snapshot())
+        if job["state"] == "fila":
+            self.update_status(f"Aquisição da portaria {job['portaria']} aguardando na fila (posição {position}).")
+
+    def job_finished(self, job):
+        # Com outras aquisições pendentes o resultado fica na fila, sem diálogo
+        # bloqueando a interface; a última exibe o resumo como antes
+        if job["state"] == "falha":
+            messagebox.showerror("Erro", f"Portaria {job['portaria']}:\n{job['error']}")
             return
+        self.show_summary(job["monitor"].snapshot())
+        if self.acquisition_queue.pending():
+            self.update_status(f"Portaria {job['portaria']}: certidão gerada.")
+            return
+        self.acquisition_finished(job["result"])
+
+    def acquisition_finished(self, result):
+        # Arquivos presentes em conjuntos de alerta são destacados ao final
+        # (inclusive itens de arquivos ZIP/TAR)
+        alerts = sum(
+            any(match["kind"] == "alerta" for match in item.get("hash_set_matches") or [])
+            for info in result["file_info"].values()
+            for item in [info] + ((info.get("archive") or {}).get("members") or [])
+        )
+        if alerts:
+            messagebox.showwarning(
+                "Conjunto de alerta",
+                f"{alerts} arquivo(s) ou item(ns) constam de conjuntos de hashes de alerta. Veja a certidão."
+            )
+        bad_sectors = sum(
+            info["image"]["bad_bytes"] // info["image"]["sector_size"]
+            for info in result["file_info"].values() if info.get("image")
+        )
+        if bad_sectors:
+            messagebox.showwarning(
+                "Setores ilegíveis",
+                f"{bad_sectors} setor(es) não puderam ser lidos e foram preenchidos com zeros na imagem. "
+                "Os intervalos constam da certidão."
+            )
+        package = result["package"]
+        if package and package["diverging"]:
+            messagebox.showwarning(
+                "Pacote",
+                f"{len(package['diverging'])} arquivo(s) não conferem com o manifesto de aquisição ao serem "
+                "empacotados. Veja a certidão de empacotamento."
+            )
+        if messagebox.askyesno("Sucesso", "Certidão e documentos gerados com sucesso!\nDeseja abrir a pasta com os arquivos?"):
+            open_folder(result["base_folder"])
 
-        portaria = user_data['Portaria']
-        base_folder, arquivos_folder, certidoes_folder = self.create_evidence_folders(portaria)
-        copied_files = self.copy_files_to_evidence(self.file_paths, arquivos_folder)
-        if not copied_files:
+    def verify_evidence_folder(self):
+        folder = filedialog.askdirectory(title="Selecione a pasta Evidencias_Adquiridas_Portaria_...")
+        if not folder:
             return
+        mode = VERIFY_MODES[self.verify_mode_combo.get()]
+        # Os dados do apreensor preenchidos identificam o responsável pela verificação
+        user_data, _ = prepare_acquisition_data(
+            {key: entry.get() for key, entry in self.entries_apreensor.items()}, {}
+        )
+        self.start_task(
+            self.run_verification, folder, mode, user_data, self.workers_var.get(), self.processes_var.get()
+        )
 
-        self.update_status("Calculando hashes dos arquivos...")
-        self.progress["value"] = 0
-        hashes = self.calculate_hashes(copied_files, self.update_progress)
-        if hashes:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            pdf_filename = f"Certidao_{timestamp}.pdf"
-            pdf_path = os.path.join(certidoes_folder, pdf_filename)
-            try:
-                self.update_status("Gerando relatório PDF...")
-                self.generate_pdf(copied_files, user_data, proprietario_data, hashes, pdf_path)
-                ninuta_path = os.path.join(certidoes_folder, f"Minuta_de_Juntada_{timestamp}.txt")
-                self.generate_minuta_juntada(copied_files, ninuta_path)
-                self.update_status("Relatório gerado com sucesso!")
-                if messagebox.askyesno("Sucesso", "Certidão e documentos gerados com sucesso!\nDeseja abrir a pasta com os arquivos?"):
-                    open_folder(base_folder)
-            except Exception as e:
-                messagebox.showerror("Erro", f"Falha ao gerar arquivos:\n{e}")
-                self.update_status("Erro na geração do relatório.")
+    def run_verification(self, folder, mode, user_data, workers, use_processes):
+        try:
+            report = run_verification(
+                folder, mode, user_data, workers=workers, use_processes=use_processes,
+                progress_callback=self.monitor, status_callback=self.monitor.status
+            )
+        except AcquisitionError as e:
+            return messagebox.showerror, "Erro", str(e)
+        return self.verification_finished, report
+
+    def verification_finished(self, report):
+        summary = (
+            f"Conferidos sem divergência: {len(report['ok'])} de {report['expected']}\n"
+            f"Modificados: {len(report['modified'])}\n"
+            f"Ausentes: {len(report['missing'])}\n"
+            f"Não registrados no manifesto: {len(report['extra'])}\n\n"
+            "Deseja abrir a pasta com a certidão de verificação?"
+        )
+        title = "Evidências íntegras" if report["intact"] else "Divergências encontradas"
+        if messagebox.askyesno(title, summary):
+            open_folder(os.path.dirname(report["pdf_path"]))
 
     def mostrar_sobre(self):
         sobre_janela = tk.Toplevel(self.root)
@@ -633,7 +839,7 @@ O Hash PM é uma ferramenta desenvolvida para auxiliar na extração segura e do
 
 • Dados do apreensor e proprietário das evidências;
 • Informações detalhadas do(s) arquivo(s);
-• Hash SHA-256 de cada item coletado;
+• Hash SHA-256 (e, opcionalmente, SHA-1, MD5, SHA-512 e BLAKE2b) de cada item coletado;
 • Local, data e hora da ação;
 • Espaço para validação formal.
 
@@ -647,6 +853,13 @@ robinson-lemos@bm.rs.gov.br
         label.pack(expand=True, fill="both")
 
 if __name__ == "__main__":
-    root = ttk.Window()
+    try:
+        root = ttk.Window()
+    except tk.TclError as e:
+        # Sem ambiente gráfico: na medição, informa ao menos o tempo de importação
+        if MEASURE_STARTUP_FLAG not in sys.argv:
+            raise
+        print(json.dumps(startup_report(error=str(e))))
+        sys.exit(1)
     app = HashReporterApp(root)
     root.mainloop()
\ No newline at end of file
@@ -0,0 +1,176 @@
+import os
+import lzma
+import zlib
+import tarfile
+import zipfile
+from hashpm_core import DEFAULT_WORKERS, choose_chunk_size, hexdigests, new_hashers, read_chunks, run_pipeline, update_hashers
+from hashpm_manifest import iso_time
+
+# Reconhecidos pela extensão: documentos que também são ZIP (DOCX, XLSX,
+# APK...) continuam sendo tratados como um único arquivo
+ARCHIVE_EXTENSIONS = {
+    ".zip": "zip",
+    ".tar": "tar",
+    ".tar.gz": "tar",
+    ".tgz": "tar",
+    ".tar.bz2": "tar",
+    ".tbz2": "tar",
+    ".tar.xz": "tar",
+    ".txz": "tar",
+}
+# Itens de um ZIP são divididos em lotes por worker; cada lote abre o ZIP
+# (e lê o diretório central) uma única vez
+ZIP_BATCHES_PER_WORKER = 4
+# Erros de conteúdo compactado: o item (ou, no TAR, o restante do pacote) é
+# registrado como ilegível, sem interromper a aquisição
+ARCHIVE_ERRORS = (zipfile.BadZipFile, tarfile.TarError, zlib.error, lzma.LZMAError, EOFError,
+                  NotImplementedError, RuntimeError, ValueError)
+
+# -------------------- Hash dos Itens de Arquivos Compactados --------------------
+# Exportações (WhatsApp, nuvem) costumam chegar em ZIP ou TAR. Cada item é
+# lido diretamente do pacote copiado para Arquivos/, descomprimido em fluxo e
+# passado pelos mesmos algoritmos do pacote, sem ser extraído para o disco.
+# Itens de ZIP são independentes e lidos em paralelo; um TAR (comprimido ou
+# não) é sequencial e é lido por um único worker, em paralelo com os demais
+# pacotes. Pacotes dentro de pacotes não são abertos.
+def archive_format(name):
+    lower = name.lower()
+    for extension, archive_type in ARCHIVE_EXTENSIONS.items():
+        if lower.endswith(extension):
+            return archive_type
+    return None
+
+def describe_error(error):
+    return f"{type(error).__name__}: {error}"
+
+def member_time(timestamp):
+    # Data de um item de TAR; fora do intervalo representável (cabeçalho
+    # corrompido ou forjado) fica desconhecida, sem interromper a listagem
+    try:
+        return iso_time(timestamp)
+    except (OverflowError, ValueError, OSError):
+        return None
+
+def hash_stream(f, size, algorithms, progress_callback=None):
+    hashers = new_hashers(algorithms)
+    for chunk in read_chunks(f, choose_chunk_size(size)):
+        update_hashers(hashers, chunk)
+        if progress_callback:
+            progress_callback(len(chunk))
+    return hexdigests(hashers)
+
+def hash_zip_members(file_path, indexes, algorithms, progress_callback=None):
+    # Pelo índice no diretório central: nomes repetidos num ZIP são possíveis.
+    # A leitura completa de cada item confere também o seu CRC-32.
+    # Devolve [(índice, registro)].
+    results = []
+    with zipfile.ZipFile(file_path) as archive:
+        infos = archive.infolist()
+        for index in indexes:
+            info = infos[index]
+            record = {
+                "name": info.filename,
+                "size": info.file_size,
+                "compressed_size": info.compress_size,
+                # O ZIP guarda a data local, sem fuso horário
+                "mtime": "{:04d}-{:02d}-{:02d}T{:02d}:{:02d}:{:02d}".format(*info.date_time),
+                "hashes": None,
+            }
+            if info.flag_bits & 0x1:
+                record["error"] = "item criptografado"
+            else:
+                try:
+                    with archive.open(info) as f:
+                        record["hashes"] = hash_stream(f, info.file_size, algorithms, progress_callback)
+                except ARCHIVE_ERRORS as e:
+                    record["error"] = describe_error(e)
+            results.append((index, record))
+    return results
+
+class CountingReader:
+    # O progresso de um TAR é medido nos bytes lidos do pacote (comprimidos),
+    # já que o tamanho dos itens só é conhecido ao percorrê-lo
+    def __init__(self, f, progress_callback):
+        self.f = f
+        self.progress_callback = progress_callback
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        if self.progress_callback and data:
+            self.progress_callback(len(data))
+        return data
+
+def hash_tar_members(file_path, algorithms, progress_callback=None):
+    # Modo de fluxo ("r|*"): uma única leitura sequencial, também para
+    # .tar.gz/.bz2/.xz. Um erro encerra a leitura, mas os itens anteriores
+    # permanecem. Devolve ([registros], erro).
+    members = []
+    error = None
+    with open(file_path, "rb") as raw:
+        try:
+            with tarfile.open(fileobj=CountingReader(raw, progress_callback), mode="r|*") as archive:
+                for member in archive:
+                    if not member.isfile():
+                        continue
+                    record = {"name": member.name, "size": member.size, "mtime": member_time(member.mtime)}
+                    record["hashes"] = hash_stream(archive.extractfile(member), member.size, algorithms)
+                    members.append(record)
+        except (ARCHIVE_ERRORS + (OSError,)) as e:
+            error = describe_error(e)
+    return members, error
+
+def zip_batches(file_path, workers):
+    # [(índices, volume descomprimido)], equilibrados pelo tamanho dos itens
+    with zipfile.ZipFile(file_path) as archive:
+        infos = archive.infolist()
+    count = max(1, min(len(infos), workers * ZIP_BATCHES_PER_WORKER))
+    batches = [([], 0) for _ in range(count)]
+    for index in sorted(range(len(infos)), key=lambda index: infos[index].file_size, reverse=True):
+        if infos[index].is_dir():
+            continue
+        lightest = min(range(count), key=lambda b: batches[b][1])
+        indexes, weight = batches[lightest]
+        indexes.append(index)
+        batches[lightest] = (indexes, weight + infos[index].file_size)
+    return [batch for batch in batches if batch[0]]
+
+def hash_archive_part(file_path, archive_type, indexes, algorithms, progress_callback=None):
+    # Uma tarefa do pool: um lote de itens de ZIP ou um TAR inteiro.
+    # Devolve {"members": [(posição, registro)], "error"}.
+    if archive_type == "zip":
+        return {"members": hash_zip_members(file_path, indexes, algorithms, progress_callback), "error": None}
+    members, error = hash_tar_members(file_path, algorithms, progress_callback)
+    return {"members": list(enumerate(members)), "error": error}
+
+def hash_archives(files, algorithms, workers=None, use_processes=False, progress=None):
+    # files: [(chave, caminho, formato)]. Os lotes de todos os ZIP e os TAR
+    # passam pelo mesmo pool. progress é um ByteProgress; o volume de cada
+    # pacote é acrescentado ao total aqui, quando passa a ser conhecido.
+    # Devolve {chave: {"format", "members", "error"}}.
+    records = {key: {"format": archive_type, "members": [], "error": None} for key, _, archive_type in files}
+    tasks = []
+    for key, file_path, archive_type in files:
+        if archive_type == "zip":
+            try:
+                batches = zip_batches(file_path, workers or DEFAULT_WORKERS)
+            except ARCHIVE_ERRORS as e:
+                records[key]["error"] = describe_error(e)
+                continue
+            for b, (indexes, weight) in enumerate(batches):
+                tasks.append(((key, b), (file_path, archive_type, indexes, algorithms), weight))
+        else:
+            tasks.append(((key, 0), (file_path, archive_type, None, algorithms), os.path.getsize(file_path)))
+    if progress:
+        progress.add_total(sum(weight for _, _, weight in tasks))
+
+    members = {}
+    for (key, _), result in run_pipeline(hash_archive_part, iter(tasks), workers, use_processes, progress).items():
+        members.setdefault(key, []).extend(result["members"])
+        records[key]["error"] = records[key]["error"] or result["error"]
+    for key, results in members.items():
+        records[key]["members"] = [record for _, record in sorted(results, key=lambda item: item[0])]
+    return records
+
+def archive_members(archive):
+    # Itens lidos com sucesso (com hashes)
+    return [member for member in (archive or {}).get("members") or [] if member.get("hashes")]
@@ -0,0 +1,365 @@
+import os
+import re
+import sys
+import json
+import time
+import random
+import shutil
+import hashlib
+import argparse
+import subprocess
+import platform
+import multiprocessing
+from datetime import datetime
+from hashpm_core import (
+    DEFAULT_WORKERS, IO_MODES, acquire_files_to_evidence, calculate_hashes, copy_files_to_evidence,
+    prepare_acquisition_data
+)
+
+try:
+    import resource
+except ImportError:  # Windows: sem getrusage, o pico de memória não é medido
+    resource = None
+
+# -------------------- Conjuntos Sintéticos --------------------
+# Distribuições de tamanho típicas de apreensões: muitos arquivos pequenos
+# (documentos, mensagens), poucos arquivos enormes (imagens de disco, vídeos)
+# e uma mistura com tamanhos log-uniformes. A escala multiplica a
+# quantidade de arquivos, não os tamanhos, para preservar a distribuição.
+KB = 1024
+MB = 1024 * KB
+BENCH_SETS = {
+    "pequenos": {"files": 20000, "min_size": 4 * KB, "max_size": 4 * KB},
+    "grandes": {"files": 4, "min_size": 256 * MB, "max_size": 256 * MB},
+    "misto": {"files": 2000, "min_size": 1 * KB, "max_size": 32 * MB},
+}
+BENCH_STAGES = ["hash", "copia_tee", "copia_kernel", "pdf", "inicio"]
+# Etapas que não dependem dos conjuntos de arquivos: executadas uma única vez
+SET_FREE_STAGES = {"inicio"}
+# Meta de abertura da interface (até a janela ser desenhada), em segundos.
+# Acima dela, ou com ReportLab/multiprocessing carregados na abertura, a
+# etapa "inicio" é apontada como regressão e o código de saída é 3.
+STARTUP_TARGET_SECONDS = 1.5
+HASHPM_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "HashPM.py")
+BENCH_SEED = 2024
+BLOCK_SIZE = 1 * MB
+FILES_PER_FOLDER = 1000
+
+def set_sizes(spec, scale, seed=BENCH_SEED):
+    # Tamanhos determinísticos: a mesma semente gera sempre o mesmo conjunto
+    rng = random.Random(seed)
+    count = max(1, int(spec["files"] * scale))
+    low, high = spec["min_size"], spec["max_size"]
+    if low == high:
+        return [low] * count
+    return [int(low * (high / low) ** rng.random()) for _ in range(count)]
+
+def generate_set(folder, name, scale):
+    # Reaproveita o conjunto já gerado com a mesma escala
+    set_folder = os.path.join(folder, f"{name}_{scale:g}")
+    stamp = os.path.join(set_folder, ".completo")
+    sizes = set_sizes(BENCH_SETS[name], scale)
+    if os.path.exists(stamp):
+        return set_folder, sizes
+    shutil.rmtree(set_folder, ignore_errors=True)
+    block = random.Random(BENCH_SEED).getrandbits(BLOCK_SIZE * 8).to_bytes(BLOCK_SIZE, "little")
+    for i, size in enumerate(sizes):
+        subfolder = os.path.join(set_folder, f"{i // FILES_PER_FOLDER:04d}")
+        os.makedirs(subfolder, exist_ok=True)
+        with open(os.path.join(subfolder, f"arquivo_{i:06d}.bin"), "wb") as f:
+            # O índice no início de cada arquivo evita conteúdos idênticos
+            f.write(i.to_bytes(8, "little"))
+            remaining = size - 8
+            while remaining > 0:
+                f.write(block[:min(remaining, BLOCK_SIZE)])
+                remaining -= BLOCK_SIZE
+    with open(stamp, "w") as f:
+        f.write(str(len(sizes)))
+    return set_folder, sizes
+
+def list_files(set_folder):
+    return sorted(
+        os.path.join(root, name)
+        for root, _, names in os.walk(set_folder)
+        for name in names if not name.startswith(".")
+    )
+
+def drop_cache(file_paths):
+    # Leitura "a frio": pede ao sistema que descarte as páginas em cache dos
+    # arquivos (apenas Linux/Unix com posix_fadvise; os dados já estão em disco)
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    for file_path in file_paths:
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    return True
+
+# -------------------- Execução das Etapas --------------------
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    return round(peak / (MB if sys.platform == "darwin" else KB), 1)
+
+def count_pdf_pages(pdf_paths):
+    # Os objetos de página do ReportLab não são comprimidos
+    pages = 0
+    for path in pdf_paths:
+        with open(path, "rb") as f:
+            pages += len(re.findall(rb"/Type /Page\b", f.read()))
+    return pages
+
+def bench_user_data():
+    return prepare_acquisition_data(
+        {"Nome": "Benchmark", "Posto/Graduação": "Sd PM", "CPF": "000.000.000-00", "Portaria": "0"},
+        {"Nome": "Benchmark"}
+    )
+
+def run_stage(stage, file_paths, work_folder, options):
+    # Executada em um processo filho, para que o pico de memória seja o da etapa
+    total_bytes = sum(os.path.getsize(file_path) for file_path in file_paths)
+    result = {"files": len(file_paths), "bytes": total_bytes}
+    if options["cold"]:
+        result["cold"] = drop_cache(file_paths)
+    dest_folder = os.path.join(work_folder, "destino")
+    shutil.rmtree(dest_folder, ignore_errors=True)
+    os.makedirs(dest_folder)
+    started = time.perf_counter()
+    cpu_started = time.process_time()
+    if stage == "hash":
+        calculate_hashes(file_paths, None, options["workers"], False, options["algorithms"], io_mode=options["io_mode"])
+    elif stage in ("copia_tee", "copia_kernel"):
+        transfer = acquire_files_to_evidence if stage == "copia_tee" else copy_files_to_evidence
+        transfer(file_paths, dest_folder, {
+            "verify": True, "workers": options["workers"], "use_processes": False,
+            "algorithms": options["algorithms"], "io_mode": options["io_mode"],
+        })
+    elif stage == "pdf":
+        from hashpm_pdf import generate_pdf
+        # Hashes sintéticos: só a diagramação é medida
+        hashes = {}
+        file_info = {}
+        for file_path, size in zip(file_paths, options["sizes"]):
+            digest = {"SHA-256": hashlib.sha256(file_path.encode("utf-8")).hexdigest()}
+            hashes[file_path] = digest
+            file_info[file_path] = {
+                "source": file_path, "relative_path": os.path.relpath(file_path, work_folder), "size": size,
+                "copy_hashes": digest, "hash_origin": "calculado", "piecewise": None,
+            }
+        user_data, proprietario_data = bench_user_data()
+        pdf_paths = generate_pdf(
+            file_paths, user_data, proprietario_data, hashes, os.path.join(dest_folder, "Certidao.pdf"),
+            file_info, options["files_per_volume"]
+        )
+        result["pages"] = count_pdf_pages(pdf_paths)
+    result["seconds"] = time.perf_counter() - started
+    result["cpu_seconds"] = time.process_time() - cpu_started
+    result["peak_rss_mb"] = peak_rss_mb()
+    shutil.rmtree(dest_folder, ignore_errors=True)
+    return result
+
+def run_startup_stage():
+    # Processo novo do interpretador, como na abertura pelo usuário; o tempo
+    # total inclui a inicialização do próprio Python
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, HASHPM_SCRIPT, "--medir-inicio"], capture_output=True, text=True, timeout=120
+    )
+    seconds = time.perf_counter() - started
+    lines = completed.stdout.strip().splitlines()
+    if not lines:
+        return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "sem resposta"}
+    result = json.loads(lines[-1])
+    # Sem ambiente gráfico, vale o tempo até o fim das importações
+    measured = result["window_seconds"] or result["import_seconds"]
+    result.update({
+        "files": 0, "bytes": 0, "seconds": measured, "process_seconds": round(seconds, 4),
+        "target_seconds": STARTUP_TARGET_SECONDS,
+        "regression": measured > STARTUP_TARGET_SECONDS or bool(result["eager_modules"]),
+    })
+    if result["error"] and result["window_seconds"] is None:
+        result["window_error"] = result.pop("error")
+    else:
+        result.pop("error")
+    return result
+
+def stage_worker(stage, file_paths, work_folder, options, results):
+    try:
+        results.put(run_stage(stage, file_paths, work_folder, options))
+    except Exception as e:
+        # Sem resposta na fila, o processo principal esperaria indefinidamente
+        results.put({"error": f"{type(e).__name__}: {e}"})
+
+def run_isolated(stage, file_paths, work_folder, options):
+    # Processo novo (spawn) por etapa: memória e caches do interpretador
+    # não passam de uma medição para a outra
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=stage_worker, args=(stage, file_paths, work_folder, options, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+def add_rates(result):
+    seconds = result.get("seconds")
+    if not seconds:
+        return result
+    rates = {
+        "mb_per_s": result["bytes"] / MB / seconds,
+        "files_per_s": result["files"] / seconds,
+    }
+    if "pages" in result:
+        rates["pages_per_s"] = result["pages"] / seconds
+    result.update({key: round(value, 1) for key, value in rates.items()})
+    return result
+
+# -------------------- Relatório --------------------
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+    }
+
+def compare(results, baseline):
+    # Razão entre as vazões desta execução e as da referência (> 1: mais rápido)
+    previous = {(item["set"], item["stage"]): item for item in baseline["results"]}
+    lines = []
+    for item in results:
+        old = previous.get((item["set"], item["stage"]))
+        metric = {"pdf": "pages_per_s", "inicio": "seconds"}.get(item["stage"], "mb_per_s")
+        if old and old.get(metric) and item.get(metric):
+            ratio = item[metric] / old[metric]
+            if metric == "seconds":
+                ratio = 1 / ratio
+            lines.append(f"{item['set']:>10} {item['stage']:>13}  {ratio:5.2f}x  ({old[metric]} -> {item[metric]} {metric})")
+    return lines
+
+def run_benchmark(sets, stages, folder, scale=1.0, workers=DEFAULT_WORKERS, algorithms=("SHA-256",),
+                  repeat=1, cold=False, files_per_volume=0, label="", status_callback=None, io_mode="cache"):
+    def status(message):
+        if status_callback:
+            status_callback(message)
+
+    report = {
+        "label": label,
+        "started": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "options": {
+            "sets": list(sets), "stages": list(stages), "scale": scale, "workers": workers,
+            "algorithms": list(algorithms), "repeat": repeat, "cold": cold, "files_per_volume": files_per_volume,
+            "io_mode": io_mode,
+        },
+        "results": [],
+    }
+    os.makedirs(folder, exist_ok=True)
+    for name in sets:
+        status(f"Gerando conjunto {name} (escala {scale:g})...")
+        set_folder, sizes = generate_set(folder, name, scale)
+        file_paths = list_files(set_folder)
+        options = {
+            "workers": workers, "algorithms": list(algorithms), "cold": cold,
+            "files_per_volume": files_per_volume, "sizes": sizes, "io_mode": io_mode,
+        }
+        for stage in stages:
+            if stage in SET_FREE_STAGES:
+                continue
+            # Com repetições, vale a mais rápida (a menos afetada por ruído)
+            runs = []
+            for _ in range(repeat):
+                status(f"{name}: {stage}...")
+                runs.append(run_isolated(stage, file_paths, folder, options))
+            best = min(runs, key=lambda item: item.get("seconds", float("inf")))
+            result = add_rates(dict(best, set=name, stage=stage, runs=[item.get("seconds") for item in runs]))
+            report["results"].append(result)
+            status(format_result(result))
+    for stage in stages:
+        if stage in SET_FREE_STAGES:
+            runs = []
+            for _ in range(repeat):
+                status(f"{stage}...")
+                runs.append(run_startup_stage())
+            best = min(runs, key=lambda item: item.get("seconds", float("inf")))
+            result = dict(best, set="-", stage=stage, runs=[item.get("seconds") for item in runs])
+            report["results"].append(result)
+            status(format_result(result))
+    return report
+
+def format_result(item):
+    if "error" in item:
+        return f"{item['set']:>10} {item['stage']:>13}  ERRO: {item['error']}"
+    if item["stage"] == "inicio":
+        text = (f"{item['set']:>10} {item['stage']:>13}  {item['seconds']:8.2f} s  "
+                f"(importação {item['import_seconds']:.2f} s, meta {item['target_seconds']:g} s)")
+        if item.get("window_error"):
+            text += "  sem janela: " + item["window_error"]
+        if item["eager_modules"]:
+            text += "  carregados na abertura: " + ", ".join(item["eager_modules"])
+        if item["regression"]:
+            text += "  REGRESSÃO"
+        return text
+    text = (f"{item['set']:>10} {item['stage']:>13}  {item['seconds']:8.2f} s  {item['mb_per_s']:9.1f} MB/s  "
+            f"{item['files_per_s']:9.1f} arq/s")
+    if "pages_per_s" in item:
+        text += f"  {item['pages_per_s']:7.1f} pág/s"
+    if item.get("peak_rss_mb") is not None:
+        text += f"  pico {item['peak_rss_mb']:.0f} MB"
+    return text
+
+# -------------------- Linha de Comando --------------------
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="hashpm_bench",
+        description="Mede o desempenho das etapas da aquisição com conjuntos sintéticos de arquivos"
+    )
+    parser.add_argument("--conjuntos", nargs="+", choices=list(BENCH_SETS), default=list(BENCH_SETS))
+    parser.add_argument("--etapas", nargs="+", choices=BENCH_STAGES, default=BENCH_STAGES)
+    parser.add_argument("--pasta", default=os.path.join(os.path.expanduser("~"), ".hashpm", "benchmark"),
+                        help="onde os conjuntos sintéticos são gerados (e reaproveitados)")
+    parser.add_argument("--escala", type=float, default=1.0,
+                        help="multiplica a quantidade de arquivos de cada conjunto (ex.: 0.1 para um teste rápido)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--algoritmos", default="SHA-256", help="lista separada por vírgulas")
+    parser.add_argument("--repeticoes", type=int, default=1, help="vale a execução mais rápida")
+    parser.add_argument("--frio", action="store_true",
+                        help="descarta o cache de páginas dos arquivos antes de cada etapa (Linux)")
+    parser.add_argument("--modo-leitura", choices=list(IO_MODES.values()), default="cache",
+                        help="modo de leitura das etapas de hash e cópia (ver --modo-leitura do hashpm_cli)")
+    parser.add_argument("--arquivos-por-volume", type=int, default=0)
+    parser.add_argument("--rotulo", default="", help="identificação da versão medida, gravada no JSON")
+    parser.add_argument("--saida", help="arquivo JSON com os resultados (padrão: bench_<data>.json)")
+    parser.add_argument("--comparar", metavar="JSON", help="resultado anterior para comparação")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    algorithms = [name.strip() for name in args.algoritmos.split(",") if name.strip()]
+    report = run_benchmark(
+        args.conjuntos, args.etapas, args.pasta, args.escala, args.workers, algorithms, args.repeticoes,
+        args.frio, args.arquivos_por_volume, args.rotulo, lambda message: print(message, file=sys.stderr),
+        args.modo_leitura
+    )
+    output = args.saida or f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    print(f"Resultados: {output}")
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"Comparação com {args.comparar} ({baseline.get('label') or baseline.get('started')}):")
+        for line in compare(report["results"], baseline):
+            print(line)
+    if any(item.get("regression") for item in report["results"]):
+        print(f"Início da interface acima da meta de {STARTUP_TARGET_SECONDS:g} s ou com importações antecipadas.")
+        return 3
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
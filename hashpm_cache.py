@@ -0,0 +1,113 @@
+import os
+import time
+import threading
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".hashpm", "hash_cache.sqlite3")
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Fração das entradas mais antigas descartada quando o limite é ultrapassado
+EVICTION_FRACTION = 0.25
+
+# -------------------- Cache Persistente de Hashes --------------------
+def cache_key(stat_result):
+    # Um arquivo é considerado inalterado enquanto dispositivo, inode, tamanho
+    # e data de modificação (em ns) forem os mesmos
+    return (stat_result.st_dev, stat_result.st_ino, stat_result.st_size, stat_result.st_mtime_ns)
+
+class HashCache:
+    # Falhas de gravação (ex.: "database is locked" com outra instância usando
+    # o mesmo arquivo) não interrompem a aquisição: os hashes calculados
+    # continuam válidos e apenas deixam de ir para o cache. A última delas
+    # fica em write_error, para ser sinalizada ao final.
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.write_error = None
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        import sqlite3  # import local: só carregado quando o cache é aberto
+        self.errors = sqlite3.Error
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS digests ("
+            " dev INTEGER, ino INTEGER, size INTEGER, mtime_ns INTEGER,"
+            " algorithm TEXT, digest TEXT, last_used REAL,"
+            " PRIMARY KEY (dev, ino, size, mtime_ns, algorithm))"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS digests_last_used ON digests (last_used)")
+        self.connection.commit()
+
+    def get(self, stat_result, algorithms):
+        # Só há acerto se todos os algoritmos pedidos estiverem no cache
+        key = cache_key(stat_result)
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT algorithm, digest FROM digests WHERE dev=? AND ino=? AND size=? AND mtime_ns=?", key
+            ).fetchall()
+            found = dict(rows)
+            if not all(name in found for name in algorithms):
+                return None
+            self.write(
+                "UPDATE digests SET last_used=? WHERE dev=? AND ino=? AND size=? AND mtime_ns=?",
+                [(time.time(),) + key]
+            )
+        return {name: found[name] for name in algorithms}
+
+    def put_many(self, entries):
+        # entries: iterável de (stat, {algoritmo: hash}); grava em uma única transação
+        now = time.time()
+        rows = [
+            cache_key(stat_result) + (name, digest, now)
+            for stat_result, digests in entries
+            for name, digest in digests.items()
+        ]
+        if not rows:
+            return
+        with self.lock:
+            if self.write("INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?, ?)", rows):
+                try:
+                    self.evict()
+                except self.errors as e:
+                    self.write_failed(e)
+
+    def write(self, statement, rows):
+        # Uma transação; em caso de falha é desfeita e devolve False
+        try:
+            self.connection.executemany(statement, rows)
+            self.connection.commit()
+            return True
+        except self.errors as e:
+            self.write_failed(e)
+            return False
+
+    def write_failed(self, error):
+        self.write_error = error
+        try:
+            self.connection.rollback()
+        except self.errors:
+            pass
+
+    def used_bytes(self):
+        page_size = self.connection.execute("PRAGMA page_size").fetchone()[0]
+        page_count = self.connection.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = self.connection.execute("PRAGMA freelist_count").fetchone()[0]
+        return (page_count - free_pages) * page_size
+
+    def evict(self):
+        # Descarta as entradas usadas há mais tempo até voltar ao limite; as
+        # páginas liberadas são reaproveitadas pelas próximas inserções
+        while self.max_bytes and self.used_bytes() > self.max_bytes:
+            total = self.connection.execute("SELECT COUNT(*) FROM digests").fetchone()[0]
+            if not total:
+                break
+            self.connection.execute(
+                "DELETE FROM digests WHERE rowid IN (SELECT rowid FROM digests ORDER BY last_used LIMIT ?)",
+                (max(1, int(total * EVICTION_FRACTION)),)
+            )
+            self.connection.commit()
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
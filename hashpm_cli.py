@@ -0,0 +1,484 @@
+import os
+import sys
+import json
+import time
+import argparse
+from hashpm_core import (
+    APREENSOR_FIELDS, PROPRIETARIO_FIELDS, HASH_ALGORITHMS, IO_MODES, DEFAULT_OPTIONS, DEFAULT_WORKERS,
+    AcquisitionError, prepare_acquisition_data, run_acquisition
+)
+from hashpm_queue import DEFAULT_MAX_JOBS, DEFAULT_PER_DEVICE, JOB_STATES, AcquisitionQueue
+from hashpm_cache import DEFAULT_CACHE_PATH, DEFAULT_CACHE_MAX_BYTES
+from hashpm_verify import run_verification, load_report
+from hashpm_piecewise import DEFAULT_SEGMENT_SIZE
+from hashpm_package import PACKAGE_COMPRESSIONS, read_package, read_sidecar, run_packaging
+from hashpm_hashset import (
+    DEFAULT_HASHSET_DIR, HASHSET_ALGORITHMS, HASHSET_EXTENSION, HASHSET_KINDS, HashSet, build_hash_set, find_hash_sets
+)
+
+# Argumentos da linha de comando correspondentes aos campos da certidão
+APREENSOR_ARGS = {
+    "nome": "Nome",
+    "posto": "Posto/Graduação",
+    "cpf": "CPF",
+    "funcao": "Função",
+    "orgao": "Orgão",
+    "portaria": "Portaria",
+    "uf": "Unidade da Federação",
+}
+PROPRIETARIO_ARGS = {
+    "proprietario_nome": "Nome",
+    "proprietario_tipo": "Tipo",
+    "proprietario_documento": "CPF/CNPJ",
+}
+# O fecho do pacote só acusa corrupção acidental; a adulteração é acusada
+# pelo SHA-256 do pacote inteiro registrado na certidão de empacotamento
+SHA256_HELP = "SHA-256 do pacote inteiro, da certidão de empacotamento (padrão: arquivo <pacote>.sha256, se houver)"
+
+# -------------------- Saída no Terminal --------------------
+class TerminalProgress:
+    def __init__(self, quiet=False):
+        self.quiet = quiet
+        # Em logs (stderr redirecionado) o percentual só poluiria a saída
+        self.interactive = sys.stderr.isatty()
+
+    def progress(self, value):
+        if not self.quiet and self.interactive:
+            sys.stderr.write(f"\r{int(value):3d}%")
+            sys.stderr.flush()
+
+    def status(self, message):
+        if not self.quiet:
+            sys.stderr.write(f"\r{message}\n")
+            sys.stderr.flush()
+
+# -------------------- Leitura dos Dados --------------------
+def read_file_list(path):
+    # Um caminho por linha; "-" lê da entrada padrão
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        return [line.rstrip("\r\n") for line in stream if line.strip()]
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+def load_acquisition_data(args):
+    # O JSON segue o formato {"apreensor": {...}, "proprietario": {...}}, com
+    # as mesmas chaves da certidão; argumentos explícitos têm precedência.
+    user_data, proprietario_data = {}, {}
+    if args.dados:
+        with open(args.dados, encoding="utf-8") as f:
+            data = json.load(f)
+        user_data.update(data.get("apreensor", {}))
+        proprietario_data.update(data.get("proprietario", {}))
+    for arg, field in APREENSOR_ARGS.items():
+        if getattr(args, arg) is not None:
+            user_data[field] = getattr(args, arg)
+    for arg, field in PROPRIETARIO_ARGS.items():
+        if getattr(args, arg, None) is not None:
+            proprietario_data[field] = getattr(args, arg)
+    check_fields(user_data, proprietario_data)
+    return prepare_acquisition_data(user_data, proprietario_data)
+
+def check_fields(user_data, proprietario_data):
+    unknown = (set(user_data) - set(APREENSOR_FIELDS)) | (set(proprietario_data) - set(PROPRIETARIO_FIELDS))
+    if unknown:
+        raise AcquisitionError(f"Campos desconhecidos no arquivo de dados: {', '.join(sorted(unknown))}")
+
+def load_queue_file(path):
+    # {"opcoes": {...}, "tarefas": [{"arquivos": [...], "apreensor": {...},
+    # "proprietario": {...}, "opcoes": {...}}]}; as opções usam os nomes de
+    # DEFAULT_OPTIONS e as de cada tarefa têm precedência sobre as comuns
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    common = data.get("opcoes", {})
+    jobs = []
+    for n, task in enumerate(data.get("tarefas", []), 1):
+        options = dict(common, **task.get("opcoes", {}))
+        unknown = set(options) - set(DEFAULT_OPTIONS)
+        if unknown:
+            raise AcquisitionError(f"Tarefa {n}: opções desconhecidas: {', '.join(sorted(unknown))}")
+        check_fields(task.get("apreensor", {}), task.get("proprietario", {}))
+        user_data, proprietario_data = prepare_acquisition_data(task.get("apreensor", {}), task.get("proprietario", {}))
+        jobs.append((task.get("arquivos", []), user_data, proprietario_data, options))
+    return jobs
+
+# -------------------- Comandos --------------------
+def cmd_adquirir(args):
+    file_paths = list(args.arquivos)
+    if args.lista:
+        file_paths.extend(read_file_list(args.lista))
+    user_data, proprietario_data = load_acquisition_data(args)
+    options = {
+        "verify": not args.sem_verificacao,
+        "workers": args.workers,
+        "use_processes": args.processos,
+        "algorithms": args.algoritmos,
+        "copy_mode": args.modo_copia,
+        "io_mode": args.modo_leitura,
+        "base_dir": args.destino,
+        "use_cache": not args.sem_cache,
+        "strict": args.estrito,
+        "cache_path": args.cache,
+        "cache_max_bytes": args.cache_max_mb * 1024 * 1024,
+        "resume": not args.sem_retomada,
+        "files_per_volume": args.arquivos_por_volume,
+        "segment_size": args.segmentos_mb * 1024 * 1024,
+        "hash_sets": [] if args.sem_conjuntos else args.conjuntos,
+        "content_addressed": args.por_conteudo,
+        "prescan": args.pre_varredura,
+        "archives": args.itens_compactados,
+        "device_image": args.imagem,
+        "image_block_size": args.bloco_kb * 1024,
+        "image_retries": args.tentativas,
+        "package": args.pacote,
+        "package_compression": args.compressao,
+        "profile": args.perfil,
+        "profile_cprofile": args.perfil_cprofile,
+        "profile_memory": args.perfil_memoria,
+    }
+    terminal = TerminalProgress(args.quiet)
+    result = run_acquisition(
+        file_paths, user_data, proprietario_data, options, terminal.progress, terminal.status
+    )
+    print(f"Pasta de evidências: {result['base_folder']}")
+    print(f"Certidão: {result['pdf_path']}")
+    for path in result["pdf_paths"][1:]:
+        print(f"Volume do inventário: {path}")
+    print(f"Minuta de juntada: {result['minuta_path']}")
+    for path in result["manifest_paths"]:
+        print(f"Manifesto: {path}")
+    if result["profile_path"]:
+        print(f"Perfil de desempenho: {result['profile_path']}")
+    if result["package"]:
+        print_package(result["package"])
+    for dest_path in result["files"]:
+        info = result["file_info"][dest_path]
+        for match in info.get("hash_set_matches") or []:
+            print(f"{HASHSET_KINDS[match['kind']].upper()}: {dest_path} consta do conjunto {match['name']}")
+        for member in (info.get("archive") or {}).get("members") or []:
+            for match in member.get("hash_set_matches") or []:
+                print(f"{HASHSET_KINDS[match['kind']].upper()}: {dest_path}!/{member['name']} "
+                      f"consta do conjunto {match['name']}")
+        image = info.get("image")
+        if image and image["bad_ranges"]:
+            print(f"SETORES ILEGÍVEIS: {dest_path}: {image['bad_bytes'] // image['sector_size']} setor(es) "
+                  f"em {len(image['bad_ranges'])} intervalo(s), preenchido(s) com zeros")
+    return 0
+
+def cmd_verificar(args):
+    # Código de saída 2 indica divergências, para uso em scripts
+    user_data = None
+    if args.dados or any(getattr(args, arg) is not None for arg in APREENSOR_ARGS):
+        user_data, _ = load_acquisition_data(args)
+    terminal = TerminalProgress(args.quiet)
+    recheck = load_report(args.rechecar) if args.rechecar else None
+    report = run_verification(
+        args.pasta, "rapido" if args.rapido else "completo", user_data, args.manifesto,
+        args.workers, args.processos, terminal.progress, terminal.status, recheck
+    )
+    for relative, reason in report["modified"]:
+        print(f"MODIFICADO: {relative} ({reason})")
+    for relative in report["missing"]:
+        print(f"AUSENTE: {relative}")
+    for relative in report["extra"]:
+        print(f"NÃO REGISTRADO: {relative}")
+    print(f"Conferidos: {len(report['ok'])} de {report['expected']}")
+    print(f"Certidão de verificação: {report['pdf_path']}")
+    print(f"Relatório: {report['report_path']}")
+    return 0 if report["intact"] else 2
+
+def cmd_fila(args):
+    # Várias aquisições (ex.: as portarias de uma noite) numa única fila;
+    # código de saída 1 se alguma falhar
+    jobs = load_queue_file(args.tarefas)
+    acquisition_queue = AcquisitionQueue(args.max_simultaneas, args.por_dispositivo)
+    submitted = []
+    for file_paths, user_data, proprietario_data, options in jobs:
+        if args.destino:
+            options.setdefault("base_dir", args.destino)
+        submitted.append(acquisition_queue.submit(file_paths, user_data, proprietario_data, options))
+    while True:
+        pending = acquisition_queue.pending()
+        for job in submitted:
+            for message in job["monitor"].messages():
+                if not args.quiet:
+                    print(f"[Portaria {job['portaria']}] {message}", file=sys.stderr)
+        if not pending:
+            break
+        time.sleep(1)
+    for job in submitted:
+        line = f"Portaria {job['portaria']}: {JOB_STATES[job['state']]}"
+        if job["result"]:
+            line += f" - {job['result']['pdf_path']}"
+        if job["error"]:
+            line += f" - {job['error']}"
+        print(line)
+    return 1 if any(job["state"] == "falha" for job in submitted) else 0
+
+def print_package(info):
+    for name in info["diverging"]:
+        print(f"DIVERGENTE DO MANIFESTO: {name}")
+    print(f"Pacote: {info['package_path']}")
+    print(f"SHA-256 do pacote: {info['sha256']}")
+    print(f"Certidão de empacotamento: {info['pdf_path']}")
+
+def cmd_pacote_criar(args):
+    user_data = None
+    if args.dados or any(getattr(args, arg) is not None for arg in APREENSOR_ARGS):
+        user_data, _ = load_acquisition_data(args)
+    terminal = TerminalProgress(args.quiet)
+    info = run_packaging(args.pasta, args.compressao, args.saida, user_data, args.workers,
+                         terminal.progress, terminal.status)
+    print_package(info)
+    return 2 if info["diverging"] else 0
+
+def cmd_pacote_ler(args):
+    # extrair e conferir; código de saída 2 indica divergências, como em verificar
+    terminal = TerminalProgress(args.quiet)
+    output_folder = getattr(args, "destino", None)
+    terminal.status("Extraindo e conferindo o pacote..." if output_folder else "Conferindo o pacote...")
+    # Sem --sha256, vale o arquivo .sha256 gravado ao lado do pacote, se houver
+    expected = args.sha256 or (read_sidecar(args.pacote) if args.pacote != "-" else None)
+    report = read_package(args.pacote, output_folder, args.workers, terminal.progress, expected)
+    for name, reason in report["errors"]:
+        print(f"DIVERGENTE: {name} ({reason})")
+    print(f"Conferidos: {len(report['ok'])} de {report['expected']}")
+    if report["output_folder"]:
+        print(f"Extraído em: {report['output_folder']}")
+    print(f"SHA-256 do pacote: {report['sha256']}")
+    if not expected:
+        print("Aviso: SHA-256 do pacote não conferido com a certidão de empacotamento (informe --sha256).")
+    return 0 if report["intact"] else 2
+
+def cmd_conjunto_importar(args):
+    output_path = args.saida or os.path.join(DEFAULT_HASHSET_DIR, args.nome + HASHSET_EXTENSION)
+    terminal = TerminalProgress(args.quiet)
+    header = build_hash_set(args.entradas, output_path, args.nome, args.tipo, args.algoritmo, terminal.status)
+    print(f"Conjunto {header['name']} ({header['kind']}, {header['algorithm']}): "
+          f"{header['count']} hashes em {output_path}")
+    return 0
+
+def cmd_conjunto_listar(args):
+    for path in find_hash_sets(args.pasta):
+        hash_set = HashSet(path)
+        try:
+            print(f"{hash_set.name}\t{hash_set.kind}\t{hash_set.algorithm}\t{hash_set.count}\t{path}")
+        finally:
+            hash_set.close()
+    return 0
+
+def cmd_perfis(args):
+    # Tabela por estação e etapa, somando todas as aquisições encontradas
+    from hashpm_profile import aggregate_profiles  # import local: carrega tracemalloc
+    totals = aggregate_profiles(args.caminhos)
+    if args.json:
+        print(json.dumps(
+            [dict(total, station=station, stage=stage) for (station, stage), total in sorted(totals.items())],
+            ensure_ascii=False, indent=1
+        ))
+        return 0
+    for (station, stage), total in sorted(totals.items()):
+        rate = total["bytes"] / total["wall"] / (1024 * 1024) if total["wall"] else 0
+        print(f"{station}\t{stage}\t{total['runs']} execução(ões)\t{total['wall']:.2f} s\t"
+              f"CPU {total['cpu']:.2f} s\t{total['files']} arquivo(s)\t{rate:.1f} MB/s")
+    return 0
+
+def add_apreensor_args(parser):
+    dados = parser.add_argument_group("dados do apreensor")
+    dados.add_argument("--nome")
+    dados.add_argument("--posto", help="posto/graduação")
+    dados.add_argument("--cpf")
+    dados.add_argument("--funcao")
+    dados.add_argument("--orgao")
+    dados.add_argument("--portaria")
+    dados.add_argument("--uf", help="unidade da federação, por extenso")
+
+def parse_algorithms(value):
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    invalid = [name for name in names if name not in HASH_ALGORITHMS]
+    if invalid:
+        raise argparse.ArgumentTypeError(
+            f"algoritmo(s) inválido(s): {', '.join(invalid)} (opções: {', '.join(HASH_ALGORITHMS)})"
+        )
+    return names
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="hashpm",
+        description="Hash PM - Aquisição de Evidência Digital (modo de linha de comando)"
+    )
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    adquirir = subparsers.add_parser("adquirir", help="copia os arquivos, calcula os hashes e gera a certidão")
+    adquirir.add_argument("arquivos", nargs="*", help="arquivos ou pastas a adquirir (pastas são percorridas recursivamente)")
+    adquirir.add_argument("--lista", help="arquivo com um caminho por linha (\"-\" para a entrada padrão)")
+    adquirir.add_argument("--dados", help="JSON com os dados do apreensor e do proprietário")
+    add_apreensor_args(adquirir)
+    proprietario = adquirir.add_argument_group("dados do proprietário")
+    proprietario.add_argument("--proprietario-nome")
+    proprietario.add_argument("--proprietario-tipo", choices=["Pessoa Física", "Pessoa Jurídica", "Indeterminado"])
+    proprietario.add_argument("--proprietario-documento", help="CPF ou CNPJ")
+    opcoes = adquirir.add_argument_group("opções de aquisição")
+    opcoes.add_argument("--algoritmos", type=parse_algorithms, default=["SHA-256"],
+                        help="lista separada por vírgulas (SHA-256 é sempre incluído)")
+    opcoes.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help="tarefas paralelas (threads; processos com --processos)")
+    opcoes.add_argument("--processos", action="store_true", help="usar processos em vez de threads")
+    opcoes.add_argument("--modo-copia", choices=["tee", "kernel"], default="tee",
+                        help="tee: hash durante a cópia; kernel: copy_file_range/sendfile + verificação")
+    opcoes.add_argument("--modo-leitura", choices=list(IO_MODES.values()), default="cache",
+                        help="cache: padrão do sistema; sem_cache: lê da mídia e não ocupa o cache de páginas "
+                             "(posix_fadvise); direto: verificação com O_DIRECT")
+    opcoes.add_argument("--sem-verificacao", action="store_true", help="não reler a cópia gravada")
+    opcoes.add_argument("--destino", default=".", help="diretório onde a pasta de evidências é criada")
+    opcoes.add_argument("--estrito", action="store_true",
+                        help="modo forense estrito: recalcula todos os hashes sem consultar o cache")
+    opcoes.add_argument("--sem-cache", action="store_true", help="não consultar nem atualizar o cache de hashes")
+    opcoes.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="arquivo SQLite do cache de hashes")
+    opcoes.add_argument("--cache-max-mb", type=int, default=DEFAULT_CACHE_MAX_BYTES // (1024 * 1024),
+                        help="tamanho máximo do cache; as entradas mais antigas são descartadas")
+    opcoes.add_argument("--sem-retomada", action="store_true",
+                        help="ignorar o diário de uma aquisição interrompida e copiar tudo novamente")
+    opcoes.add_argument("--arquivos-por-volume", type=int, default=0,
+                        help="divide o inventário da certidão em volumes com até N arquivos (0: volume único)")
+    opcoes.add_argument("--segmentos-mb", type=int, nargs="?", const=DEFAULT_SEGMENT_SIZE // (1024 * 1024), default=0,
+                        metavar="MB",
+                        help="registrar também o hash de cada segmento (padrão: 64 MB) e a raiz de Merkle "
+                             "dos arquivos maiores que um segmento")
+    opcoes.add_argument("--pre-varredura", action="store_true",
+                        help="enumerar as pastas por inteiro antes da cópia, para um percentual exato desde o início")
+    opcoes.add_argument("--por-conteudo", action="store_true",
+                        help="gravar cada conteúdo uma única vez em Arquivos/objetos, nomeado pelo SHA-256 "
+                             "(o manifesto relaciona os caminhos de origem aos objetos)")
+    opcoes.add_argument("--itens-compactados", action="store_true",
+                        help="calcular também os hashes de cada item de arquivos .zip e .tar (.gz, .bz2, .xz), "
+                             "lidos da cópia sem extração")
+    imagem = adquirir.add_argument_group("imagem de dispositivo")
+    imagem.add_argument("--imagem", action="store_true",
+                        help="gravar cada origem (dispositivo de bloco ou arquivo de imagem) como imagem bruta, "
+                             "tolerando setores ilegíveis")
+    imagem.add_argument("--bloco-kb", type=int, default=DEFAULT_OPTIONS["image_block_size"] // 1024,
+                        help="tamanho do bloco de leitura da imagem")
+    imagem.add_argument("--tentativas", type=int, default=DEFAULT_OPTIONS["image_retries"],
+                        help="novas tentativas de leitura de cada setor ilegível antes de preenchê-lo com zeros")
+    opcoes.add_argument("--conjuntos", nargs="+", metavar="CONJUNTO",
+                        help=f"conjuntos de hashes a consultar (padrão: todos os *{HASHSET_EXTENSION} de "
+                             f"{DEFAULT_HASHSET_DIR})")
+    opcoes.add_argument("--sem-conjuntos", action="store_true", help="não consultar conjuntos de hashes")
+    pacote = adquirir.add_argument_group("pacote de evidências")
+    pacote.add_argument("--pacote", action="store_true",
+                        help="ao final, reunir Arquivos/ e Certidões/ num pacote compactado (.hpmpkg)")
+    pacote.add_argument("--compressao", choices=list(PACKAGE_COMPRESSIONS.values()), default="zlib",
+                        help="zlib: rápida; lzma: pacote menor, compressão mais lenta")
+    perfil = adquirir.add_argument_group("registro de desempenho")
+    perfil.add_argument("--perfil", action="store_true",
+                        help="gravar em Certidões/Perfil_<data>.jsonl o tempo de cada etapa e de cada arquivo")
+    perfil.add_argument("--perfil-cprofile", action="store_true",
+                        help="também perfilar com cProfile a thread coordenadora (Perfil_<data>.prof)")
+    perfil.add_argument("--perfil-memoria", action="store_true",
+                        help="também rastrear alocações com tracemalloc (mais lento)")
+    opcoes.add_argument("-q", "--quiet", action="store_true", help="não exibir progresso")
+    adquirir.set_defaults(func=cmd_adquirir)
+
+    verificar = subparsers.add_parser(
+        "verificar", help="confere uma pasta de evidências com o manifesto e gera a certidão de verificação"
+    )
+    verificar.add_argument("pasta", help="pasta Evidencias_Adquiridas_Portaria_<n> (ou sua subpasta Arquivos)")
+    verificar.add_argument("--rapido", action="store_true",
+                           help="compara apenas tamanho e data de modificação, sem recalcular os hashes")
+    verificar.add_argument("--manifesto", action="append",
+                           help="manifesto de referência (padrão: todos os Manifesto_*.jsonl da pasta Certidões)")
+    verificar.add_argument("--rechecar", metavar="RELATORIO",
+                           help="Verificacao_<data>.json anterior: confere só os arquivos e segmentos então divergentes")
+    verificar.add_argument("--dados", help="JSON com os dados do responsável pela verificação (chave \"apreensor\")")
+    add_apreensor_args(verificar)
+    verificar.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                           help="tarefas paralelas (threads; processos com --processos)")
+    verificar.add_argument("--processos", action="store_true", help="usar processos em vez de threads")
+    verificar.add_argument("-q", "--quiet", action="store_true", help="não exibir progresso")
+    verificar.set_defaults(func=cmd_verificar)
+
+    fila = subparsers.add_parser(
+        "fila", help="executa várias aquisições, descritas em um JSON, compartilhando os dispositivos de origem"
+    )
+    fila.add_argument("tarefas", help='JSON com {"opcoes": {...}, "tarefas": [{"arquivos", "apreensor", '
+                                      '"proprietario", "opcoes"}]}')
+    fila.add_argument("--max-simultaneas", type=int, default=DEFAULT_MAX_JOBS,
+                      help="aquisições em andamento ao mesmo tempo")
+    fila.add_argument("--por-dispositivo", type=int, default=DEFAULT_PER_DEVICE,
+                      help="aquisições simultâneas lendo do mesmo dispositivo de origem")
+    fila.add_argument("--destino", help="pasta onde as pastas de evidências são criadas (se a tarefa não indicar)")
+    fila.add_argument("-q", "--quiet", action="store_true", help="não exibir mensagens de andamento")
+    fila.set_defaults(func=cmd_fila)
+
+    perfis = subparsers.add_parser(
+        "perfis", help="consolida os registros de desempenho (Perfil_*.jsonl) de várias aquisições"
+    )
+    perfis.add_argument("caminhos", nargs="+", help="arquivos Perfil_*.jsonl ou pastas, percorridas recursivamente")
+    perfis.add_argument("--json", action="store_true", help="saída em JSON")
+    perfis.set_defaults(func=cmd_perfis)
+
+    pacote = subparsers.add_parser(
+        "pacote", help="gera, extrai e confere pacotes compactados de uma pasta de evidências"
+    )
+    pacote_comandos = pacote.add_subparsers(dest="acao", required=True)
+    criar = pacote_comandos.add_parser(
+        "criar", help="reúne Arquivos/ e Certidões/ num pacote e gera a certidão de empacotamento"
+    )
+    criar.add_argument("pasta", help="pasta Evidencias_Adquiridas_Portaria_<n>")
+    criar.add_argument("--compressao", choices=list(PACKAGE_COMPRESSIONS.values()), default="zlib",
+                       help="zlib: rápida; lzma: pacote menor, compressão mais lenta")
+    criar.add_argument("--saida", help="pasta onde o pacote é gravado (padrão: ao lado da pasta de evidências)")
+    criar.add_argument("--dados", help="JSON com os dados do responsável (chave \"apreensor\")")
+    add_apreensor_args(criar)
+    criar.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="threads de compressão")
+    criar.add_argument("-q", "--quiet", action="store_true", help="não exibir progresso")
+    criar.set_defaults(func=cmd_pacote_criar)
+    extrair = pacote_comandos.add_parser(
+        "extrair", help="extrai o pacote conferindo cada arquivo com os hashes originais durante a leitura"
+    )
+    extrair.add_argument("pacote", help="arquivo .hpmpkg (\"-\" para a entrada padrão)")
+    extrair.add_argument("destino", help="pasta onde a pasta de evidências é recriada")
+    extrair.add_argument("--sha256", help=SHA256_HELP)
+    extrair.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="threads de descompressão")
+    extrair.add_argument("-q", "--quiet", action="store_true", help="não exibir progresso")
+    extrair.set_defaults(func=cmd_pacote_ler)
+    conferir = pacote_comandos.add_parser("conferir", help="confere o pacote sem extrair os arquivos")
+    conferir.add_argument("pacote", help="arquivo .hpmpkg (\"-\" para a entrada padrão)")
+    conferir.add_argument("--sha256", help=SHA256_HELP)
+    conferir.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="threads de descompressão")
+    conferir.add_argument("-q", "--quiet", action="store_true", help="não exibir progresso")
+    conferir.set_defaults(func=cmd_pacote_ler)
+
+    conjunto = subparsers.add_parser("conjunto", help="importa e lista conjuntos de hashes conhecidos ou de alerta")
+    conjunto_comandos = conjunto.add_subparsers(dest="acao", required=True)
+    importar = conjunto_comandos.add_parser(
+        "importar", help="cria um conjunto a partir de listas de hashes (um por linha, ou CSV como o NSRL)"
+    )
+    importar.add_argument("entradas", nargs="+", help="arquivos de texto ou CSV com os hashes")
+    importar.add_argument("--nome", required=True, help="nome do conjunto, exibido na certidão")
+    importar.add_argument("--tipo", choices=list(HASHSET_KINDS), default="conhecido",
+                          help="conhecido: arquivos sabidamente inofensivos; alerta: material de interesse")
+    importar.add_argument("--algoritmo", choices=list(HASHSET_ALGORITHMS),
+                          help="padrão: deduzido do tamanho do primeiro hash; obrigatório para hashes de 128 "
+                               "caracteres (SHA-512 ou BLAKE2b)")
+    importar.add_argument("--saida", help=f"arquivo gerado (padrão: {DEFAULT_HASHSET_DIR}/<nome>{HASHSET_EXTENSION})")
+    importar.add_argument("-q", "--quiet", action="store_true", help="não exibir progresso")
+    importar.set_defaults(func=cmd_conjunto_importar)
+    listar = conjunto_comandos.add_parser("listar", help="lista os conjuntos instalados")
+    listar.add_argument("--pasta", default=DEFAULT_HASHSET_DIR)
+    listar.set_defaults(func=cmd_conjunto_listar)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except (AcquisitionError, OSError, ValueError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
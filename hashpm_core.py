@@ -0,0 +1,1319 @@
+import os
+import sys
+import errno
+import shutil
+import hashlib
+import mmap
+import threading
+import functools
+import time
+import queue
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from hashpm_cache import cache_key, DEFAULT_CACHE_PATH, DEFAULT_CACHE_MAX_BYTES
+from hashpm_journal import AcquisitionJournal, CHECKPOINT_INTERVAL
+from hashpm_manifest import ManifestWriter
+from hashpm_hashset import HashSet, find_hash_sets, match_hash_sets
+
+# -------------------- Validação do CPF e CNPJ --------------------
+def validar_cpf(cpf: str) -> bool:
+    cpf_numeros = "".join([d for d in cpf if d.isdigit()])
+    if len(cpf_numeros) != 11:
+        return False
+    if len(set(cpf_numeros)) == 1:
+        return False
+    soma = sum(int(cpf_numeros[i]) * (10 - i) for i in range(9))
+    resto = soma % 11
+    dv1 = 11 - resto if resto > 1 else 0
+    if dv1 != int(cpf_numeros[9]):
+        return False
+    soma = sum(int(cpf_numeros[i]) * (11 - i) for i in range(10))
+    resto = soma % 11
+    dv2 = 11 - resto if resto > 1 else 0
+    if dv2 != int(cpf_numeros[10]):
+        return False
+    return True
+
+def validar_cnpj(cnpj: str) -> bool:
+    cnpj_numeros = "".join([d for d in cnpj if d.isdigit()])
+    if len(cnpj_numeros) != 14:
+        return False
+    if len(set(cnpj_numeros)) == 1:
+        return False
+    pesos1 = [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
+    soma = sum(int(cnpj_numeros[i]) * pesos1[i] for i in range(12))
+    resto = soma % 11
+    dv1 = 0 if resto < 2 else 11 - resto
+    if dv1 != int(cnpj_numeros[12]):
+        return False
+    pesos2 = [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
+    soma = sum(int(cnpj_numeros[i]) * pesos2[i] for i in range(13))
+    resto = soma % 11
+    dv2 = 0 if resto < 2 else 11 - resto
+    if dv2 != int(cnpj_numeros[13]):
+        return False
+    return True
+
+# -------------------- Algoritmos de Hash --------------------
+HASH_ALGORITHMS = {
+    "SHA-256": "sha256",
+    "SHA-1": "sha1",
+    "MD5": "md5",
+    "SHA-512": "sha512",
+    "BLAKE2b": "blake2b",
+}
+DEFAULT_ALGORITHMS = ("SHA-256",)
+
+def normalize_algorithms(algorithms):
+    # O SHA-256 é sempre calculado, pois é o hash de referência da certidão
+    selected = set(algorithms or ()) | {"SHA-256"}
+    return tuple(name for name in HASH_ALGORITHMS if name in selected)
+
+def new_hashers(algorithms):
+    return {name: hashlib.new(HASH_ALGORITHMS[name]) for name in algorithms}
+
+def update_hashers(hashers, chunk):
+    for hasher in hashers.values():
+        hasher.update(chunk)
+
+def hexdigests(hashers):
+    return {name: hasher.hexdigest() for name, hasher in hashers.items()}
+
+# -------------------- Leitura com Buffers Reutilizáveis --------------------
+# Meta de desempenho: o cálculo de hash deve ser limitado pelo disco e não
+# pelo interpretador. Com blocos de 64 KiB a 8 MiB lidos por readinto em um
+# buffer pré-alocado por thread, um GB custa centenas de iterações Python
+# (contra ~130 mil com blocos de 8 KB) e nenhuma alocação por bloco; o
+# SHA-256 passa a acompanhar discos SSD/NVMe (ordem de 1 GB/s por núcleo).
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+CHUNKS_PER_FILE = 16
+
+_thread_buffers = threading.local()
+
+def choose_chunk_size(file_size):
+    # Busca ao menos CHUNKS_PER_FILE blocos por arquivo (para o progresso) em
+    # potências de 2 entre MIN_CHUNK_SIZE e MAX_CHUNK_SIZE
+    target = max(file_size // CHUNKS_PER_FILE, 1)
+    return max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, 1 << (target - 1).bit_length()))
+
+def get_buffer(size):
+    # Cada thread reutiliza o mesmo buffer, que só cresce quando necessário
+    buffer = getattr(_thread_buffers, "buffer", None)
+    if buffer is None or len(buffer) < size:
+        buffer = bytearray(size)
+        _thread_buffers.buffer = buffer
+    return memoryview(buffer)[:size]
+
+def read_chunks(f, chunk_size):
+    # Os blocos devolvidos apontam para o buffer da thread e só são válidos até
+    # a próxima iteração
+    view = get_buffer(chunk_size)
+    while True:
+        n = f.readinto(view)
+        if not n:
+            break
+        yield view[:n]
+
+def mmap_chunks(f, file_size, chunk_size):
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        # Cada fatia é liberada ao retomar o gerador; sem isso o mmap não
+        # poderia ser fechado enquanto o chamador mantém a última fatia
+        with memoryview(mapped) as view:
+            for offset in range(0, file_size, chunk_size):
+                with view[offset:offset + chunk_size] as chunk:
+                    yield chunk
+
+# -------------------- Leitura sem Cache de Páginas --------------------
+# Logo após a gravação, a releitura de verificação costuma vir do cache de
+# páginas do sistema, e não da mídia de destino; e uma aquisição de vários GB
+# expulsa do cache tudo o que o restante da estação estava usando.
+#   cache      comportamento padrão do sistema
+#   sem_cache  posix_fadvise: páginas já em cache são descartadas antes da
+#              leitura (que passa a vir da mídia) e cada bloco lido ou gravado
+#              é descartado em seguida; a cópia é sincronizada e descartada
+#              antes da verificação
+#   direto     como sem_cache, mas as leituras de hash (verificação inclusive)
+#              usam O_DIRECT com buffer alinhado, sem passar pelo cache; onde
+#              o sistema de arquivos não aceita (tmpfs, alguns FUSE), volta a
+#              sem_cache
+# Fora do Linux (sem posix_fadvise/O_DIRECT) todos os modos equivalem a cache.
+IO_MODES = {
+    "Normal (cache do sistema)": "cache",
+    "Sem cache (leitura da mídia)": "sem_cache",
+    "Direta (O_DIRECT)": "direto",
+}
+# Na gravação sem cache, a cópia é sincronizada e descartada do cache a cada
+# DROP_INTERVAL bytes, para que as páginas sujas não se acumulem
+DROP_INTERVAL = 64 * 1024 * 1024
+
+_thread_aligned_buffers = threading.local()
+
+def advise(fd, offset, length, advice):
+    # posix_fadvise é apenas uma sugestão: onde não existe ou é recusada, nada muda
+    if hasattr(os, "posix_fadvise") and hasattr(os, advice):
+        try:
+            os.posix_fadvise(fd, offset, length, getattr(os, advice))
+        except OSError:
+            pass
+
+def drop_cache(fd, offset=0, length=0):
+    # Só descarta páginas já gravadas; as sujas precisam de fsync antes
+    advise(fd, offset, length, "POSIX_FADV_DONTNEED")
+
+def get_aligned_buffer(size):
+    # O_DIRECT exige endereço alinhado; um mmap anônimo começa sempre no
+    # início de uma página. Como em get_buffer, um por thread.
+    buffer = getattr(_thread_aligned_buffers, "buffer", None)
+    if buffer is None or len(buffer) < size:
+        buffer = mmap.mmap(-1, size)
+        _thread_aligned_buffers.buffer = buffer
+    return memoryview(buffer)[:size]
+
+def open_for_hashing(file_path, io_mode="cache"):
+    # Devolve (arquivo, modo efetivo)
+    if io_mode == "direto" and hasattr(os, "O_DIRECT"):
+        try:
+            fd = os.open(file_path, os.O_RDONLY | os.O_DIRECT)
+        except OSError as e:
+            if e.errno != errno.EINVAL:
+                raise
+        else:
+            return open(fd, "rb", buffering=0), "direto"
+    f = open(file_path, "rb", buffering=0)
+    if io_mode == "cache":
+        return f, "cache"
+    drop_cache(f.fileno())
+    advise(f.fileno(), 0, 0, "POSIX_FADV_SEQUENTIAL")
+    return f, "sem_cache"
+
+def disable_direct(f):
+    # Para sistemas de arquivos que abrem com O_DIRECT mas recusam a leitura
+    # (EINVAL): o O_DIRECT é retirado do descritor e a leitura segue pelo
+    # cache. Devolve False se o descritor não estava em O_DIRECT.
+    import fcntl  # import local: O_DIRECT só existe em sistemas POSIX
+    flags = fcntl.fcntl(f.fileno(), fcntl.F_GETFL)
+    if not flags & os.O_DIRECT:
+        return False
+    fcntl.fcntl(f.fileno(), fcntl.F_SETFL, flags & ~os.O_DIRECT)
+    return True
+
+def direct_chunks(f, chunk_size):
+    # Os tamanhos de bloco (potências de 2 a partir de 64 KiB) já são
+    # múltiplos do setor; uma leitura curta é o fim do arquivo
+    view = get_aligned_buffer(chunk_size)
+    while True:
+        try:
+            n = f.readinto(view)
+        except OSError as e:
+            if e.errno != errno.EINVAL or not disable_direct(f):
+                raise
+            continue
+        if not n:
+            break
+        yield view[:n]
+        if n < chunk_size:
+            break
+
+def io_chunks(f, io_mode, chunk_size, offset=0):
+    # Como read_chunks, conforme o modo de leitura efetivo; offset é a posição
+    # atual do arquivo, para descartar do cache exatamente o trecho lido
+    if io_mode == "direto":
+        yield from direct_chunks(f, chunk_size)
+        return
+    for chunk in read_chunks(f, chunk_size):
+        n = len(chunk)
+        yield chunk
+        if io_mode != "cache":
+            drop_cache(f.fileno(), offset, n)
+        offset += n
+
+# -------------------- Aquisição em Passagem Única --------------------
+def hash_file(file_path, algorithms=DEFAULT_ALGORITHMS, use_mmap=False, io_mode="cache", progress_callback=None,
+              segments=None):
+    # O mmap lê pelo cache de páginas e só é usado no modo cache. segments:
+    # SegmentHasher alimentado com os mesmos blocos (hashpm_piecewise)
+    hashers = new_hashers(algorithms)
+    f, io_mode = open_for_hashing(file_path, io_mode)
+    with f:
+        file_size = os.fstat(f.fileno()).st_size
+        chunk_size = choose_chunk_size(file_size)
+        if use_mmap and io_mode == "cache" and file_size > 0:
+            chunks = mmap_chunks(f, file_size, chunk_size)
+        else:
+            chunks = io_chunks(f, io_mode, chunk_size)
+        for chunk in chunks:
+            update_hashers(hashers, chunk)
+            if segments:
+                segments.update(chunk)
+            if progress_callback:
+                progress_callback(len(chunk))
+    return hexdigests(hashers)
+
+def resume_prefix(src, dest_path, hashers, algorithms, chunk_size, checkpointer, progress_callback, segments=None):
+    # Retomada de um arquivo grande: o estado dos hashes (e dos segmentos) é
+    # reconstruído relendo da origem apenas o prefixo que já está gravado na
+    # cópia, sem regravá-lo.
+    # Se a origem mudou ou a cópia está menor que o ponto registrado, recomeça
+    # do zero. Devolve o deslocamento a partir do qual a cópia continua.
+    offset = checkpointer.resume_offset
+    if not offset or not os.path.exists(dest_path) or os.path.getsize(dest_path) < offset:
+        return 0
+    view = get_buffer(chunk_size)
+    remaining = offset
+    while remaining:
+        n = src.readinto(view[:min(chunk_size, remaining)])
+        if not n:
+            break
+        update_hashers(hashers, view[:n])
+        if segments:
+            segments.update(view[:n])
+        remaining -= n
+    if remaining or hashers["SHA-256"].copy().hexdigest() != checkpointer.resume_prefix:
+        src.seek(0)
+        hashers.clear()
+        hashers.update(new_hashers(algorithms))
+        if segments:
+            segments.reset()
+        return 0
+    if progress_callback:
+        progress_callback(offset)
+    return offset
+
+def source_segments(file_size, segment_size):
+    # SegmentHasher para arquivos maiores que um segmento; None nos demais
+    from hashpm_piecewise import SegmentHasher, segmented  # import local: hashpm_piecewise depende deste módulo
+    return SegmentHasher(file_size, segment_size) if segmented(file_size, segment_size) else None
+
+def segment_digests(segments):
+    return segments.digests() if segments else None
+
+def copy_source(src, read_mode, dest_path, hashers, chunk_size, offset, checkpointer, progress_callback, segments):
+    # Laço de cópia de acquire_file, a partir de offset
+    with open(dest_path, "r+b" if offset else "wb") as dst:
+        if offset:
+            dst.truncate(offset)
+            dst.seek(offset)
+        next_checkpoint = offset + CHECKPOINT_INTERVAL
+        dropped = offset
+        for chunk in io_chunks(src, read_mode, chunk_size, offset):
+            update_hashers(hashers, chunk)
+            if segments:
+                segments.update(chunk)
+            dst.write(chunk)
+            offset += len(chunk)
+            if progress_callback:
+                progress_callback(len(chunk))
+            if checkpointer and offset >= next_checkpoint:
+                dst.flush()
+                os.fsync(dst.fileno())
+                checkpointer.save(offset, hashers["SHA-256"].copy().hexdigest())
+                next_checkpoint = offset + CHECKPOINT_INTERVAL
+            if read_mode != "cache" and offset - dropped >= DROP_INTERVAL:
+                dst.flush()
+                os.fsync(dst.fileno())
+                drop_cache(dst.fileno(), dropped, offset - dropped)
+                dropped = offset
+        dst.flush()
+        os.fsync(dst.fileno())
+        if read_mode != "cache":
+            drop_cache(dst.fileno())
+
+def acquire_file(source_path, dest_path, verify=True, algorithms=DEFAULT_ALGORITHMS, checkpointer=None,
+                 io_mode="cache", segment_size=0, progress_callback=None):
+    # Cada bloco da origem é lido uma única vez: o mesmo bloco alimenta todos
+    # os algoritmos e é gravado no destino. A verificação (opcional) relê
+    # apenas a cópia. Com checkpointer, a cada CHECKPOINT_INTERVAL bytes a
+    # cópia é sincronizada em disco e o ponto de retomada é registrado.
+    # Fora do modo cache, a origem é lida da mídia e nem ela nem a cópia
+    # permanecem no cache; O_DIRECT (modo direto) vale só para a verificação.
+    # Com segment_size, os hashes dos segmentos da origem são calculados em
+    # paralelo sobre os mesmos blocos. Devolve (hashes da origem, hashes da
+    # cópia, hashes dos segmentos).
+    hashers = new_hashers(algorithms)
+    src, read_mode = open_for_hashing(source_path, "cache" if io_mode == "cache" else "sem_cache")
+    with src:
+        file_size = os.fstat(src.fileno()).st_size
+        chunk_size = choose_chunk_size(file_size)
+        segments = source_segments(file_size, segment_size)
+        try:
+            offset = 0
+            if checkpointer:
+                offset = resume_prefix(
+                    src, dest_path, hashers, algorithms, chunk_size, checkpointer, progress_callback, segments
+                )
+            copy_source(src, read_mode, dest_path, hashers, chunk_size, offset, checkpointer, progress_callback,
+                        segments)
+            digests = segment_digests(segments)
+        finally:
+            if segments:
+                segments.close()
+    shutil.copystat(source_path, dest_path)
+    source_hashes = hexdigests(hashers)
+    copy_hashes = None
+    if verify:
+        copy_hashes = hash_file(dest_path, algorithms, io_mode=io_mode, progress_callback=progress_callback)
+    return source_hashes, copy_hashes, digests
+
+# -------------------- Cópia pelo Kernel --------------------
+# Erros que indicam apenas que o par origem/destino não admite a cópia pelo
+# kernel (sistemas de arquivos distintos, FUSE, SMB...); nesses casos a cópia
+# continua em espaço de usuário a partir do ponto em que parou.
+KERNEL_COPY_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF, errno.EPERM}
+
+def kernel_copy(src_fd, dst_fd, file_size, progress_callback=None):
+    copied = 0
+    chunk_size = choose_chunk_size(file_size)
+    for method in ("copy_file_range", "sendfile"):
+        if not hasattr(os, method):
+            continue
+        try:
+            while copied < file_size:
+                count = min(chunk_size, file_size - copied)
+                if method == "copy_file_range":
+                    n = os.copy_file_range(src_fd, dst_fd, count, copied, copied)
+                else:
+                    os.lseek(dst_fd, copied, os.SEEK_SET)
+                    n = os.sendfile(dst_fd, src_fd, copied, count)
+                if n == 0:
+                    break
+                copied += n
+                if progress_callback:
+                    progress_callback(n)
+            return copied
+        except OSError as e:
+            if e.errno not in KERNEL_COPY_UNSUPPORTED:
+                raise
+    return copied
+
+def copy_file(source_path, dest_path, io_mode="cache", progress_callback=None):
+    # Fora do modo cache, origem e cópia são descartadas do cache ao final;
+    # a cópia pelo kernel não permite fazê-lo bloco a bloco
+    with open(source_path, "rb", buffering=0) as src, open(dest_path, "wb", buffering=0) as dst:
+        file_size = os.fstat(src.fileno()).st_size
+        copied = 0
+        if sys.platform.startswith("linux"):
+            copied = kernel_copy(src.fileno(), dst.fileno(), file_size, progress_callback)
+        if copied < file_size:
+            src.seek(copied)
+            dst.seek(copied)
+            for chunk in read_chunks(src, choose_chunk_size(file_size)):
+                while chunk:
+                    n = dst.write(chunk)
+                    chunk = chunk[n:]
+                    if progress_callback:
+                        progress_callback(n)
+        os.fsync(dst.fileno())
+        if io_mode != "cache":
+            drop_cache(src.fileno())
+            drop_cache(dst.fileno())
+    shutil.copystat(source_path, dest_path)
+
+def copy_and_verify_file(source_path, dest_path, verify=True, algorithms=DEFAULT_ALGORITHMS, checkpointer=None,
+                         io_mode="cache", segment_size=0, progress_callback=None):
+    # Sem passar pelo espaço de usuário não há como calcular o hash durante a
+    # cópia: a origem é lida novamente para o hash de referência (e dos
+    # segmentos) e, com verificação, a cópia é conferida contra ele. Neste
+    # modo a retomada é feita apenas por arquivo inteiro (checkpointer não é usado).
+    copy_file(source_path, dest_path, io_mode, progress_callback)
+    segments = source_segments(os.path.getsize(source_path), segment_size)
+    try:
+        source_hashes = hash_file(source_path, algorithms, io_mode=io_mode, progress_callback=progress_callback,
+                                  segments=segments)
+        digests = segment_digests(segments)
+    finally:
+        if segments:
+            segments.close()
+    copy_hashes = None
+    if verify:
+        copy_hashes = hash_file(dest_path, algorithms, io_mode=io_mode, progress_callback=progress_callback)
+    return source_hashes, copy_hashes, digests
+
+# -------------------- Motor de Hash Paralelo --------------------
+DEFAULT_WORKERS = min(8, os.cpu_count() or 1)
+
+class FileOperationError(Exception):
+    def __init__(self, file_path, error):
+        super().__init__(f"{os.path.basename(file_path)}: {error}")
+        self.file_path = file_path
+        self.error = error
+
+# -------------------- Telemetria de Progresso --------------------
+class ProgressMonitor:
+    # Canal de progresso entre os workers e a interface gráfica. Os workers
+    # apenas somam contadores (sob um lock de curta duração) e enfileiram
+    # mensagens; a interface lê snapshot() e messages() a intervalos fixos,
+    # na thread do Tk, de modo que nenhum widget é tocado por outra thread.
+    # Pode ser passado como progress_callback: o ByteProgress que o recebe
+    # publica aqui bytes, arquivos e o estado de cada arquivo em andamento.
+    RATE_WINDOW = 5.0  # segundos considerados no cálculo da vazão
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queue = queue.SimpleQueue()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.total_bytes = 0
+            self.done_bytes = 0
+            self.total_files = 0
+            self.done_files = 0
+            self.active = {}  # chave: [nome, bytes processados, peso]
+            self.started = time.monotonic()
+            self.samples = deque([(self.started, 0)])
+
+    def __call__(self, percent):
+        # Compatível com progress_callback; o percentual é recalculado em snapshot()
+        pass
+
+    def status(self, message):
+        self.queue.put(message)
+
+    def messages(self):
+        items = []
+        while True:
+            try:
+                items.append(self.queue.get_nowait())
+            except queue.Empty:
+                return items
+
+    def add_total(self, n, files=0):
+        with self.lock:
+            self.total_bytes += n
+            self.total_files += files
+
+    def add(self, n, files=0, key=None):
+        with self.lock:
+            self.done_bytes += n
+            self.done_files += files
+            if key is not None and key in self.active:
+                self.active[key][1] += n
+
+    def file_started(self, key, name, weight):
+        with self.lock:
+            self.active[key] = [name, 0, weight]
+
+    def file_finished(self, key):
+        with self.lock:
+            self.active.pop(key, None)
+
+    def snapshot(self):
+        # Vazão média da janela RATE_WINDOW e estimativa de término a partir dela
+        now = time.monotonic()
+        with self.lock:
+            done, total = self.done_bytes, self.total_bytes
+            self.samples.append((now, done))
+            while len(self.samples) > 2 and now - self.samples[0][0] > self.RATE_WINDOW:
+                self.samples.popleft()
+            first_time, first_done = self.samples[0]
+            active = sorted(self.active.values(), key=lambda item: item[0])
+            snapshot = {
+                "done_bytes": done,
+                "total_bytes": total,
+                "done_files": self.done_files,
+                "total_files": self.total_files,
+                "elapsed": now - self.started,
+            }
+        rate = (done - first_done) / (now - first_time) if now > first_time else 0
+        snapshot["percent"] = min(100, done * 100 // total) if total else 0
+        snapshot["bytes_per_second"] = rate
+        snapshot["eta"] = (total - done) / rate if rate > 0 and total > done else None
+        snapshot["active"] = [(name, done_file, weight) for name, done_file, weight in active]
+        return snapshot
+
+class ByteProgress:
+    # Soma os bytes processados por todos os workers e repassa o percentual
+    # agregado ao callback apenas quando ele avança. O total pode crescer
+    # durante a execução (pastas enumeradas em fluxo). Se o callback for um
+    # ProgressMonitor, bytes, arquivos e estado por arquivo são repassados a ele.
+    def __init__(self, total_bytes=0, callback=None):
+        self.total_bytes = total_bytes
+        self.done_bytes = 0
+        self.callback = callback
+        self.monitor = callback if isinstance(callback, ProgressMonitor) else None
+        self.lock = threading.Lock()
+        self.last_percent = -1
+        if self.monitor:
+            self.monitor.add_total(total_bytes)
+
+    def add_total(self, n, files=0):
+        with self.lock:
+            self.total_bytes += n
+        if self.monitor:
+            self.monitor.add_total(n, files)
+
+    def add(self, n, files=0, key=None):
+        if self.monitor:
+            self.monitor.add(n, files, key)
+        with self.lock:
+            self.done_bytes += n
+            percent = int(self.done_bytes / self.total_bytes * 100) if self.total_bytes else 0
+            if percent <= self.last_percent:
+                return
+            self.last_percent = percent
+        if self.callback:
+            self.callback(percent)
+
+    def file_callback(self, key, name, weight):
+        # Callback de progresso de um arquivo: sem monitor, o próprio add. O
+        # arquivo só aparece como em andamento ao receber o primeiro bloco,
+        # e não enquanto aguarda na fila do pool.
+        if not self.monitor:
+            return self.add
+        monitor = self.monitor
+        name = os.path.basename(name)
+
+        def add(n):
+            if key not in monitor.active:
+                monitor.file_started(key, name, weight)
+            self.add(n, key=key)
+        return add
+
+    def file_finished(self, key):
+        if self.monitor:
+            self.monitor.file_finished(key)
+
+PIPELINE_QUEUE_FACTOR = 4
+
+def run_pipeline(func, tasks, workers=None, use_processes=False, progress=None, on_result=None):
+    # Executa func(*task) em um pool limitado, consumindo tasks, um iterador de
+    # (chave, task, peso), à medida que os workers liberam espaço: no máximo
+    # workers * PIPELINE_QUEUE_FACTOR tarefas ficam em andamento, de modo que o
+    # processamento começa antes de o iterador terminar. Devolve {chave: resultado}.
+    # on_result(chave, resultado) é chamado nesta thread a cada tarefa concluída.
+    # Em processos o callback de progresso não atravessa o pool: o avanço
+    # (peso) é contabilizado por tarefa concluída.
+    workers = max(1, workers or DEFAULT_WORKERS)
+    if use_processes:
+        # import local: multiprocessing só é carregado quando usado (início mais rápido da interface)
+        from concurrent.futures import ProcessPoolExecutor
+        executor_class = ProcessPoolExecutor
+    else:
+        executor_class = ThreadPoolExecutor
+    results = {}
+    pending = {}
+
+    def drain(limit):
+        while len(pending) > limit:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                key, task, weight = pending.pop(future)
+                try:
+                    results[key] = future.result()
+                except Exception as e:
+                    for other in pending:
+                        other.cancel()
+                    raise FileOperationError(task[0], e) from e
+                if use_processes and progress:
+                    progress.add(weight)
+                if on_result:
+                    on_result(key, results[key])
+
+    with executor_class(max_workers=workers) as pool:
+        for key, task, weight in tasks:
+            if use_processes:
+                future = pool.submit(func, *task)
+            else:
+                future = pool.submit(func, *task, progress.file_callback(key, task[0], weight) if progress else None)
+            if progress:
+                # Concluído já no worker, sem esperar a próxima drenagem
+                future.add_done_callback(lambda _, key=key: progress.file_finished(key))
+            pending[future] = (key, task, weight)
+            drain(workers * PIPELINE_QUEUE_FACTOR)
+        drain(0)
+    return results
+
+def run_parallel(func, tasks, sizes, workers=None, use_processes=False, progress=None):
+    # Os maiores arquivos são agendados primeiro para que nenhum worker fique
+    # com um arquivo grande sozinho no fim; os resultados voltam na ordem
+    # original de tasks.
+    order = sorted(range(len(tasks)), key=lambda i: sizes[i], reverse=True)
+    results = run_pipeline(func, ((i, tasks[i], sizes[i]) for i in order), workers, use_processes, progress)
+    return [results[i] for i in range(len(tasks))]
+
+def hash_files(file_paths, algorithms=DEFAULT_ALGORITHMS, workers=None, use_processes=False, progress_callback=None,
+                use_mmap=False, cache=None, strict=False, io_mode="cache"):
+    # Com cache, arquivos inalterados não são relidos, exceto no modo forense
+    # estrito, em que tudo é recalculado (e o cache apenas atualizado).
+    stats = [os.stat(file_path) for file_path in file_paths]
+    results = [None] * len(file_paths)
+    if cache and not strict:
+        results = [cache.get(stat_result, algorithms) for stat_result in stats]
+    pending = [i for i, digests in enumerate(results) if digests is None]
+    sizes = [stats[i].st_size for i in pending]
+    progress = ByteProgress(sum(sizes), progress_callback)
+    tasks = [(file_paths[i], algorithms, use_mmap, io_mode) for i in pending]
+    for i, digests in zip(pending, run_parallel(hash_file, tasks, sizes, workers, use_processes, progress)):
+        results[i] = digests
+    if cache:
+        cache.put_many(unchanged_entries((file_paths[i], stats[i], results[i]) for i in pending))
+    return results
+
+def unchanged_entries(entries):
+    # Só vai para o cache o hash de arquivo que não mudou durante a leitura
+    for file_path, stat_result, digests in entries:
+        if cache_key(os.stat(file_path)) == cache_key(stat_result):
+            yield stat_result, digests
+
+# -------------------- Ingestão de Pastas e Volumes --------------------
+def source_folder_name(folder):
+    name = os.path.basename(os.path.normpath(folder))
+    if not name:
+        # Raiz de volume, como "E:\\" ou "/"
+        name = os.path.splitdrive(folder)[0].replace(":", "").strip("\\/") or "volume"
+    return name
+
+def iter_directory(folder):
+    # Enumeração em profundidade com os.scandir, uma pasta por vez: a árvore
+    # inteira nunca fica em memória e os arquivos são entregues à medida que
+    # são encontrados. Links simbólicos e arquivos especiais não são seguidos.
+    # Yield (caminho, caminho relativo, tamanho).
+    stack = [""]
+    while stack:
+        relative = stack.pop()
+        current = os.path.join(folder, relative) if relative else folder
+        with os.scandir(current) as it:
+            entries = sorted(it, key=lambda entry: entry.name)
+        subfolders = []
+        for entry in entries:
+            entry_relative = os.path.join(relative, entry.name) if relative else entry.name
+            if entry.is_dir(follow_symlinks=False):
+                subfolders.append(entry_relative)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry.path, entry_relative, entry.stat(follow_symlinks=False).st_size
+        stack.extend(reversed(subfolders))
+
+def unique_name(name, used_names):
+    # Nomes repetidos na raiz de Arquivos/ (dois "foto.jpg" avulsos, duas
+    # pastas "DCIM") recebem um sufixo numérico em vez de se sobrescreverem
+    root, ext = os.path.splitext(name)
+    candidate = name
+    number = 2
+    while os.path.normcase(candidate) in used_names:
+        candidate = f"{root} ({number}){ext}"
+        number += 1
+    used_names.add(os.path.normcase(candidate))
+    return candidate
+
+def iter_sources(paths, used_names=None):
+    # Arquivos avulsos ficam na raiz de Arquivos/; pastas mantêm a estrutura
+    # relativa sob uma subpasta com o nome da pasta de origem. used_names
+    # permite compartilhar os nomes já usados entre chamadas.
+    used_names = set() if used_names is None else used_names
+    for path in paths:
+        if os.path.isdir(path):
+            name = unique_name(source_folder_name(path), used_names)
+            for file_path, relative, size in iter_directory(path):
+                yield file_path, os.path.join(name, relative), size
+        else:
+            yield path, unique_name(os.path.basename(path), used_names), os.path.getsize(path)
+
+# -------------------- Pastas e Documentos da Aquisição --------------------
+def get_resource_path(relative_path):
+    if hasattr(sys, '_MEIPASS'):
+        return os.path.join(sys._MEIPASS, relative_path)
+    return os.path.abspath(relative_path)
+
+def evidence_folder_path(portaria, base_dir="."):
+    return os.path.join(base_dir, f"Evidencias_Adquiridas_Portaria_{portaria}")
+
+def create_evidence_folders(portaria, base_dir="."):
+    base_folder = evidence_folder_path(portaria, base_dir)
+    arquivos_folder = os.path.join(base_folder, "Arquivos")
+    certidoes_folder = os.path.join(base_folder, "Certidões")
+    os.makedirs(base_folder, exist_ok=True)
+    os.makedirs(arquivos_folder, exist_ok=True)
+    os.makedirs(certidoes_folder, exist_ok=True)
+    return base_folder, arquivos_folder, certidoes_folder
+
+def generate_minuta_juntada(file_paths, output_path, hashes=None, file_info=None):
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write("MINUTA DE JUNTADA\n\n")
+        f.write(f"Data: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n\n")
+        f.write("LISTA DE ARQUIVOS ADQUIRIDOS:\n\n")
+        for i, file_path in enumerate(file_paths, 1):
+            info = (file_info or {}).get(file_path)
+            f.write(f"{i}. {info['relative_path'] if info else os.path.basename(file_path)}\n")
+            if hashes:
+                for name, digest in hashes[file_path].items():
+                    f.write(f"   {name}: {digest}\n")
+
+# -------------------- Transferência para a Pasta de Evidências --------------------
+class AcquisitionError(Exception):
+    pass
+
+class IncompleteDataError(AcquisitionError):
+    # Dados ausentes (não inválidos): a interface exibe como aviso
+    pass
+
+def calculate_hashes(file_paths, progress_callback=None, workers=None, use_processes=False,
+                     algorithms=DEFAULT_ALGORITHMS, cache=None, strict=False, io_mode="cache"):
+    try:
+        digests = hash_files(
+            file_paths, normalize_algorithms(algorithms), workers, use_processes, progress_callback,
+            cache=cache, strict=strict, io_mode=io_mode
+        )
+    except FileOperationError as e:
+        raise AcquisitionError(f"Falha ao calcular hash para {os.path.basename(e.file_path)}:\n{e.error}") from e
+    return dict(zip(file_paths, digests))
+
+def copy_files_to_evidence(file_paths, destination_folder, options=None, progress_callback=None, **resources):
+    # Cópia pelo kernel (copy_file_range/sendfile), seguida do hash da origem
+    # e, com verificação, do hash da cópia. options e resources: ver transfer_files.
+    return transfer_files(copy_and_verify_file, 2, file_paths, destination_folder, options, progress_callback,
+                          **resources)
+
+def acquire_files_to_evidence(file_paths, destination_folder, options=None, progress_callback=None, **resources):
+    # Copia e calcula o hash da origem na mesma leitura; com verificação,
+    # a cópia gravada é relida e comparada ao hash da origem.
+    return transfer_files(acquire_file, 1, file_paths, destination_folder, options, progress_callback, **resources)
+
+# -------------------- Armazenamento por Conteúdo --------------------
+# Na organização por conteúdo, cada arquivo é gravado uma única vez em
+# Arquivos/objetos/<2 primeiros dígitos>/<SHA-256>; o manifesto relaciona o
+# caminho de origem de cada arquivo ao seu objeto. Conteúdo repetido (no
+# mesmo dispositivo, em vários dispositivos ou em aquisições anteriores para a
+# mesma portaria) ocupa espaço uma só vez, e nomes iguais nunca colidem.
+OBJECTS_FOLDER = "objetos"
+PARTIAL_FOLDER = ".parcial"
+
+def object_relative(sha256):
+    return f"{OBJECTS_FOLDER}/{sha256[:2]}/{sha256}"
+
+def partial_path(destination_folder, relative):
+    # Nome estável, para que a retomada pelo diário encontre a cópia parcial
+    name = hashlib.sha256(relative.encode("utf-8")).hexdigest()
+    return os.path.join(destination_folder, OBJECTS_FOLDER, PARTIAL_FOLDER, name)
+
+def store_object(temp_path, object_path):
+    # Conteúdo já armazenado: a cópia recém-gravada é descartada
+    if os.path.exists(object_path):
+        os.remove(temp_path)
+        return False
+    os.makedirs(os.path.dirname(object_path), exist_ok=True)
+    os.replace(temp_path, object_path)
+    return True
+
+def cached_transfer(cache, source_stat, dest_path, algorithms):
+    # Uma nova aquisição para o mesmo destino (por exemplo, para corrigir a
+    # certidão) é dispensada quando origem e cópia já têm hashes iguais no cache
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return None
+    if dest_stat.st_size != source_stat.st_size:
+        return None
+    source_hashes = cache.get(source_stat, algorithms)
+    if source_hashes is None or cache.get(dest_stat, algorithms) != source_hashes:
+        return None
+    return source_hashes
+
+def transfer_files(transfer_func, passes, file_paths, destination_folder, options=None, progress_callback=None,
+                   cache=None, journal=None, manifest=None, profiler=None):
+    # options: as chaves de DEFAULT_OPTIONS usadas na cópia (verify, workers,
+    # use_processes, algorithms, strict, segment_size, content_addressed,
+    # prescan, archives e io_mode); as ausentes valem o padrão.
+    # passes: quantas vezes o volume de cada arquivo é percorrido sem contar
+    # a verificação, que acrescenta uma, para que o progresso agregado chegue
+    # a 100% apenas no fim da verificação.
+    # Arquivos avulsos são agendados dos maiores para os menores; pastas são
+    # enumeradas em fluxo, alimentando o pool enquanto a árvore é percorrida.
+    # O cache e o diário são consultados e atualizados apenas nesta thread.
+    # Arquivos já concluídos segundo o diário não são copiados novamente.
+    # Cada arquivo é registrado no manifesto assim que seus hashes ficam prontos.
+    # Com segment_size, arquivos maiores que um segmento recebem também o hash
+    # de cada segmento da origem e a raiz de Merkle, calculados em paralelo
+    # durante a própria leitura da origem. Só os dispensados pelo cache (não
+    # lidos) ou retomados de um diário sem segmentos têm os segmentos lidos da
+    # origem depois; o registro desses arquivos no manifesto aguarda esse passo.
+    # Com content_addressed, a cópia é gravada em objetos/.parcial/ e, com os
+    # hashes prontos, movida para o seu objeto (ou descartada, se o objeto já
+    # existe); com o cache, conteúdo já armazenado nem chega a ser copiado.
+    # As chaves devolvidas continuam sendo os caminhos lógicos em Arquivos/.
+    # Com prescan, as pastas são enumeradas por inteiro antes da cópia, para
+    # que o total de bytes (e a estimativa de término) seja conhecido desde o
+    # início, ao custo de a cópia só começar depois da enumeração.
+    # Com profiler, o tempo de cada arquivo é medido no worker e registrado.
+    # Com archives, os itens de arquivos ZIP/TAR são lidos da cópia e têm os
+    # hashes registrados junto ao pacote, que também aguarda esse passo.
+    # io_mode: ver IO_MODES.
+    from hashpm_piecewise import segmented, hash_segments, piecewise_record  # import local: depende deste módulo
+    from hashpm_archive import archive_format, hash_archives
+    from hashpm_profile import profile_stage, timed_call
+
+    options = dict(DEFAULT_OPTIONS, **(options or {}))
+    verify = options["verify"]
+    workers = options["workers"]
+    use_processes = options["use_processes"]
+    algorithms = normalize_algorithms(options["algorithms"])
+    strict = options["strict"]
+    segment_size = options["segment_size"]
+    content_addressed = options["content_addressed"]
+    prescan = options["prescan"]
+    archives = options["archives"]
+    io_mode = options["io_mode"]
+    passes += verify
+    progress = ByteProgress(0, progress_callback)
+    entries = []  # (origem, caminho relativo, tamanho), na ordem da certidão
+    source_stats = {}
+    cached = {}
+    resumed = {}
+    deferred = {}  # segmentos ou itens pendentes: i -> (hashes, hashes da cópia, origem do hash)
+    piecewise = {}
+    archive_records = {}
+    stored = {}  # i -> caminho em disco da cópia (o objeto, na organização por conteúdo)
+    created_folders = set()
+    used_names = set()
+
+    def stored_path(i, source_hashes):
+        if content_addressed:
+            return os.path.join(destination_folder, *object_relative(source_hashes["SHA-256"]).split("/"))
+        return os.path.join(destination_folder, entries[i][1])
+
+    def stored_object(source_hashes):
+        return object_relative(source_hashes["SHA-256"]) if content_addressed else None
+
+    def write_manifest(i, source_hashes, copy_hashes, hash_origin):
+        source_path, relative, size = entries[i]
+        if (segmented(size, segment_size) and i not in piecewise) or (archives and archive_format(relative)):
+            deferred[i] = (source_hashes, copy_hashes, hash_origin)
+        elif manifest:
+            manifest.write(i + 1, relative, source_path, source_stats[i], source_hashes, copy_hashes, hash_origin,
+                           piecewise.get(i), stored_object=stored_object(source_hashes))
+
+    def add_total(i):
+        progress.add_total(entries[i][2] * passes, files=1)
+
+    def make_task(i):
+        source_path, relative, size = entries[i]
+        dest_path = partial_path(destination_folder, relative) if content_addressed else stored_path(i, None)
+        if not prescan:
+            add_total(i)
+        source_stats[i] = os.stat(source_path)
+        if journal:
+            # Na organização por conteúdo o diário registra o objeto de cada arquivo concluído
+            result = journal.completed_result(
+                relative, source_path, source_stats[i], None if content_addressed else dest_path, algorithms, verify
+            )
+            if result is not None:
+                resumed[i] = result
+                stored[i] = stored_path(i, result[0])
+                if result[2] and result[2]["segment_size"] == segment_size:
+                    piecewise[i] = result[2]
+                progress.add(size * passes, files=1)
+                if profiler:
+                    profiler.file_done(relative, size, 0, 0, "diario")
+                write_manifest(i, result[0], result[1], "calculado")
+                return None
+        if cache:
+            if not strict:
+                target = dest_path
+                if content_addressed:
+                    known = cache.get(source_stats[i], algorithms)
+                    target = stored_path(i, known) if known else None
+                source_hashes = cached_transfer(cache, source_stats[i], target, algorithms) if target else None
+                if source_hashes is not None:
+                    cached[i] = source_hashes
+                    stored[i] = target
+                    progress.add(size * passes)
+                    if profiler:
+                        profiler.file_done(relative, size, 0, 0, "cache")
+                    record_result(i, (source_hashes, source_hashes if verify else None, None), "cache")
+                    return None
+        parent = os.path.dirname(dest_path)
+        if parent not in created_folders:
+            os.makedirs(parent, exist_ok=True)
+            created_folders.add(parent)
+        # Em processos o diário não atravessa o pool: a retomada é por arquivo inteiro
+        checkpointer = journal.checkpointer(relative, source_path) if journal and not use_processes else None
+        return i, (source_path, dest_path, verify, algorithms, checkpointer, io_mode, segment_size), size * passes
+
+    def record_result(i, result, hash_origin="calculado"):
+        source_path, relative, size = entries[i]
+        source_hashes, copy_hashes, digests = result
+        if digests:
+            piecewise[i] = piecewise_record(digests, segment_size)
+        if verify and copy_hashes != source_hashes:
+            raise AcquisitionError(
+                f"A cópia de {relative} não confere com a origem!\n"
+                f"Origem: {source_hashes['SHA-256']}\nCópia: {copy_hashes['SHA-256']}"
+            )
+        if i not in stored:
+            stored[i] = stored_path(i, source_hashes)
+            if content_addressed:
+                store_object(partial_path(destination_folder, relative), stored[i])
+        if journal:
+            journal.file_done(relative, source_path, source_stats[i], source_hashes, copy_hashes, stored[i],
+                              piecewise.get(i))
+        write_manifest(i, source_hashes, copy_hashes, hash_origin)
+        progress.add(0, files=1)
+
+    def iter_tasks():
+        entries.extend(iter_sources((p for p in file_paths if not os.path.isdir(p)), used_names))
+        loose = len(entries)
+        if prescan:
+            with profile_stage(profiler, "pre_varredura") as stage:
+                entries.extend(iter_sources((p for p in file_paths if os.path.isdir(p)), used_names))
+                for i in range(len(entries)):
+                    add_total(i)
+                stage["files"] = len(entries)
+                stage["bytes"] = sum(entry[2] for entry in entries)
+        for i in sorted(range(loose), key=lambda i: entries[i][2], reverse=True):
+            task = make_task(i)
+            if task:
+                yield task
+        if prescan:
+            for i in range(loose, len(entries)):
+                task = make_task(i)
+                if task:
+                    yield task
+            return
+        for entry in iter_sources((p for p in file_paths if os.path.isdir(p)), used_names):
+            entries.append(entry)
+            task = make_task(len(entries) - 1)
+            if task:
+                yield task
+
+    def record_timed_result(i, timed_result):
+        result, wall, cpu = timed_result
+        untimed_results[i] = result
+        profiler.file_done(entries[i][1], entries[i][2], wall, cpu, "calculado")
+        record_result(i, result)
+
+    untimed_results = {}
+    try:
+        if profiler:
+            run_pipeline(functools.partial(timed_call, transfer_func), iter_tasks(), workers, use_processes, progress,
+                         record_timed_result)
+            results = untimed_results
+        else:
+            results = run_pipeline(transfer_func, iter_tasks(), workers, use_processes, progress, record_result)
+        segment_entries = [i for i in sorted(deferred) if segmented(entries[i][2], segment_size) and i not in piecewise]
+        if segment_entries:
+            with profile_stage(profiler, "segmentos") as stage:
+                progress.add_total(sum(entries[i][2] for i in segment_entries))
+                source_digests = hash_segments(
+                    [(i, entries[i][0], entries[i][2]) for i in segment_entries],
+                    segment_size, workers, use_processes, progress
+                )
+                stage["files"] = len(segment_entries)
+                stage["bytes"] = sum(entries[i][2] for i in segment_entries)
+        if deferred:
+            archive_entries = [(i, stored[i], archive_format(entries[i][1])) for i in sorted(deferred)
+                               if archives and archive_format(entries[i][1])]
+            if archive_entries:
+                with profile_stage(profiler, "itens_compactados") as stage:
+                    archive_records = hash_archives(archive_entries, algorithms, workers, use_processes, progress)
+                    stage["files"] = sum(len(record["members"]) for record in archive_records.values())
+                    stage["bytes"] = sum(entries[i][2] for i, _, _ in archive_entries)
+            for i, (source_hashes, copy_hashes, hash_origin) in sorted(deferred.items()):
+                source_path, relative, size = entries[i]
+                if i in segment_entries:
+                    piecewise[i] = piecewise_record(source_digests[i], segment_size)
+                if manifest:
+                    manifest.write(i + 1, relative, source_path, source_stats[i], source_hashes, copy_hashes,
+                                   hash_origin, piecewise.get(i),
+                                   stored_object=stored_object(source_hashes), archive=archive_records.get(i))
+    except FileOperationError as e:
+        raise AcquisitionError(f"Falha ao adquirir arquivo {os.path.basename(e.file_path)}:\n{e.error}") from e
+    except OSError as e:
+        raise AcquisitionError(f"Falha ao acessar {e.filename}:\n{e.strerror}") from e
+    if content_addressed:
+        try:
+            os.rmdir(os.path.join(destination_folder, OBJECTS_FOLDER, PARTIAL_FOLDER))
+        except OSError:
+            pass
+
+    dest_paths = []
+    hashes = {}
+    file_info = {}
+    fresh_entries = []
+    for i, (source_path, relative, size) in enumerate(entries):
+        dest_path = os.path.join(destination_folder, relative)
+        if i in cached:
+            source_hashes = cached[i]
+            copy_hashes = source_hashes if verify else None
+        elif i in resumed:
+            source_hashes, copy_hashes, _ = resumed[i]
+        else:
+            source_hashes, copy_hashes, _ = results[i]
+            if cache:
+                fresh_entries.append((source_path, source_stats[i], source_hashes))
+                if copy_hashes:
+                    fresh_entries.append((stored[i], os.stat(stored[i]), copy_hashes))
+        dest_paths.append(dest_path)
+        hashes[dest_path] = source_hashes
+        file_info[dest_path] = {
+            "source": source_path,
+            "relative_path": relative,
+            "size": size,
+            "copy_hashes": copy_hashes,
+            "hash_origin": "cache" if i in cached else "calculado",
+            "piecewise": piecewise.get(i),
+            "object": stored_object(source_hashes),
+            "archive": archive_records.get(i),
+        }
+    if cache:
+        cache.put_many(unchanged_entries(fresh_entries))
+    return dest_paths, hashes, file_info
+
+# -------------------- API de Aquisição (sem interface gráfica) --------------------
+APREENSOR_FIELDS = ["Nome", "Posto/Graduação", "CPF", "Função", "Orgão", "Portaria", "Unidade da Federação"]
+PROPRIETARIO_FIELDS = ["Nome", "Tipo", "CPF/CNPJ"]
+
+COPY_MODES = {
+    "Leitura única (hash durante a cópia)": "tee",
+    "Cópia pelo kernel + verificação": "kernel",
+}
+
+DEFAULT_OPTIONS = {
+    "verify": True,
+    "workers": DEFAULT_WORKERS,
+    "use_processes": False,
+    "algorithms": DEFAULT_ALGORITHMS,
+    "copy_mode": "tee",
+    "base_dir": ".",
+    "use_cache": True,
+    "strict": False,
+    "cache_path": DEFAULT_CACHE_PATH,
+    "cache_max_bytes": DEFAULT_CACHE_MAX_BYTES,
+    "resume": True,
+    "files_per_volume": 0,
+    "segment_size": 0,
+    "hash_sets": None,  # None: todos os conjuntos da pasta padrão; []: nenhum
+    "content_addressed": False,
+    "prescan": False,
+    "archives": False,  # hashes dos itens de arquivos ZIP/TAR
+    "io_mode": "cache",  # ver IO_MODES
+    # Imagem bruta de dispositivos de bloco ou arquivos de imagem (hashpm_image)
+    "device_image": False,
+    "image_block_size": 4 * 1024 * 1024,
+    "image_retries": 2,  # novas tentativas por setor ilegível
+    # Pacote compactado de Arquivos/ e Certidões/ (hashpm_package)
+    "package": False,
+    "package_compression": "zlib",
+    # Registro de desempenho (Certidões/Perfil_<data>.jsonl), opcionalmente
+    # com cProfile da thread coordenadora e rastreamento de memória
+    "profile": False,
+    "profile_cprofile": False,
+    "profile_memory": False,
+}
+
+def prepare_acquisition_data(raw_user_data, raw_proprietario_data):
+    # Campos vazios recebem os mesmos valores padrão usados na certidão
+    user_data = {key: (raw_user_data.get(key) or "").strip() or "Não informado" for key in APREENSOR_FIELDS}
+    proprietario_data = {
+        key: (raw_proprietario_data.get(key) or "").strip() or "Indeterminado" for key in PROPRIETARIO_FIELDS
+    }
+    return user_data, proprietario_data
+
+def validate_acquisition_data(user_data, proprietario_data):
+    if not validar_cpf(user_data['CPF']):
+        raise AcquisitionError("CPF do Apreensor inválido! Verifique e tente novamente.")
+
+    if proprietario_data['Tipo'] == "Pessoa Física" and proprietario_data['CPF/CNPJ'] != "Indeterminado":
+        if not validar_cpf(proprietario_data['CPF/CNPJ']):
+            raise AcquisitionError("CPF do Proprietário inválido! Verifique e tente novamente.")
+    elif proprietario_data['Tipo'] == "Pessoa Jurídica" and proprietario_data['CPF/CNPJ'] != "Indeterminado":
+        if not validar_cnpj(proprietario_data['CPF/CNPJ']):
+            raise AcquisitionError("CNPJ do Proprietário inválido! Verifique e tente novamente.")
+
+    if (not user_data['Nome'] or not user_data['Posto/Graduação'] or
+            not user_data['CPF'] or not user_data['Portaria']):
+        raise IncompleteDataError("Preencha todos os dados obrigatórios do Apreensor!")
+
+def acquisition_timestamp(certidoes_folder):
+    # Duas aquisições para a mesma portaria no mesmo segundo (ex.: em fila)
+    # não sobrescrevem os documentos uma da outra; o sufixo mantém a ordem
+    # cronológica dos manifestos
+    timestamp = base = datetime.now().strftime("%Y%m%d_%H%M%S")
+    n = 1
+    while os.path.exists(os.path.join(certidoes_folder, f"Manifesto_{timestamp}.jsonl")):
+        n += 1
+        timestamp = f"{base}_{n}"
+    return timestamp
+
+def load_hash_sets(paths, status):
+    # Conjuntos pedidos explicitamente precisam abrir; os encontrados na pasta
+    # padrão que estiverem corrompidos são apenas sinalizados
+    explicit = paths is not None
+    hash_sets = []
+    for path in (paths if explicit else find_hash_sets()):
+        try:
+            hash_sets.append(HashSet(path))
+        except (OSError, ValueError) as e:
+            if explicit:
+                for hash_set in hash_sets:
+                    hash_set.close()
+                raise AcquisitionError(f"Falha ao abrir o conjunto de hashes {path}:\n{e}") from e
+            status(f"Conjunto de hashes ignorado ({os.path.basename(path)}): {e}")
+    return hash_sets
+
+def run_acquisition(file_paths, user_data, proprietario_data, options=None,
+                    progress_callback=None, status_callback=None):
+    # Executa a aquisição completa: validação, pastas, cópia com hash, certidão
+    # em PDF e minuta. Erros são sinalizados com AcquisitionError.
+    options = dict(DEFAULT_OPTIONS, **(options or {}))
+
+    def status(message):
+        if status_callback:
+            status_callback(message)
+
+    if not file_paths:
+        raise IncompleteDataError("Selecione pelo menos um arquivo ou pasta!")
+    validate_acquisition_data(user_data, proprietario_data)
+
+    profiler = None
+    if options["profile"] or options["profile_cprofile"] or options["profile_memory"]:
+        from hashpm_profile import AcquisitionProfiler  # import local: carrega tracemalloc
+        profiler = AcquisitionProfiler(options["profile_cprofile"], options["profile_memory"])
+    try:
+        result = run_acquisition_stages(file_paths, user_data, proprietario_data, options, progress_callback, status, profiler)
+    except BaseException:
+        if profiler:
+            profiler.close("falha")
+        raise
+    if profiler:
+        profiler.close()
+    return result
+
+def run_acquisition_stages(file_paths, user_data, proprietario_data, options, progress_callback, status, profiler):
+    # Etapas de run_acquisition, medidas uma a uma quando há profiler
+    from hashpm_pdf import generate_pdf  # import local: hashpm_pdf depende deste módulo
+    from hashpm_archive import archive_members
+    from hashpm_image import image_devices_to_evidence
+    from hashpm_package import run_packaging
+    # sqlite3 e hashpm_profile (tracemalloc) só são carregados quando há uma aquisição a fazer
+    import sqlite3
+    from hashpm_cache import HashCache
+    from hashpm_profile import profile_stage
+
+    with profile_stage(profiler, "pastas"):
+        base_folder, arquivos_folder, certidoes_folder = create_evidence_folders(
+            user_data['Portaria'], options["base_dir"]
+        )
+        journal = AcquisitionJournal(base_folder, options["resume"])
+    if journal.completed:
+        status(f"Retomando aquisição interrompida ({len(journal.completed)} arquivo(s) já concluído(s))...")
+    if options["device_image"]:
+        status("Gerando imagem bruta e calculando hashes...")
+    else:
+        status("Copiando arquivos e calculando hashes...")
+    if progress_callback:
+        progress_callback(0)
+    transfer = copy_files_to_evidence if options["copy_mode"] == "kernel" else acquire_files_to_evidence
+    cache = None
+    with profile_stage(profiler, "cache_e_conjuntos"):
+        if options["use_cache"]:
+            try:
+                cache = HashCache(options["cache_path"], options["cache_max_bytes"])
+            except (OSError, sqlite3.Error):
+                status("Cache de hashes indisponível; todos os hashes serão calculados.")
+        # Os algoritmos dos conjuntos de hashes (ex.: MD5 em listas antigas) são
+        # acrescentados aos pedidos, para que todo conjunto possa ser consultado
+        hash_sets = load_hash_sets(options["hash_sets"], status)
+    algorithms = normalize_algorithms(
+        list(options["algorithms"]) + [hash_set.algorithm for hash_set in hash_sets
+                                       if hash_set.algorithm in HASH_ALGORITHMS]
+    )
+    if hash_sets:
+        status(f"Consultando {len(hash_sets)} conjunto(s) de hashes conhecidos.")
+    # O manifesto é gravado durante a cópia e fica utilizável mesmo antes da certidão
+    timestamp = acquisition_timestamp(certidoes_folder)
+    if profiler:
+        profiler.open(os.path.join(certidoes_folder, f"Perfil_{timestamp}.jsonl"), {
+            name: options[name] for name in (
+                "verify", "workers", "use_processes", "algorithms", "copy_mode", "use_cache", "strict",
+                "segment_size", "content_addressed", "prescan", "archives", "io_mode", "device_image",
+                "package"
+            )
+        })
+    manifest = ManifestWriter(
+        os.path.join(certidoes_folder, f"Manifesto_{timestamp}.jsonl"),
+        algorithms,
+        os.path.join(certidoes_folder, f"Manifesto_{timestamp}.csv"),
+        hash_sets,
+    )
+    try:
+        journal.start({
+            name: options[name] for name in (
+                "verify", "algorithms", "copy_mode", "strict", "content_addressed", "device_image"
+            )
+        })
+        try:
+            with profile_stage(profiler, "transferencia") as stage:
+                # Os algoritmos incluem os exigidos pelos conjuntos de hashes
+                transfer_options = dict(options, algorithms=algorithms)
+                if options["device_image"]:
+                    copied_files, hashes, file_info = image_devices_to_evidence(
+                        file_paths, arquivos_folder, transfer_options, progress_callback,
+                        journal=journal, manifest=manifest, profiler=profiler, status_callback=status
+                    )
+                else:
+                    copied_files, hashes, file_info = transfer(
+                        file_paths, arquivos_folder, transfer_options, progress_callback,
+                        cache=cache, journal=journal, manifest=manifest, profiler=profiler
+                    )
+                stage["files"] = len(copied_files)
+                stage["bytes"] = sum(info["size"] for info in file_info.values())
+            for dest_path in copied_files:
+                file_info[dest_path]["hash_set_matches"] = match_hash_sets(hash_sets, hashes[dest_path])
+                for member in archive_members(file_info[dest_path]["archive"]):
+                    member["hash_set_matches"] = match_hash_sets(hash_sets, member["hashes"])
+        finally:
+            manifest.close()
+            for hash_set in hash_sets:
+                hash_set.close()
+            if cache:
+                if cache.write_error:
+                    status(f"Cache de hashes não atualizado ({cache.write_error}); a aquisição não foi afetada.")
+                cache.close()
+
+        pdf_path = os.path.join(certidoes_folder, f"Certidao_{timestamp}.pdf")
+        minuta_path = os.path.join(certidoes_folder, f"Minuta_de_Juntada_{timestamp}.txt")
+        try:
+            status("Gerando relatório PDF...")
+            with profile_stage(profiler, "certidao") as stage:
+                pdf_paths = generate_pdf(
+                    copied_files, user_data, proprietario_data, hashes, pdf_path, file_info,
+                    options["files_per_volume"]
+                )
+                stage["files"] = len(pdf_paths)
+                stage["bytes"] = sum(os.path.getsize(path) for path in pdf_paths)
+            with profile_stage(profiler, "minuta"):
+                generate_minuta_juntada(copied_files, minuta_path, hashes, file_info)
+        except Exception as e:
+            status("Erro na geração do relatório.")
+            raise AcquisitionError(f"Falha ao gerar arquivos:\n{e}") from e
+        # Só após a certidão a aquisição deixa de ser retomável
+        journal.finish()
+    finally:
+        journal.close()
+    status("Relatório gerado com sucesso!")
+
+    package = None
+    if options["package"]:
+        with profile_stage(profiler, "pacote") as stage:
+            package = run_packaging(
+                base_folder, options["package_compression"], None, user_data, options["workers"],
+                progress_callback, status
+            )
+            stage["files"] = package["files"]
+            stage["bytes"] = package["bytes"]
+
+    return {
+        "base_folder": base_folder,
+        "pdf_path": pdf_path,
+        "pdf_paths": pdf_paths,
+        "minuta_path": minuta_path,
+        "manifest_paths": manifest.paths(),
+        "files": copied_files,
+        "hashes": hashes,
+        "file_info": file_info,
+        "profile_path": profiler.path if profiler else None,
+        "package": package,
+    }
@@ -0,0 +1,237 @@
+import os
+import re
+import glob
+import json
+import heapq
+import mmap
+import struct
+import tempfile
+from datetime import datetime
+
+DEFAULT_HASHSET_DIR = os.path.join(os.path.expanduser("~"), ".hashpm", "conjuntos")
+HASHSET_EXTENSION = ".hpmset"
+MAGIC = b"HPMHSET1"
+
+# Tipos de conjunto: arquivos conhecidos (ex.: arquivos de sistema
+# operacional) e arquivos de alerta (material ilícito já catalogado)
+HASHSET_KINDS = {"conhecido": "Conhecido", "alerta": "Alerta"}
+# Tamanho em caracteres hexadecimais de cada algoritmo aceito em conjuntos
+HASHSET_ALGORITHMS = {"MD5": 32, "SHA-1": 40, "SHA-256": 64, "SHA-512": 128, "BLAKE2b": 128}
+# Algoritmos deduzidos do tamanho do hash; 128 caracteres tanto pode ser
+# SHA-512 quanto BLAKE2b e exige o algoritmo informado na importação
+DIGEST_ALGORITHMS = {32: "MD5", 40: "SHA-1", 64: "SHA-256"}
+HASHSET_LENGTHS = set(HASHSET_ALGORITHMS.values())
+
+# Filtro de Bloom com ~10 bits por hash e 7 funções: ~1% de falsos positivos,
+# que são descartados pela busca binária no índice ordenado
+BLOOM_BITS_PER_ENTRY = 10
+BLOOM_HASHES = 7
+# Hashes ordenados em memória por vez durante a importação (ordenação externa)
+RUN_RECORDS = 2_000_000
+
+HEX_TOKEN = re.compile(r"\b[0-9a-fA-F]{32,128}\b")
+
+# -------------------- Filtro de Bloom --------------------
+def bloom_positions(digest, bloom_bits):
+    # Os hashes já são uniformes: as posições saem dos próprios bytes do hash
+    # (hash duplo h1 + i*h2), sem calcular outro hash
+    h1, h2 = struct.unpack_from("<QQ", digest)
+    h2 |= 1
+    return [(h1 + i * h2) % bloom_bits for i in range(BLOOM_HASHES)]
+
+# -------------------- Importação --------------------
+def iter_digests(input_paths, digest_length=None):
+    # Um hash por linha; em arquivos CSV (como o NSRL) vale o primeiro campo
+    # hexadecimal do tamanho esperado. Yield bytes do hash.
+    for path in input_paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                for token in HEX_TOKEN.findall(line):
+                    if (len(token) == digest_length) if digest_length else (len(token) in HASHSET_LENGTHS):
+                        digest_length = len(token)
+                        yield bytes.fromhex(token)
+                        break
+
+def write_run(records, folder):
+    records.sort()
+    f = tempfile.NamedTemporaryFile(dir=folder, prefix=".run_", delete=False)
+    with f:
+        f.write(b"".join(records))
+    return f.name
+
+def read_run(path, digest_size):
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(digest_size * 65536)
+            if not block:
+                break
+            for i in range(0, len(block), digest_size):
+                yield block[i:i + digest_size]
+
+def build_hash_set(input_paths, output_path, name, kind, algorithm=None, status_callback=None):
+    # Ordenação externa: blocos de RUN_RECORDS hashes são ordenados e gravados
+    # em arquivos temporários e depois intercalados (heapq.merge), sem
+    # duplicatas. O arquivo final traz cabeçalho JSON, filtro de Bloom e os
+    # hashes ordenados em registros binários de tamanho fixo.
+    if kind not in HASHSET_KINDS:
+        raise ValueError(f"Tipo de conjunto inválido: {kind}")
+    digest_length = None
+    if algorithm:
+        digest_length = HASHSET_ALGORITHMS.get(algorithm)
+        if digest_length is None:
+            raise ValueError(f"Algoritmo não suportado em conjuntos de hashes: {algorithm}")
+    folder = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(folder, exist_ok=True)
+
+    def status(message):
+        if status_callback:
+            status_callback(message)
+
+    runs = []
+    data_path = None
+    try:
+        records = []
+        digest_size = None
+        for digest in iter_digests(input_paths, digest_length):
+            if digest_size is None and not algorithm and len(digest) * 2 not in DIGEST_ALGORITHMS:
+                ambiguous = [name for name, length in HASHSET_ALGORITHMS.items() if length == len(digest) * 2]
+                raise ValueError(
+                    f"Hashes de {len(digest) * 2} caracteres podem ser {' ou '.join(ambiguous)}; "
+                    "informe o algoritmo do conjunto (--algoritmo)."
+                )
+            digest_size = len(digest)
+            records.append(digest)
+            if len(records) >= RUN_RECORDS:
+                runs.append(write_run(records, folder))
+                records = []
+                status(f"{len(runs) * RUN_RECORDS} hashes lidos...")
+        if records:
+            runs.append(write_run(records, folder))
+        if digest_size is None:
+            raise ValueError("Nenhum hash encontrado nos arquivos informados.")
+        algorithm = algorithm or DIGEST_ALGORITHMS[digest_size * 2]
+
+        status("Intercalando e removendo duplicatas...")
+        count = 0
+        previous = None
+        data = tempfile.NamedTemporaryFile(dir=folder, prefix=".data_", delete=False)
+        data_path = data.name
+        with data:
+            for digest in heapq.merge(*(read_run(path, digest_size) for path in runs)):
+                if digest != previous:
+                    data.write(digest)
+                    count += 1
+                    previous = digest
+
+        status("Construindo o filtro de Bloom...")
+        bloom_bits = max(64, count * BLOOM_BITS_PER_ENTRY)
+        bloom_bits += -bloom_bits % 64
+        bloom = bytearray(bloom_bits // 8)
+        for digest in read_run(data_path, digest_size):
+            for position in bloom_positions(digest, bloom_bits):
+                bloom[position >> 3] |= 1 << (position & 7)
+
+        header = {
+            "name": name,
+            "kind": kind,
+            "algorithm": algorithm,
+            "digest_size": digest_size,
+            "count": count,
+            "bloom_bits": bloom_bits,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "sources": [os.path.basename(path) for path in input_paths],
+        }
+        header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        header_bytes += b" " * (-(len(MAGIC) + 8 + len(header_bytes)) % 8)
+        temp_output = output_path + ".tmp"
+        with open(temp_output, "wb") as out, open(data_path, "rb") as data:
+            out.write(MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes)
+            out.write(bloom)
+            while True:
+                block = data.read(8 * 1024 * 1024)
+                if not block:
+                    break
+                out.write(block)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(temp_output, output_path)
+        return header
+    finally:
+        for path in runs + ([data_path] if data_path else []):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+# -------------------- Consulta --------------------
+class HashSet:
+    # Índice mapeado em memória: só as páginas consultadas são lidas do disco,
+    # e a maioria das consultas termina no filtro de Bloom
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            self.mapped = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ValueError(f"Conjunto de hashes vazio ou inválido: {path}")
+        if self.mapped[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"Arquivo não é um conjunto de hashes do Hash PM: {path}")
+        header_start = len(MAGIC) + 8
+        # JSON válido com campos ausentes ou de tipo errado também é cabeçalho
+        # inválido, assim como um índice menor do que o cabeçalho declara
+        try:
+            header_length = struct.unpack_from("<Q", self.mapped, len(MAGIC))[0]
+            self.header = json.loads(self.mapped[header_start:header_start + header_length])
+            self.name = self.header["name"]
+            self.kind = self.header["kind"]
+            self.algorithm = self.header["algorithm"]
+            self.count = self.header["count"]
+            self.digest_size = self.header["digest_size"]
+            self.bloom_bits = self.header["bloom_bits"]
+            self.bloom_offset = header_start + header_length
+            self.data_offset = self.bloom_offset + self.bloom_bits // 8
+            if self.data_offset + self.count * self.digest_size > len(self.mapped) or self.bloom_bits <= 0:
+                raise ValueError
+        except (struct.error, ValueError, KeyError, TypeError):
+            self.close()
+            raise ValueError(f"Cabeçalho inválido no conjunto de hashes: {path}")
+
+    def __contains__(self, hex_digest):
+        digest = bytes.fromhex(hex_digest)
+        if len(digest) != self.digest_size:
+            return False
+        mapped = self.mapped
+        for position in bloom_positions(digest, self.bloom_bits):
+            if not mapped[self.bloom_offset + (position >> 3)] & (1 << (position & 7)):
+                return False
+        lo, hi = 0, self.count
+        size = self.digest_size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = self.data_offset + mid * size
+            record = mapped[start:start + size]
+            if record < digest:
+                lo = mid + 1
+            elif record > digest:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def close(self):
+        if getattr(self, "mapped", None):
+            self.mapped.close()
+        self.file.close()
+
+def find_hash_sets(folder=DEFAULT_HASHSET_DIR):
+    return sorted(glob.glob(os.path.join(folder, "*" + HASHSET_EXTENSION)))
+
+def match_hash_sets(hash_sets, hashes):
+    # Conjuntos cujo algoritmo não foi calculado para o arquivo são ignorados
+    return [
+        {"name": hash_set.name, "kind": hash_set.kind}
+        for hash_set in hash_sets
+        if hash_set.algorithm in hashes and hashes[hash_set.algorithm] in hash_set
+    ]
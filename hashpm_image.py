@@ -0,0 +1,361 @@
+import os
+import sys
+import stat
+import glob
+import time
+import errno
+from hashpm_core import (
+    DEFAULT_OPTIONS, DROP_INTERVAL, AcquisitionError, ByteProgress, choose_chunk_size, disable_direct, drop_cache,
+    get_aligned_buffer, hash_file, hexdigests, new_hashers, normalize_algorithms, open_for_hashing, read_chunks,
+    segment_digests, source_segments, unique_name, update_hashers
+)
+from hashpm_journal import CHECKPOINT_INTERVAL
+
+DEFAULT_SECTOR_SIZE = 512
+# ioctl do Linux que informa o tamanho do setor lógico de um dispositivo de bloco
+BLKSSZGET = 0x1268
+# Erros de leitura atribuídos à mídia (setor defeituoso). Os demais
+# (dispositivo removido, sem permissão) interrompem a aquisição.
+MEDIA_ERRORS = {errno.EIO, getattr(errno, "ENODATA", errno.EIO)}
+# Extensões mantidas no nome da imagem; as demais origens recebem ".dd"
+IMAGE_EXTENSIONS = {".dd", ".raw", ".img", ".bin", ".iso"}
+
+# -------------------- Dispositivos de Origem --------------------
+def source_size(f):
+    # Dispositivos de bloco informam tamanho 0 no stat; o fim é obtido por seek
+    size = f.seek(0, os.SEEK_END)
+    f.seek(0)
+    return size
+
+def sector_size(f):
+    # Setor lógico do dispositivo (Linux); em arquivos de imagem e nos demais
+    # sistemas, DEFAULT_SECTOR_SIZE
+    if sys.platform.startswith("linux") and stat.S_ISBLK(os.fstat(f.fileno()).st_mode):
+        import fcntl  # import local: só no Linux
+        import struct
+        try:
+            return struct.unpack("i", fcntl.ioctl(f.fileno(), BLKSSZGET, b"\0" * 4))[0] or DEFAULT_SECTOR_SIZE
+        except OSError:
+            pass
+    return DEFAULT_SECTOR_SIZE
+
+def image_name(source_path):
+    # "/dev/sdb" -> "sdb.dd", "\\.\PhysicalDrive1" -> "PhysicalDrive1.dd";
+    # arquivos de imagem mantêm o nome
+    name = os.path.basename(os.path.normpath(source_path).rstrip("\\/")) or "dispositivo"
+    if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+        return name
+    return name + ".dd"
+
+def list_block_devices():
+    # Discos e partições do Linux (inclusive loop), para a seleção na
+    # interface: [(caminho, tamanho, descrição)]. Nos demais sistemas, vazio.
+    devices = []
+    for folder in sorted(glob.glob("/sys/block/*")):
+        name = os.path.basename(folder)
+        entries = [(name, folder)] + [
+            (os.path.basename(part), part) for part in sorted(glob.glob(os.path.join(folder, name + "*")))
+            if os.path.exists(os.path.join(part, "partition"))
+        ]
+        try:
+            with open(os.path.join(folder, "device", "model"), encoding="utf-8", errors="replace") as f:
+                model = f.read().strip()
+        except OSError:
+            model = ""
+        for entry, path in entries:
+            try:
+                with open(os.path.join(path, "size")) as f:
+                    size = int(f.read()) * 512  # o sysfs conta setores de 512 bytes
+            except (OSError, ValueError):
+                continue
+            if size:
+                devices.append((f"/dev/{entry}", size, model if entry == name else f"partição de {name}"))
+    return devices
+
+# -------------------- Leitura Tolerante a Setores Defeituosos --------------------
+def add_bad_range(bad_ranges, offset, length):
+    # [[início, tamanho]] em bytes, com trechos contíguos unidos
+    if bad_ranges and bad_ranges[-1][0] + bad_ranges[-1][1] == offset:
+        bad_ranges[-1][1] += length
+    else:
+        bad_ranges.append([offset, length])
+
+def pread_into(f, view, offset):
+    # Leitura posicional direto no buffer (alinhado, no modo O_DIRECT), sem
+    # depender da posição do arquivo entre as releituras de setores
+    if hasattr(os, "preadv"):
+        return os.preadv(f.fileno(), [view], offset)
+    f.seek(offset)
+    return f.readinto(view)
+
+def read_exact(f, offset, view):
+    done = 0
+    while done < len(view):
+        try:
+            n = pread_into(f, view[done:], offset + done)
+        except OSError as e:
+            if e.errno != errno.EINVAL or not disable_direct(f):
+                raise
+            continue
+        if not n:
+            raise EOFError(f"a origem terminou em {offset + done} bytes, antes do tamanho esperado")
+        done += n
+
+def read_block(f, offset, view, sector, retries, bad_ranges):
+    # Um bloco ilegível é relido setor a setor, com até retries novas
+    # tentativas por setor; os setores que continuam ilegíveis são
+    # preenchidos com zeros e registrados em bad_ranges
+    try:
+        read_exact(f, offset, view)
+        return
+    except OSError as e:
+        if e.errno not in MEDIA_ERRORS:
+            raise
+    for start in range(0, len(view), sector):
+        part = view[start:start + sector]
+        for _ in range(retries + 1):
+            try:
+                read_exact(f, offset + start, part)
+                break
+            except OSError as e:
+                if e.errno not in MEDIA_ERRORS:
+                    raise
+        else:
+            part[:] = b"\0" * len(part)
+            add_bad_range(bad_ranges, offset + start, len(part))
+
+# -------------------- Imagem Bruta em Passagem Única --------------------
+# Um dispositivo de bloco (ou arquivo de imagem, inclusive esparso) é lido em
+# blocos grandes e gravado como imagem bruta em Arquivos/; os hashes são
+# calculados sobre os mesmos blocos, na mesma leitura. Setores ilegíveis não
+# interrompem a aquisição: ficam zerados na imagem e seus intervalos constam
+# do manifesto e da certidão. Os hashes descrevem, portanto, a imagem gravada.
+# Na retomada, o estado dos hashes é reconstruído relendo o início da imagem
+# já gravada (e não a origem, possivelmente danificada); os setores
+# ilegíveis desse trecho vêm do ponto de retomada do diário. Os hashes dos
+# segmentos são calculados na mesma leitura, como em acquire_file.
+def resume_image(dest_path, hashers, algorithms, size, checkpointer, progress_callback, segments=None):
+    # Devolve (deslocamento, setores ilegíveis até ele)
+    offset = checkpointer.resume_offset
+    details = checkpointer.resume_details or {}
+    if (not offset or details.get("size") != size or not os.path.exists(dest_path)
+            or os.path.getsize(dest_path) < offset):
+        return 0, []
+    remaining = offset
+    with open(dest_path, "rb", buffering=0) as f:
+        for chunk in read_chunks(f, choose_chunk_size(offset)):
+            chunk = chunk[:remaining]
+            update_hashers(hashers, chunk)
+            if segments:
+                segments.update(chunk)
+            remaining -= len(chunk)
+            if not remaining:
+                break
+    if remaining or hashers["SHA-256"].copy().hexdigest() != checkpointer.resume_prefix:
+        hashers.clear()
+        hashers.update(new_hashers(algorithms))
+        if segments:
+            segments.reset()
+        return 0, []
+    if progress_callback:
+        progress_callback(offset)
+    return offset, [list(bad_range) for bad_range in details.get("bad_ranges", [])]
+
+def image_device(source_path, dest_path, algorithms, block_size, retries, checkpointer=None, io_mode="cache",
+                 segment_size=0, progress_callback=None):
+    # Devolve (hashes, registro da imagem, hashes dos segmentos ou None)
+    hashers = new_hashers(algorithms)
+    src, read_mode = open_for_hashing(source_path, io_mode)
+    with src:
+        size = source_size(src)
+        segments = source_segments(size, segment_size)
+        try:
+            result = write_image(src, read_mode, dest_path, hashers, algorithms, size, block_size, retries,
+                                 checkpointer, progress_callback, segments)
+            digests = segment_digests(segments)
+        finally:
+            if segments:
+                segments.close()
+    return hexdigests(hashers), dict({"device": source_path}, **result), digests
+
+def write_image(src, read_mode, dest_path, hashers, algorithms, size, block_size, retries, checkpointer,
+                progress_callback, segments):
+    # Laço de leitura e gravação de image_device; devolve o registro da imagem
+    sector = sector_size(src)
+    block_size = max(sector, block_size - block_size % sector)
+    offset, bad_ranges = 0, []
+    if checkpointer:
+        offset, bad_ranges = resume_image(
+            dest_path, hashers, algorithms, size, checkpointer, progress_callback, segments
+        )
+    resumed_from = offset
+    view = get_aligned_buffer(block_size)
+    with open(dest_path, "r+b" if offset else "wb") as dst:
+        if offset:
+            dst.truncate(offset)
+            dst.seek(offset)
+        next_checkpoint = offset + CHECKPOINT_INTERVAL
+        dropped = offset
+        while offset < size:
+            chunk = view[:min(block_size, size - offset)]
+            read_block(src, offset, chunk, sector, retries, bad_ranges)
+            update_hashers(hashers, chunk)
+            if segments:
+                segments.update(chunk)
+            dst.write(chunk)
+            if read_mode != "cache":
+                drop_cache(src.fileno(), offset, len(chunk))
+            offset += len(chunk)
+            if progress_callback:
+                progress_callback(len(chunk))
+            if checkpointer and offset >= next_checkpoint:
+                dst.flush()
+                os.fsync(dst.fileno())
+                checkpointer.save(offset, hashers["SHA-256"].copy().hexdigest(),
+                                  {"size": size, "bad_ranges": bad_ranges})
+                next_checkpoint = offset + CHECKPOINT_INTERVAL
+            if read_mode != "cache" and offset - dropped >= DROP_INTERVAL:
+                dst.flush()
+                os.fsync(dst.fileno())
+                drop_cache(dst.fileno(), dropped, offset - dropped)
+                dropped = offset
+        dst.flush()
+        os.fsync(dst.fileno())
+        if read_mode != "cache":
+            drop_cache(dst.fileno())
+    return {
+        "size": size,
+        "sector_size": sector,
+        "block_size": block_size,
+        "retries": retries,
+        "bad_ranges": bad_ranges,
+        "bad_bytes": sum(length for _, length in bad_ranges),
+        "resumed_from": resumed_from,
+    }
+
+def completed_image(journal, relative, source_path, size, dest_path, algorithms, verify):
+    # Imagem concluída na execução interrompida: (hashes, hashes da cópia,
+    # registro, segmentos registrados ou None) ou None
+    record = journal.completed.get(relative)
+    if (record is None or not record.get("image") or record["source"] != source_path or record["size"] != size
+            or not all(name in record["hashes"] for name in algorithms) or (verify and not record["copy_hashes"])):
+        return None
+    try:
+        if os.path.getsize(dest_path) != size:
+            return None
+    except OSError:
+        return None
+    copy_hashes = {name: record["copy_hashes"][name] for name in algorithms} if verify else None
+    return {name: record["hashes"][name] for name in algorithms}, copy_hashes, record["image"], record.get("piecewise")
+
+def image_devices_to_evidence(source_paths, destination_folder, options=None, progress_callback=None,
+                              journal=None, manifest=None, profiler=None, status_callback=None):
+    # Uma imagem por origem, na ordem da lista; com verificação, a imagem
+    # gravada é relida e conferida. Com segment_size, imagens maiores que um
+    # segmento recebem também os hashes dos segmentos e a raiz de Merkle,
+    # calculados na leitura do dispositivo (ou, numa imagem concluída segundo
+    # um diário sem segmentos, relendo a imagem).
+    # options: as chaves de DEFAULT_OPTIONS usadas na imagem (verify,
+    # algorithms, image_block_size, image_retries, io_mode, segment_size e
+    # workers). Devolve (caminhos, hashes, file_info), como transfer_files.
+    from hashpm_piecewise import segmented, hash_segments, piecewise_record  # import local: depende de hashpm_core
+
+    options = dict(DEFAULT_OPTIONS, **(options or {}))
+    verify = options["verify"]
+    algorithms = normalize_algorithms(options["algorithms"])
+    block_size = options["image_block_size"]
+    retries = options["image_retries"]
+    io_mode = options["io_mode"]
+    segment_size = options["segment_size"]
+    workers = options["workers"]
+    sources = []  # (origem, caminho relativo, tamanho)
+    used_names = set()
+    for source_path in source_paths:
+        if os.path.isdir(source_path):
+            raise AcquisitionError(f"Pastas não podem ser adquiridas como imagem de dispositivo:\n{source_path}")
+        try:
+            with open(source_path, "rb", buffering=0) as f:
+                size = source_size(f)
+        except PermissionError as e:
+            raise AcquisitionError(
+                f"Sem permissão para ler {source_path}.\n"
+                "A leitura de dispositivos exige privilégios de administrador."
+            ) from e
+        except OSError as e:
+            raise AcquisitionError(f"Falha ao acessar {source_path}:\n{e.strerror}") from e
+        sources.append((source_path, unique_name(image_name(source_path), used_names), size))
+
+    passes = 1 + verify
+    progress = ByteProgress(0, progress_callback)
+    progress.add_total(sum(size * passes for _, _, size in sources), files=len(sources))
+    dest_paths = []
+    hashes = {}
+    file_info = {}
+    for i, (source_path, relative, size) in enumerate(sources):
+        dest_path = os.path.join(destination_folder, relative)
+        result = None
+        if journal:
+            result = completed_image(journal, relative, source_path, size, dest_path, algorithms, verify)
+        add = progress.file_callback(i, relative, size * passes)
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            piecewise = None
+            if result:
+                source_hashes, copy_hashes, image, piecewise = result
+                add(size * passes)
+                if piecewise and piecewise["segment_size"] != segment_size:
+                    piecewise = None
+            else:
+                checkpointer = journal.checkpointer(relative, source_path) if journal else None
+                source_hashes, image, digests = image_device(source_path, dest_path, algorithms, block_size, retries,
+                                                             checkpointer, io_mode, segment_size, add)
+                if digests:
+                    piecewise = piecewise_record(digests, segment_size)
+                copy_hashes = None
+                if verify:
+                    copy_hashes = hash_file(dest_path, algorithms, io_mode=io_mode, progress_callback=add)
+                    if copy_hashes != source_hashes:
+                        raise AcquisitionError(
+                            f"A imagem {relative} não confere com a leitura da origem!\n"
+                            f"Origem: {source_hashes['SHA-256']}\nImagem: {copy_hashes['SHA-256']}"
+                        )
+                if journal:
+                    journal.file_done(relative, source_path, None, source_hashes, copy_hashes, dest_path, piecewise,
+                                      image)
+            if segmented(size, segment_size) and not piecewise:
+                progress.add_total(size)
+                digests = hash_segments([(i, dest_path, size)], segment_size, workers, False, progress)
+                piecewise = piecewise_record(digests[i], segment_size)
+        except EOFError as e:
+            raise AcquisitionError(f"Falha ao ler {source_path}:\n{e}") from e
+        except OSError as e:
+            raise AcquisitionError(f"Falha ao ler {source_path}:\n{e.strerror or e}") from e
+        finally:
+            progress.file_finished(i)
+        progress.add(0, files=1)
+        if profiler:
+            profiler.file_done(relative, size, time.perf_counter() - started, time.thread_time() - cpu_started,
+                               "diario" if result else "imagem")
+        if image["bad_ranges"] and status_callback:
+            status_callback(
+                f"{relative}: {image['bad_bytes'] // image['sector_size']} setor(es) ilegível(is) "
+                f"em {len(image['bad_ranges'])} intervalo(s), preenchido(s) com zeros."
+            )
+        if manifest:
+            manifest.write(i + 1, relative, source_path, os.stat(source_path), source_hashes, copy_hashes,
+                           "calculado", piecewise, image=image)
+        dest_paths.append(dest_path)
+        hashes[dest_path] = source_hashes
+        file_info[dest_path] = {
+            "source": source_path,
+            "relative_path": relative,
+            "size": size,
+            "copy_hashes": copy_hashes,
+            "hash_origin": "calculado",
+            "piecewise": piecewise,
+            "object": None,
+            "archive": None,
+            "image": image,
+        }
+    return dest_paths, hashes, file_info
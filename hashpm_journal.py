@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import threading
+
+JOURNAL_NAME = ".hashpm_journal.jsonl"
+# Intervalo entre pontos de retomada dentro de um mesmo arquivo
+CHECKPOINT_INTERVAL = 256 * 1024 * 1024
+
+# -------------------- Diário da Aquisição --------------------
+# Registro somente-anexação, gravado na pasta da portaria. Cada linha é um
+# objeto JSON e é sincronizada em disco (fsync) antes de a aquisição seguir,
+# de modo que, após uma queda, o diário descreve exatamente o que já está
+# gravado. Uma linha final truncada pela queda é ignorada na leitura.
+#
+#   {"type": "inicio", ...}        início de uma execução
+#   {"type": "concluido", ...}     arquivo copiado e com hashes calculados
+#   {"type": "checkpoint", ...}    bytes já gravados de um arquivo grande e o
+#                                  SHA-256 desse prefixo da origem
+#   {"type": "fim"}                certidão gerada; nada a retomar
+class AcquisitionJournal:
+    def __init__(self, base_folder, resume=True):
+        # resume=False descarta o estado pendente: tudo é copiado novamente
+        self.path = os.path.join(base_folder, JOURNAL_NAME)
+        self.lock = threading.Lock()
+        self.completed = {}
+        self.checkpoints = {}
+        if resume:
+            self._load()
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def _load(self):
+        # Reconstrói o estado pendente a partir da última execução não finalizada
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record["type"] == "fim":
+                    self.completed.clear()
+                    self.checkpoints.clear()
+                elif record["type"] == "concluido":
+                    self.completed[record["relative"]] = record
+                    self.checkpoints.pop(record["relative"], None)
+                elif record["type"] == "checkpoint":
+                    self.checkpoints[record["relative"]] = record
+
+    def write(self, record):
+        line = json.dumps(dict(record, time=time.time()), ensure_ascii=False)
+        with self.lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def start(self, options):
+        self.write({"type": "inicio", "options": options})
+
+    def file_done(self, relative, source_path, source_stat, hashes, copy_hashes, dest_path=None, piecewise=None,
+                  image=None):
+        # piecewise: segmentos da origem, que a retomada não teria como refazer sem reler a origem.
+        # image: registro da imagem de um dispositivo; o tamanho vem dele e não do
+        # stat (zero em dispositivos de bloco), que pode ser None
+        self.write({
+            "type": "concluido",
+            "relative": relative,
+            "source": source_path,
+            "dest": dest_path,
+            "size": image["size"] if image else source_stat.st_size,
+            "mtime_ns": None if image else source_stat.st_mtime_ns,
+            "hashes": hashes,
+            "copy_hashes": copy_hashes,
+            "piecewise": piecewise,
+            "image": image,
+        })
+
+    def completed_result(self, relative, source_path, source_stat, dest_path, algorithms, verify):
+        # Reaproveita um arquivo concluído na execução interrompida se a origem
+        # não mudou, a cópia está completa e os hashes pedidos foram calculados.
+        # Sem dest_path, confere a cópia registrada no diário (o objeto, na
+        # organização por conteúdo). Devolve (hashes, hashes da cópia,
+        # segmentos registrados ou None).
+        record = self.completed.get(relative)
+        if (record is None or record["source"] != source_path
+                or record["size"] != source_stat.st_size or record["mtime_ns"] != source_stat.st_mtime_ns):
+            return None
+        if not all(name in record["hashes"] for name in algorithms):
+            return None
+        if verify and not record["copy_hashes"]:
+            return None
+        dest_path = dest_path or record.get("dest")
+        if not dest_path:
+            return None
+        try:
+            if os.path.getsize(dest_path) != source_stat.st_size:
+                return None
+        except OSError:
+            return None
+        hashes = {name: record["hashes"][name] for name in algorithms}
+        copy_hashes = {name: record["copy_hashes"][name] for name in algorithms} if verify else None
+        return hashes, copy_hashes, record.get("piecewise")
+
+    def checkpointer(self, relative, source_path):
+        record = self.checkpoints.get(relative)
+        if record and record["source"] != source_path:
+            record = None
+        return FileCheckpointer(self, relative, source_path, record)
+
+    def finish(self):
+        self.write({"type": "fim"})
+
+    def close(self):
+        with self.lock:
+            self.file.close()
+
+class FileCheckpointer:
+    # Ponte entre o laço de cópia de um arquivo e o diário: informa de onde
+    # retomar e registra novos pontos de retomada
+    def __init__(self, journal, relative, source_path, record=None):
+        self.journal = journal
+        self.relative = relative
+        self.source_path = source_path
+        self.resume_offset = record["offset"] if record else 0
+        self.resume_prefix = record["prefix_sha256"] if record else None
+        self.resume_details = record.get("details") if record else None
+
+    def save(self, offset, prefix_sha256, details=None):
+        # details: estado adicional da retomada (ex.: setores ilegíveis de uma imagem)
+        record = {
+            "type": "checkpoint",
+            "relative": self.relative,
+            "source": self.source_path,
+            "offset": offset,
+            "prefix_sha256": prefix_sha256,
+        }
+        if details is not None:
+            record["details"] = details
+        self.journal.write(record)
@@ -0,0 +1,120 @@
+import os
+import csv
+import json
+import time
+from datetime import datetime, timezone
+from hashpm_hashset import match_hash_sets
+
+# Sincronização periódica: o que já foi gravado sobrevive a uma queda sem
+# pagar um fsync por arquivo
+MANIFEST_SYNC_RECORDS = 500
+MANIFEST_SYNC_SECONDS = 2.0
+
+def iso_time(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+# -------------------- Manifesto da Aquisição --------------------
+# Um registro por arquivo, gravado assim que o hash do arquivo é concluído
+# (na ordem de conclusão; "number" é a posição do arquivo na certidão), em
+# JSON Lines e, opcionalmente, em CSV com uma coluna por algoritmo. Com
+# hash_sets, cada registro traz os conjuntos de hashes em que o arquivo consta.
+# Os itens de um arquivo ZIP/TAR ficam no registro do pacote ("archive") e,
+# no CSV, em uma linha cada, com o caminho "<pacote>!/<item>". Imagens de
+# dispositivo trazem em "image" o dispositivo e os setores ilegíveis.
+class ManifestWriter:
+    def __init__(self, jsonl_path, algorithms, csv_path=None, hash_sets=()):
+        self.jsonl_path = jsonl_path
+        self.csv_path = csv_path
+        self.algorithms = list(algorithms)
+        self.hash_sets = list(hash_sets)
+        self.jsonl_file = open(jsonl_path, "w", encoding="utf-8")
+        self.csv_file = None
+        if csv_path:
+            self.csv_file = open(csv_path, "w", encoding="utf-8", newline="")
+            self.csv_writer = csv.writer(self.csv_file)
+            self.csv_writer.writerow(
+                ["number", "relative_path", "source", "size", "mtime", "acquired_at", "hash_origin", "verified"]
+                + self.algorithms
+                + [f"{name} (copy)" for name in self.algorithms]
+                + ["merkle_root", "segment_size", "hash_set_matches", "object"]
+            )
+        self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def write(self, number, relative, source_path, source_stat, hashes, copy_hashes, hash_origin, piecewise=None,
+              stored_object=None, archive=None, image=None):
+        # stored_object: objeto em Arquivos/ na organização por conteúdo
+        # archive: {"format", "members", "error"} de hashpm_archive.hash_archives
+        # image: registro de hashpm_image.image_device (o stat de um
+        # dispositivo de bloco não informa o tamanho)
+        record = {
+            "number": number,
+            "relative_path": relative.replace(os.sep, "/"),
+            "source": source_path,
+            "size": image["size"] if image else source_stat.st_size,
+            "mtime": iso_time(source_stat.st_mtime),
+            "mtime_ns": source_stat.st_mtime_ns,
+            "acquired_at": iso_time(time.time()),
+            "hash_origin": hash_origin,
+            "verified": bool(copy_hashes),
+            "hashes": hashes,
+            "copy_hashes": copy_hashes,
+            "hash_set_matches": match_hash_sets(self.hash_sets, hashes),
+        }
+        if piecewise:
+            record["piecewise"] = piecewise
+        if stored_object:
+            record["object"] = stored_object
+        if archive:
+            record["archive"] = dict(archive, members=[
+                dict(member, hash_set_matches=match_hash_sets(self.hash_sets, member["hashes"]))
+                if member.get("hashes") else member
+                for member in archive["members"]
+            ])
+        if image:
+            record["image"] = image
+        self.jsonl_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        if self.csv_file:
+            self.csv_writer.writerow(
+                [number, record["relative_path"], source_path, record["size"], record["mtime"],
+                 record["acquired_at"], hash_origin, "true" if copy_hashes else "false"]
+                + [hashes[name] for name in self.algorithms]
+                + [copy_hashes[name] if copy_hashes else "" for name in self.algorithms]
+                + ([piecewise["merkle_root"], piecewise["segment_size"]] if piecewise else ["", ""])
+                + ["; ".join(f"{match['name']} ({match['kind']})" for match in record["hash_set_matches"])]
+                + [stored_object or ""]
+            )
+            for k, member in enumerate(record.get("archive", {}).get("members", []), 1):
+                member_hashes = member.get("hashes") or {}
+                self.csv_writer.writerow(
+                    [f"{number}.{k}", f"{record['relative_path']}!/{member['name']}", source_path, member["size"],
+                     member["mtime"], record["acquired_at"],
+                     "item" if member.get("hashes") else f"item ilegível ({member.get('error')})", ""]
+                    + [member_hashes.get(name, "") for name in self.algorithms]
+                    + ["" for name in self.algorithms]
+                    + ["", ""]
+                    + ["; ".join(f"{match['name']} ({match['kind']})"
+                                 for match in member.get("hash_set_matches") or [])]
+                    + [""]
+                )
+        self.pending += 1
+        if self.pending >= MANIFEST_SYNC_RECORDS or time.monotonic() - self.last_sync >= MANIFEST_SYNC_SECONDS:
+            self.sync()
+
+    def sync(self):
+        for f in (self.jsonl_file, self.csv_file):
+            if f:
+                f.flush()
+                os.fsync(f.fileno())
+        self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def paths(self):
+        return [path for path in (self.jsonl_path, self.csv_path) if path]
+
+    def close(self):
+        if not self.jsonl_file.closed:
+            self.sync()
+        for f in (self.jsonl_file, self.csv_file):
+            if f:
+                f.close()
@@ -0,0 +1,504 @@
+import os
+import sys
+import json
+import lzma
+import zlib
+import struct
+import hashlib
+from collections import deque
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from hashpm_core import DEFAULT_WORKERS, OBJECTS_FOLDER, PARTIAL_FOLDER, AcquisitionError, ByteProgress, iter_directory
+from hashpm_verify import evidence_base_folder, find_manifests, load_manifests
+
+PACKAGE_EXTENSION = ".hpmpkg"
+PACKAGE_MAGIC = b"HPMPKG\x00\x01"
+PACKAGE_FOLDERS = ("Arquivos", "Certidões")
+PACKAGE_COMPRESSIONS = {
+    "zlib (rápida)": "zlib",
+    "lzma (menor, mais lenta)": "lzma",
+}
+# Blocos comprimidos de forma independente: cada um pode ser comprimido e
+# descomprimido por um worker diferente, e um bloco danificado não impede a
+# leitura dos seguintes
+PACKAGE_CHUNK_SIZE = 4 * 1024 * 1024
+# Blocos em andamento por worker; limita a memória a workers * 4 * 4 MB
+CHUNKS_PER_WORKER = 4
+ZLIB_LEVEL = 6
+LZMA_PRESET = 6
+# Limites aplicados na leitura aos tamanhos declarados no pacote, que não é
+# autenticado: um bit trocado não pode levar a alocar gigabytes antes que o
+# fecho seja conferido. Um registro JSON maior só ocorre no manifesto
+# embutido de aquisições com milhões de arquivos.
+MAX_PACKAGE_CHUNK_SIZE = 64 * 1024 * 1024
+MAX_RECORD_SIZE = 512 * 1024 * 1024
+
+# Formato do pacote: PACKAGE_MAGIC seguido de registros (tipo de 1 byte):
+#   H cabeçalho, M manifesto embutido, F início de arquivo, E fim de arquivo
+#     (JSON, precedido do tamanho em 4 bytes)
+#   C bloco comprimido, R bloco sem compressão (quando comprimir não reduz):
+#     tamanho original e tamanho gravado (4 bytes cada), seguidos dos dados
+#   Z fecho: SHA-256 de todos os bytes anteriores a este registro
+# O manifesto embutido vem antes dos arquivos, com os hashes originais da
+# aquisição, para que a extração em fluxo confira cada arquivo ao terminá-lo.
+# O fecho não tem chave: acusa truncamento e corrupção acidental, mas quem
+# adultera o pacote pode recalculá-lo. A prova contra adulteração é o SHA-256
+# do pacote inteiro, registrado fora dele (certidão de empacotamento e arquivo
+# .sha256) e conferido na leitura com expected_sha256.
+RECORD_HEADER = struct.Struct(">I")
+CHUNK_HEADER = struct.Struct(">II")
+# Campos obrigatórios (e seus tipos) de cada registro JSON
+RECORD_FIELDS = {
+    b"H": {"compression": str, "chunk_size": int, "source": str},
+    b"M": {"manifests": list, "files": list},
+    b"F": {"path": str},
+    b"E": {"size": int, "sha256": str},
+}
+
+# -------------------- Compressão em Blocos --------------------
+def compress_chunk(data, compression):
+    # zlib e lzma liberam o GIL: os blocos são comprimidos em paralelo por threads
+    packed = lzma.compress(data, preset=LZMA_PRESET) if compression == "lzma" else zlib.compress(data, ZLIB_LEVEL)
+    return packed if len(packed) < len(data) else None
+
+def decompress_chunk(kind, data, compression, raw_size):
+    # No máximo raw_size + 1 bytes: um bloco que descomprime além do tamanho
+    # declarado é detectado sem ser expandido por inteiro
+    if kind == b"R":
+        return data
+    if compression == "lzma":
+        return lzma.LZMADecompressor().decompress(data, max_length=raw_size + 1)
+    return zlib.decompressobj().decompress(data, raw_size + 1)
+
+class DigestWriter:
+    # Grava os registros e acumula o SHA-256 de tudo o que foi gravado
+    def __init__(self, f):
+        self.f = f
+        self.hasher = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.f.write(data)
+        self.hasher.update(data)
+        self.size += len(data)
+
+    def record(self, kind, value):
+        payload = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        if len(payload) > MAX_RECORD_SIZE:
+            raise AcquisitionError("Manifesto embutido grande demais para o formato do pacote.")
+        self.write(kind + RECORD_HEADER.pack(len(payload)))
+        self.write(payload)
+
+    def chunk(self, data, packed):
+        if packed is None:
+            self.write(b"R" + CHUNK_HEADER.pack(len(data), len(data)))
+            self.write(data)
+        else:
+            self.write(b"C" + CHUNK_HEADER.pack(len(data), len(packed)))
+            self.write(packed)
+
+    def trailer(self):
+        digest = self.hasher.digest()
+        self.write(b"Z" + RECORD_HEADER.pack(len(digest)))
+        self.write(digest)
+
+# -------------------- Criação do Pacote --------------------
+def package_entries(base_folder):
+    # (caminho, nome no pacote, tamanho) de Arquivos/ e Certidões/; a área
+    # de cópias parciais da organização por conteúdo fica de fora
+    partial_prefix = f"{OBJECTS_FOLDER}/{PARTIAL_FOLDER}/"
+    entries = []
+    for folder in PACKAGE_FOLDERS:
+        path = os.path.join(base_folder, folder)
+        if not os.path.isdir(path):
+            continue
+        for file_path, relative, size in iter_directory(path):
+            relative = relative.replace(os.sep, "/")
+            if folder == "Arquivos" and relative.startswith(partial_prefix):
+                continue
+            entries.append((file_path, f"{folder}/{relative}", size))
+    return entries
+
+def original_digests(base_folder):
+    # {nome no pacote: hashes da aquisição} a partir dos manifestos; na
+    # organização por conteúdo os hashes são atribuídos ao objeto
+    digests = {}
+    for relative, record in load_manifests(find_manifests(base_folder)).items():
+        location = record.get("object") or relative
+        digests[f"Arquivos/{location.replace(os.sep, '/')}"] = record["hashes"]
+    return digests
+
+def create_package(folder, package_path, compression="zlib", workers=DEFAULT_WORKERS, progress_callback=None):
+    # Reúne Arquivos/ e Certidões/ num único pacote. A leitura é
+    # sequencial (uma mídia de destino lenta não ganha com leituras
+    # concorrentes); a compressão de cada bloco vai para o pool e a gravação
+    # segue a ordem de leitura. Durante a leitura cada arquivo é conferido
+    # com o hash SHA-256 da aquisição, quando registrado no manifesto.
+    if compression not in PACKAGE_COMPRESSIONS.values():
+        raise ValueError(f"Compressão inválida: {compression}")
+    base_folder = evidence_base_folder(folder)
+    if not os.path.isdir(os.path.join(base_folder, "Arquivos")):
+        raise AcquisitionError(f"Pasta de evidências não encontrada: {os.path.join(base_folder, 'Arquivos')}")
+    workers = max(1, workers or 1)
+    entries = package_entries(base_folder)
+    digests = original_digests(base_folder)
+    started_at = datetime.now()
+    info = {
+        "base_folder": base_folder,
+        "package_path": package_path,
+        "compression": compression,
+        "started_at": started_at,
+        "files": len(entries),
+        "bytes": sum(size for _, _, size in entries),
+        "checked": 0,
+        "diverging": [],
+    }
+    progress = ByteProgress(info["bytes"], progress_callback)
+    partial = package_path + ".parcial"
+    pending = deque()
+
+    def write_next():
+        # Grava o item mais antigo da fila; devolve 1 se era um bloco
+        kind, value, data = pending.popleft()
+        if kind != b"C":
+            writer.record(kind, value)
+            return 0
+        writer.chunk(data, value.result())
+        progress.add(len(data))
+        return 1
+
+    with open(partial, "wb") as f, ThreadPoolExecutor(max_workers=workers) as pool:
+        writer = DigestWriter(f)
+        writer.write(PACKAGE_MAGIC)
+        writer.record(b"H", {
+            "format": 1,
+            "compression": compression,
+            "chunk_size": PACKAGE_CHUNK_SIZE,
+            "created_at": started_at.isoformat(timespec="seconds"),
+            "source": os.path.basename(base_folder),
+        })
+        writer.record(b"M", {
+            "manifests": [os.path.basename(path) for path in find_manifests(base_folder)],
+            "files": [{"path": name, "size": size, "hashes": digests.get(name)} for _, name, size in entries],
+        })
+        in_flight = 0
+        for file_path, name, _ in entries:
+            hasher = hashlib.sha256()
+            size = 0
+            with open(file_path, "rb") as src:
+                pending.append((b"F", {"path": name, "mtime_ns": os.fstat(src.fileno()).st_mtime_ns}, None))
+                while True:
+                    data = src.read(PACKAGE_CHUNK_SIZE)
+                    if not data:
+                        break
+                    hasher.update(data)
+                    size += len(data)
+                    pending.append((b"C", pool.submit(compress_chunk, data, compression), data))
+                    in_flight += 1
+                    while in_flight > workers * CHUNKS_PER_WORKER:
+                        in_flight -= write_next()
+            sha256 = hasher.hexdigest()
+            pending.append((b"E", {"size": size, "sha256": sha256}, None))
+            expected = (digests.get(name) or {}).get("SHA-256")
+            if expected:
+                info["checked"] += 1
+                if expected != sha256:
+                    info["diverging"].append(name)
+        while pending:
+            write_next()
+        writer.trailer()
+        info["package_size"] = writer.size
+        info["sha256"] = writer.hasher.hexdigest()
+    os.replace(partial, package_path)
+    info["finished_at"] = datetime.now()
+    return info
+
+# -------------------- Leitura e Extração --------------------
+class DigestReader:
+    # size: tamanho do pacote, quando conhecido (não na entrada padrão)
+    def __init__(self, f, size=None):
+        self.f = f
+        self.hasher = hashlib.sha256()
+        self.remaining = size
+
+    def read(self, n):
+        # Exatamente n bytes; menos que isso é um pacote truncado ou um
+        # tamanho corrompido, recusado antes de ler quando excede o restante
+        if self.remaining is not None:
+            if n > self.remaining:
+                raise EOFError
+            self.remaining -= n
+        data = self.f.read(n)
+        while len(data) < n:
+            more = self.f.read(n - len(data))
+            if not more:
+                raise EOFError
+            data += more
+        self.hasher.update(data)
+        return data
+
+def parse_record(kind, payload):
+    # Registro JSON lido do pacote, que não é autenticado: conteúdo ilegível
+    # ou campos ausentes viram AcquisitionError, e não exceções soltas
+    try:
+        value = json.loads(payload.decode("utf-8"))
+    except ValueError:
+        value = None
+    valid = isinstance(value, dict) and all(
+        isinstance(value.get(field), expected) for field, expected in RECORD_FIELDS[kind].items()
+    )
+    if valid and kind == b"H":
+        valid = value["compression"] in PACKAGE_COMPRESSIONS.values()
+    elif valid and kind == b"M":
+        valid = all(
+            isinstance(entry, dict) and isinstance(entry.get("path"), str)
+            and isinstance(entry.get("hashes"), (dict, type(None)))
+            for entry in value["files"]
+        )
+    elif valid and kind == b"F":
+        valid = isinstance(value.get("mtime_ns"), (int, type(None)))
+    if not valid:
+        raise AcquisitionError(f"Pacote malformado: registro {kind.decode()} corrompido.")
+    return value
+
+def safe_member_path(output_folder, name):
+    # Recusa caminhos absolutos e com "..": um pacote adulterado não pode
+    # gravar fora da pasta de destino
+    parts = name.split("/")
+    if not name or "\\" in name or any(part in ("", ".", "..") or ":" in part for part in parts):
+        raise AcquisitionError(f"Caminho inválido no pacote: {name!r}")
+    return os.path.join(output_folder, *parts)
+
+def read_package(source, output_folder=None, workers=DEFAULT_WORKERS, progress_callback=None, expected_sha256=None):
+    # Lê o pacote em fluxo (arquivo ou "-" para a entrada padrão), conferindo
+    # cada arquivo ao terminá-lo com o SHA-256 do próprio pacote e com o hash
+    # original da aquisição, e o fecho ao final. Com output_folder os arquivos
+    # são extraídos para output_folder/<pasta de evidências>/; sem ele o
+    # pacote é apenas conferido. Um arquivo divergente é mantido com o sufixo
+    # ".divergente"; um bloco danificado não interrompe a leitura dos demais.
+    # expected_sha256: hash do pacote inteiro registrado fora dele (ver
+    # read_sidecar), a única conferência que acusa um pacote adulterado e
+    # refeito com fecho e hashes internos recalculados.
+    workers = max(1, workers or 1)
+    stream = sys.stdin.buffer if source == "-" else open(source, "rb")
+    report = {
+        "package": "-" if source == "-" else os.path.abspath(source),
+        "output_folder": None,
+        "started_at": datetime.now(),
+        "header": None,
+        "manifests": [],
+        "expected": 0,
+        "files": 0,
+        "bytes": 0,
+        "ok": [],
+        "errors": [],
+        "complete": False,
+        "trailer_ok": False,
+        "expected_sha256": expected_sha256.lower() if expected_sha256 else None,
+    }
+    total = None
+    if source != "-":
+        total = os.fstat(stream.fileno()).st_size
+    progress = ByteProgress(total or 0, progress_callback)
+    reader = DigestReader(stream, total)
+    expected = {}
+    current = None
+    pending = deque()
+
+    def open_member(value):
+        name = value["path"]
+        member = {"name": name, "hasher": hashlib.sha256(), "size": 0, "error": None, "file": None,
+                  "mtime_ns": value.get("mtime_ns")}
+        if output_folder is not None:
+            path = safe_member_path(report["output_folder"], name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            member["path"] = path
+            member["file"] = open(path + ".parcial", "wb")
+        return member
+
+    def close_member(member, value):
+        digest = member["hasher"].hexdigest()
+        original = (expected.get(member["name"]) or {}).get("SHA-256")
+        error = member["error"]
+        if error is None and (member["size"] != value["size"] or digest != value["sha256"]):
+            error = "conteúdo difere do registrado no pacote"
+        elif error is None and original and digest != original:
+            error = "SHA-256 difere do manifesto de aquisição"
+        report["files"] += 1
+        if error:
+            report["errors"].append((member["name"], error))
+        else:
+            report["ok"].append(member["name"])
+        if member["file"]:
+            member["file"].close()
+            final = member["path"] if error is None else member["path"] + ".divergente"
+            os.replace(member["path"] + ".parcial", final)
+            if member["mtime_ns"] is not None:
+                os.utime(final, ns=(member["mtime_ns"], member["mtime_ns"]))
+
+    def apply_next():
+        # Aplica o item mais antigo da fila na ordem do pacote; devolve 1 se era um bloco
+        nonlocal current
+        kind, value, raw_size = pending.popleft()
+        if kind == b"F":
+            current = open_member(value)
+            return 0
+        if kind == b"E":
+            close_member(current, value)
+            current = None
+            return 0
+        try:
+            data = value.result()
+            if len(data) != raw_size:
+                raise ValueError("tamanho do bloco")
+        except (zlib.error, lzma.LZMAError, ValueError):
+            current["error"] = current["error"] or "bloco danificado no pacote"
+            data = b"\0" * raw_size
+        current["hasher"].update(data)
+        current["size"] += len(data)
+        if current["file"]:
+            current["file"].write(data)
+        report["bytes"] += len(data)
+        return 1
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            try:
+                if reader.read(len(PACKAGE_MAGIC)) != PACKAGE_MAGIC:
+                    raise AcquisitionError("O arquivo não é um pacote do Hash PM.")
+                in_flight = 0
+                inside_file = False
+                chunk_limit = 0
+                while True:
+                    before = reader.hasher.copy()
+                    kind = stream.read(1)
+                    if not kind:
+                        break
+                    reader.hasher.update(kind)
+                    if reader.remaining is not None:
+                        reader.remaining -= 1
+                    if kind not in b"HMFECRZ":
+                        raise AcquisitionError(f"Pacote malformado: registro desconhecido {kind!r}.")
+                    if kind != b"H" and report["header"] is None:
+                        raise AcquisitionError("Pacote malformado: cabeçalho ausente.")
+                    if kind in (b"C", b"R"):
+                        if not inside_file:
+                            raise AcquisitionError("Pacote malformado: bloco fora de um arquivo.")
+                        raw_size, stored_size = CHUNK_HEADER.unpack(reader.read(CHUNK_HEADER.size))
+                        # O gravador nunca guarda um bloco maior que o original
+                        if raw_size > chunk_limit or stored_size > raw_size or (kind == b"R") != (
+                                stored_size == raw_size):
+                            raise AcquisitionError(
+                                f"Pacote malformado: bloco corrompido ({raw_size} bytes declarados, "
+                                f"{stored_size} gravados)."
+                            )
+                        data = reader.read(stored_size)
+                        future = pool.submit(
+                            decompress_chunk, kind, data, report["header"]["compression"], raw_size
+                        )
+                        pending.append((b"C", future, raw_size))
+                        progress.add(CHUNK_HEADER.size + 1 + stored_size)
+                        in_flight += 1
+                        while in_flight > workers * CHUNKS_PER_WORKER:
+                            in_flight -= apply_next()
+                        continue
+                    (length,) = RECORD_HEADER.unpack(reader.read(RECORD_HEADER.size))
+                    if length > (32 if kind == b"Z" else MAX_RECORD_SIZE):
+                        raise AcquisitionError(f"Pacote malformado: registro {kind.decode()} corrompido "
+                                               f"({length} bytes declarados).")
+                    payload = reader.read(length)
+                    if kind == b"Z":
+                        report["complete"] = True
+                        report["trailer_ok"] = payload == before.digest()
+                        if stream.read(1):
+                            report["errors"].append(("(pacote)", "dados após o fecho"))
+                        break
+                    value = parse_record(kind, payload)
+                    if kind == b"H":
+                        if not 0 < value["chunk_size"] <= MAX_PACKAGE_CHUNK_SIZE:
+                            raise AcquisitionError("Pacote malformado: registro H corrompido (tamanho de bloco).")
+                        report["header"] = value
+                        chunk_limit = value["chunk_size"]
+                        if output_folder is not None:
+                            report["output_folder"] = safe_member_path(output_folder, value["source"])
+                    elif kind == b"M":
+                        report["manifests"] = value["manifests"]
+                        report["expected"] = len(value["files"])
+                        expected = {entry["path"]: entry["hashes"] for entry in value["files"]}
+                    else:
+                        if inside_file == (kind == b"F"):
+                            raise AcquisitionError("Pacote malformado: início e fim de arquivo fora de ordem.")
+                        inside_file = kind == b"F"
+                        pending.append((kind, value, None))
+            except EOFError:
+                # Fim do pacote no meio de um registro, ou tamanho declarado
+                # além do que resta: truncamento ou corrupção
+                report["errors"].append(("(pacote)", "registro incompleto: pacote truncado ou tamanho corrompido"))
+            finally:
+                try:
+                    while pending:
+                        apply_next()
+                finally:
+                    if current is not None:
+                        # Arquivo interrompido pelo fim do pacote: o que foi lido fica como ".parcial"
+                        if current["file"]:
+                            current["file"].close()
+                        report["errors"].append((current["name"], "pacote truncado"))
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+    report["sha256"] = reader.hasher.hexdigest()
+    if not report["complete"]:
+        report["errors"].append(("(pacote)", "pacote truncado: fecho ausente"))
+    elif not report["trailer_ok"]:
+        report["errors"].append(("(pacote)", "fecho não confere com o conteúdo do pacote"))
+    if report["expected_sha256"] and report["sha256"] != report["expected_sha256"]:
+        report["errors"].append(("(pacote)", "SHA-256 do pacote difere do registrado na certidão de empacotamento"))
+    report["intact"] = not report["errors"]
+    report["finished_at"] = datetime.now()
+    return report
+
+def read_sidecar(package_path):
+    # SHA-256 do arquivo "<pacote>.sha256" gravado por run_packaging (formato
+    # do sha256sum), ou None se ausente
+    try:
+        with open(package_path + ".sha256", encoding="utf-8") as f:
+            digest = f.read().split()[:1]
+    except OSError:
+        return None
+    return digest[0].lower() if digest else None
+
+# -------------------- Execução Completa --------------------
+def package_file_name(base_folder, now):
+    return f"{os.path.basename(base_folder)}_{now.strftime('%Y%m%d_%H%M%S')}{PACKAGE_EXTENSION}"
+
+def run_packaging(folder, compression="zlib", output_dir=None, user_data=None, workers=DEFAULT_WORKERS,
+                  progress_callback=None, status_callback=None):
+    # Gera o pacote ao lado da pasta de evidências (ou em output_dir), o
+    # arquivo .sha256 com o hash do pacote inteiro e, em Certidões/, a
+    # certidão de empacotamento. A certidão fica fora do pacote, que já
+    # contém a certidão de aquisição.
+    from hashpm_pdf import generate_package_pdf  # import local, como em run_acquisition
+
+    def status(message):
+        if status_callback:
+            status_callback(message)
+
+    base_folder = evidence_base_folder(folder)
+    now = datetime.now()
+    output_dir = output_dir or os.path.dirname(os.path.abspath(base_folder))
+    package_path = os.path.join(output_dir, package_file_name(base_folder, now))
+    status("Compactando evidências no pacote...")
+    info = create_package(base_folder, package_path, compression, workers, progress_callback)
+    with open(package_path + ".sha256", "w", encoding="utf-8") as f:
+        f.write(f"{info['sha256']}  {os.path.basename(package_path)}\n")
+    timestamp = info["started_at"].strftime("%Y%m%d_%H%M%S")
+    pdf_path = os.path.join(base_folder, "Certidões", f"Certidao_Pacote_{timestamp}.pdf")
+    try:
+        status("Gerando certidão de empacotamento...")
+        generate_package_pdf(info, pdf_path, user_data)
+    except Exception as e:
+        raise AcquisitionError(f"Falha ao gerar a certidão de empacotamento:\n{e}") from e
+    status(f"Pacote gerado: {package_path}")
+    info["pdf_path"] = pdf_path
+    return info
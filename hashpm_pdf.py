@@ -0,0 +1,650 @@
+import os
+from datetime import datetime
+from reportlab import rl_config
+from reportlab.pdfgen import canvas
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import Paragraph
+from xml.sax.saxutils import escape
+from hashpm_core import get_resource_path, hash_file
+from hashpm_hashset import HASHSET_KINDS
+
+# -------------------- Dados Fixos da Certidão --------------------
+# Mapping of Unidade da Federação to header details
+STATE_HEADERS = {
+    "Acre": ("Estado do Acre", "Secretaria de Estado de Justiça e Segurança Pública", "Polícia Militar do Acre"),
+    "Amapá": ("Estado do Amapá", "Secretaria de Estado da Justiça e Segurança Pública", "Polícia Militar do Amapá"),
+    "Amazonas": ("Estado do Amazonas", "Secretaria de Estado de Segurança Pública", "Polícia Militar do Amazonas"),
+    "Pará": ("Estado do Pará", "Secretaria de Estado de Segurança Pública e Defesa Social", "Polícia Militar do Pará"),
+    "Rondônia": ("Estado de Rondônia", "Secretaria de Estado da Segurança, Defesa e Cidadania", "Polícia Militar do Estado de Rondônia"),
+    "Roraima": ("Estado de Roraima", "Secretaria de Estado da Segurança Pública", "Polícia Militar de Roraima"),
+    "Tocantins": ("Estado do Tocantins", "Secretaria da Segurança Pública", "Polícia Militar do Tocantins"),
+    "Alagoas": ("Estado de Alagoas", "Secretaria de Estado da Segurança Pública", "Polícia Militar de Alagoas"),
+    "Bahia": ("Estado da Bahia", "Secretaria de Segurança Pública", "Polícia Militar da Bahia"),
+    "Ceará": ("Estado do Ceará", "Secretaria da Segurança Pública e Defesa Social", "Polícia Militar do Ceará"),
+    "Maranhão": ("Estado do Maranhão", "Secretaria de Estado da Segurança Pública", "Polícia Militar do Maranhão"),
+    "Paraíba": ("Estado da Paraíba", "Secretaria de Estado da Segurança e da Defesa Social", "Polícia Militar da Paraíba"),
+    "Pernambuco": ("Estado de Pernambuco", "Secretaria de Defesa Social", "Polícia Militar de Pernambuco"),
+    "Piauí": ("Estado do Piauí", "Secretaria de Estado da Segurança Pública", "Polícia Militar do Piauí"),
+    "Rio Grande do Norte": ("Estado do Rio Grande do Norte", "Secretaria de Estado da Segurança Pública e da Defesa Social", "Polícia Militar do Rio Grande do Norte"),
+    "Sergipe": ("Estado de Sergipe", "Secretaria de Estado da Segurança Pública", "Polícia Militar do Estado de Sergipe"),
+    "Goiás": ("Estado de Goiás", "Secretaria de Estado de Segurança Pública", "Polícia Militar do Estado de Goiás"),
+    "Mato Grosso": ("Estado de Mato Grosso", "Secretaria de Estado de Segurança Pública", "Polícia Militar do Estado de Mato Grosso"),
+    "Mato Grosso do Sul": ("Estado de Mato Grosso do Sul", "Secretaria de Estado de Justiça e Segurança Pública", "Polícia Militar de Mato Grosso do Sul"),
+    "Distrito Federal": ("Distrito Federal", "Secretaria de Estado de Segurança Pública do Distrito Federal", "Polícia Militar do Distrito Federal"),
+    "Espírito Santo": ("Estado do Espírito Santo", "Secretaria de Estado da Segurança Pública e Defesa Social", "Polícia Militar do Espírito Santo"),
+    "Minas Gerais": ("Estado de Minas Gerais", "Secretaria de Estado de Justiça e Segurança Pública", "Polícia Militar de Minas Gerais"),
+    "Rio de Janeiro": ("Estado do Rio de Janeiro", "Secretaria de Estado de Polícia Militar", "Polícia Militar do Estado do Rio de Janeiro"),
+    "São Paulo": ("Estado de São Paulo", "Secretaria da Segurança Pública", "Polícia Militar do Estado de São Paulo"),
+    "Paraná": ("Estado do Paraná", "Secretaria de Estado da Segurança Pública", "Polícia Militar do Paraná"),
+    "Santa Catarina": ("Estado de Santa Catarina", "Secretaria de Estado da Segurança Pública", "Polícia Militar de Santa Catarina"),
+    "Rio Grande do Sul": ("Estado do Rio Grande do Sul", "Secretaria de Segurança Pública", "Brigada Militar")
+}
+DEFAULT_UF = "Rio Grande do Sul"
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+MARGIN_LEFT = 2 * cm
+MARGIN_RIGHT = PAGE_WIDTH - 1.5 * cm
+MARGIN_TOP = PAGE_HEIGHT - 1.5 * cm
+MARGIN_BOTTOM = 1.5 * cm
+AVAILABLE_WIDTH = MARGIN_RIGHT - MARGIN_LEFT
+AVAILABLE_HEIGHT = MARGIN_TOP - MARGIN_BOTTOM
+
+# Tabela do inventário: nº | arquivo, origem e hashes | tamanho e situação.
+# As linhas são desenhadas diretamente no canvas, sem Paragraph por arquivo.
+TABLE_LEADING = 9
+TABLE_NUMBER_WIDTH = 1.2 * cm
+TABLE_STATUS_WIDTH = 3.2 * cm
+TABLE_TEXT_X = MARGIN_LEFT + TABLE_NUMBER_WIDTH
+TABLE_TEXT_WIDTH = AVAILABLE_WIDTH - TABLE_NUMBER_WIDTH - TABLE_STATUS_WIDTH
+TABLE_LABEL_WIDTH = 1.8 * cm
+DIGEST_LABEL = 9  # caracteres reservados ao nome do algoritmo, em fonte monoespaçada
+DIGEST_LINE = 64  # SHA-512 e BLAKE2b (128 caracteres) ocupam duas linhas
+
+# Fluxos de página apenas comprimidos (zlib), sem a codificação ASCII85, que
+# aumenta o arquivo e custa tanto quanto o desenho em inventários extensos
+rl_config.useA85 = 0
+
+_styles = None
+
+def get_styles():
+    # Os estilos são criados uma única vez por processo
+    global _styles
+    if _styles is None:
+        normal_style = getSampleStyleSheet()['Normal']
+        _styles = {
+            "normal": normal_style,
+            "certidao": ParagraphStyle('Certidao', parent=normal_style, fontSize=12, leading=14, alignment=4),
+            "title": ParagraphStyle('Title', parent=normal_style, fontName='Helvetica-Bold', fontSize=14, alignment=1),
+            "header": ParagraphStyle('Header', parent=normal_style, fontName='Helvetica', fontSize=12, alignment=1, leading=14),
+            "info": ParagraphStyle('Info', parent=normal_style, fontSize=10, leading=14, spaceAfter=5),
+            "file_info": ParagraphStyle('FileInfo', parent=normal_style, fontSize=10, leading=14, leftIndent=12),
+            "section_title": ParagraphStyle('SectionTitle', parent=normal_style, fontName='Helvetica-Bold', fontSize=10, leading=14),
+            "assinatura": ParagraphStyle('Assinatura', parent=normal_style, fontSize=11, alignment=1),
+        }
+    return _styles
+
+def warm_up():
+    # Chamado em segundo plano logo após a janela aparecer: carrega estilos e
+    # métricas das fontes para que a primeira certidão não pague esse custo
+    get_styles()
+    for font_name in ("Helvetica", "Helvetica-Bold", "Courier"):
+        stringWidth("0", font_name, 10)
+
+def format_size(size):
+    return f"{round(size / 1024, 2)} KB"
+
+# -------------------- Escrita Paginada --------------------
+class PageWriter:
+    # Mantém a posição vertical e troca de página quando o espaço acaba;
+    # on_new_page é chamado no topo de cada nova página (ex.: cabeçalho da tabela)
+    def __init__(self, output_path, now, footer_label=""):
+        self.canvas = canvas.Canvas(output_path, pagesize=A4, pageCompression=1)
+        self.now = now
+        self.footer_label = footer_label
+        self.current_y = MARGIN_TOP
+        self.on_new_page = None
+
+    def check_space(self, required_height):
+        if self.current_y - required_height < MARGIN_BOTTOM:
+            self.new_page()
+            return True
+        return False
+
+    def new_page(self):
+        add_footer(self.canvas, PAGE_WIDTH, PAGE_HEIGHT, self.now, self.footer_label)
+        self.canvas.showPage()
+        self.current_y = MARGIN_TOP
+        if self.on_new_page:
+            self.on_new_page()
+
+    def paragraph(self, text, style, space_after=0, centered=False):
+        p = Paragraph(text, style)
+        w, h = p.wrap(AVAILABLE_WIDTH, AVAILABLE_HEIGHT)
+        self.check_space(h + space_after)
+        x = MARGIN_LEFT + (AVAILABLE_WIDTH - w) / 2 if centered else MARGIN_LEFT
+        p.drawOn(self.canvas, x, self.current_y - h)
+        self.current_y -= h + space_after
+
+    def rule(self):
+        self.check_space(0.1 * cm)
+        self.canvas.line(MARGIN_LEFT, self.current_y, MARGIN_RIGHT, self.current_y)
+        self.current_y -= 0.5 * cm
+
+    def save(self):
+        add_footer(self.canvas, PAGE_WIDTH, PAGE_HEIGHT, self.now, self.footer_label)
+        self.canvas.showPage()
+        self.canvas.save()
+
+def add_footer(c, width, height, now, label=""):
+    c.setFont("Helvetica", 8)
+    footer_text = f"Gerado por Hash PM - Aquisição em {now.strftime('%d/%m/%Y %H:%M')}"
+    if label:
+        footer_text += f" - {label}"
+    c.drawString(2 * cm, 1 * cm, footer_text)
+    page_num = c.getPageNumber()
+    c.drawRightString(width - 1.5 * cm, 1 * cm, f"Página {page_num}")
+
+# -------------------- Blocos da Certidão --------------------
+def draw_header(writer, user_data, title_lines):
+    # Sem user_data (ex.: verificação sem identificação do responsável) só o título é desenhado
+    styles = get_styles()
+    if user_data is None:
+        for line in title_lines[:-1]:
+            writer.paragraph(line, styles["title"], 0.3 * cm, centered=True)
+        writer.paragraph(title_lines[-1], styles["title"], 1 * cm, centered=True)
+        return
+    state, secretariat, police = STATE_HEADERS.get(
+        user_data.get("Unidade da Federação", DEFAULT_UF), STATE_HEADERS[DEFAULT_UF]
+    )
+    try:
+        brasao_path = get_resource_path("brasao.png")
+        brasao_width = 2.5 * cm
+        brasao_height = 3 * cm
+        writer.check_space(brasao_height + 0.5 * cm)
+        writer.canvas.drawImage(brasao_path, (PAGE_WIDTH - brasao_width) / 2, writer.current_y - brasao_height,
+                                width=brasao_width, height=brasao_height, preserveAspectRatio=True, mask='auto')
+        writer.current_y -= brasao_height + 0.5 * cm
+    except Exception:
+        pass
+
+    writer.paragraph(state, styles["header"], 0.3 * cm, centered=True)
+    writer.paragraph(secretariat, styles["header"], 0.3 * cm, centered=True)
+    writer.paragraph(police, styles["header"], 1 * cm, centered=True)
+    for line in title_lines[:-1]:
+        writer.paragraph(line, styles["title"], 0.3 * cm, centered=True)
+    writer.paragraph(title_lines[-1], styles["title"], 1 * cm, centered=True)
+
+def draw_parties(writer, user_data, proprietario_data):
+    # Dados do apreensor e proprietário lado a lado com títulos alinhados
+    styles = get_styles()
+    c = writer.canvas
+    column_width = (AVAILABLE_WIDTH - 1 * cm) / 2
+    apreensor_text = (
+        f"<b>Nome:</b> {user_data['Posto/Graduação']} {user_data['Nome']}<br/>"
+        f"<b>CPF:</b> {user_data['CPF']}<br/>"
+        f"<b>Função:</b> {user_data['Função']}<br/>"
+        f"<b>Orgão:</b> {user_data['Orgão']}<br/>"
+        f"<b>Portaria:</b> {user_data['Portaria']}<br/>"
+        f"<b>Data e hora:</b> {writer.now.strftime('%d/%m/%Y %H:%M:%S')}"
+    )
+    proprietario_text = (
+        f"<b>Nome:</b> {proprietario_data['Nome']}<br/>"
+        f"<b>Tipo:</b> {proprietario_data['Tipo']}<br/>"
+        f"<b>CPF/CNPJ:</b> {proprietario_data['CPF/CNPJ']}"
+    )
+
+    p_apreensor_title = Paragraph("<b>Apreensor:</b>", styles["section_title"])
+    p_proprietario_title = Paragraph("<b>Proprietário das Evidências:</b>", styles["section_title"])
+    p_apreensor_content = Paragraph(apreensor_text, styles["info"])
+    p_proprietario_content = Paragraph(proprietario_text, styles["info"])
+
+    w, h_apre_title = p_apreensor_title.wrap(column_width, AVAILABLE_HEIGHT)
+    w, h_proprio_title = p_proprietario_title.wrap(column_width, AVAILABLE_HEIGHT)
+    w, h_apre_content = p_apreensor_content.wrap(column_width, AVAILABLE_HEIGHT - h_apre_title)
+    w, h_proprio_content = p_proprietario_content.wrap(column_width, AVAILABLE_HEIGHT - h_proprio_title)
+
+    title_height = max(h_apre_title, h_proprio_title)
+    content_height = max(h_apre_content, h_proprio_content)
+    writer.check_space(title_height + content_height + 0.7 * cm)
+
+    p_apreensor_title.drawOn(c, MARGIN_LEFT, writer.current_y - title_height)
+    p_proprietario_title.drawOn(c, MARGIN_LEFT + column_width + 1 * cm, writer.current_y - title_height)
+    writer.current_y -= title_height + 0.2 * cm
+
+    p_apreensor_content.drawOn(c, MARGIN_LEFT, writer.current_y - h_apre_content)
+    p_proprietario_content.drawOn(c, MARGIN_LEFT + column_width + 1 * cm, writer.current_y - h_proprio_content)
+    writer.current_y -= content_height + 0.5 * cm
+
+def inventory_row(number, file_path, hashes, info):
+    # Linhas de um arquivo, já quebradas na largura da coluna: [(fonte, tamanho, texto)]
+    # para a coluna principal e [texto] para a coluna de tamanho/situação
+    name = info["relative_path"] if info else os.path.basename(file_path)
+    size = info["size"] if info else os.path.getsize(file_path)
+    text_lines = [("Helvetica-Bold", 8, line) for line in simpleSplit(name, "Helvetica-Bold", 8, TABLE_TEXT_WIDTH)]
+    status_lines = [format_size(size)]
+    if info:
+        text_lines += [
+            ("Helvetica", 7, line)
+            for line in simpleSplit(f"Origem: {info['source']}", "Helvetica", 7, TABLE_TEXT_WIDTH)
+        ]
+        status = "cache" if info.get("hash_origin") == "cache" else "calculado"
+        if info["copy_hashes"]:
+            status += " · conferida"
+        status_lines.append(status)
+    for name, digest in hashes.items():
+        for i in range(0, len(digest), DIGEST_LINE):
+            label = name if i == 0 else ""
+            text_lines.append(("Courier", 7, f"{label:<{DIGEST_LABEL}}{digest[i:i + DIGEST_LINE]}"))
+    for match in (info.get("hash_set_matches") or []) if info else []:
+        text_lines.append(
+            ("Helvetica-Bold", 7, f"{HASHSET_KINDS.get(match['kind'], match['kind']).upper()}: consta do conjunto {match['name']}")
+        )
+    piecewise = info.get("piecewise") if info else None
+    if piecewise:
+        text_lines.append(("Courier", 7, f"{'Merkle':<{DIGEST_LABEL}}{piecewise['merkle_root']}"))
+        status_lines.append(f"{len(piecewise['segments'])} seg. de {piecewise['segment_size'] // (1024 * 1024)} MB")
+    archive = info.get("archive") if info else None
+    if archive:
+        status_lines.append(f"{archive['format'].upper()}: {len(archive['members'])} item(ns)")
+        if archive["error"]:
+            text_lines += [
+                ("Helvetica-Bold", 7, line)
+                for line in simpleSplit(f"Pacote lido parcialmente: {archive['error']}", "Helvetica-Bold", 7,
+                                        TABLE_TEXT_WIDTH)
+            ]
+    image = info.get("image") if info else None
+    if image:
+        status_lines.append("imagem do dispositivo")
+        if image["bad_ranges"]:
+            status_lines.append(f"{image['bad_bytes'] // image['sector_size']} setor(es) ilegível(is)")
+    return number, text_lines, status_lines
+
+def member_row(number, member):
+    # Item de um arquivo ZIP/TAR, numerado como <nº do pacote>.<nº do item>
+    text_lines = [("Helvetica", 7, line) for line in simpleSplit(member["name"], "Helvetica", 7, TABLE_TEXT_WIDTH)]
+    for name, digest in (member.get("hashes") or {}).items():
+        for i in range(0, len(digest), DIGEST_LINE):
+            label = name if i == 0 else ""
+            text_lines.append(("Courier", 7, f"{label:<{DIGEST_LABEL}}{digest[i:i + DIGEST_LINE]}"))
+    if member.get("error"):
+        text_lines.append(("Helvetica-Bold", 7, f"Item não lido: {member['error']}"))
+    for match in member.get("hash_set_matches") or []:
+        text_lines.append(
+            ("Helvetica-Bold", 7, f"{HASHSET_KINDS.get(match['kind'], match['kind']).upper()}: consta do conjunto {match['name']}")
+        )
+    return number, text_lines, [format_size(member["size"]), "item do pacote"]
+
+def draw_inventory_header(writer):
+    c = writer.canvas
+    y = writer.current_y - TABLE_LEADING
+    c.setFont("Helvetica-Bold", 8)
+    c.drawString(MARGIN_LEFT, y, "Nº")
+    c.drawString(TABLE_TEXT_X, y, "Arquivo, origem e hashes")
+    c.drawRightString(MARGIN_RIGHT, y, "Tamanho / Situação")
+    writer.current_y = y - 0.2 * cm
+    c.line(MARGIN_LEFT, writer.current_y, MARGIN_RIGHT, writer.current_y)
+    writer.current_y -= 0.1 * cm
+
+def draw_inventory_row(writer, row):
+    # Um único objeto de texto por coluna: a fonte só é trocada quando muda e
+    # as linhas avançam pelo entrelinhamento, sem reposicionar cada uma
+    number, text_lines, status_lines = row
+    c = writer.canvas
+    height = max(len(text_lines), len(status_lines)) * TABLE_LEADING + 0.15 * cm
+    writer.check_space(height)
+    y = writer.current_y - TABLE_LEADING
+
+    text = c.beginText(TABLE_TEXT_X, y)
+    current_font = None
+    for font, size, line in text_lines:
+        if (font, size) != current_font:
+            text.setFont(font, size, TABLE_LEADING)
+            current_font = (font, size)
+        text.textLine(line)
+    c.drawText(text)
+
+    c.setFont("Helvetica", 8)
+    c.drawString(MARGIN_LEFT, y, f"{number}")
+    c.drawRightString(MARGIN_RIGHT, y, status_lines[0])
+    c.setFont("Helvetica", 7)
+    for i, status in enumerate(status_lines[1:], 1):
+        c.drawRightString(MARGIN_RIGHT, y - i * TABLE_LEADING, status)
+
+    writer.current_y -= height
+    c.setStrokeColor(colors.lightgrey)
+    c.setLineWidth(0.3)
+    c.line(MARGIN_LEFT, writer.current_y + 0.05 * cm, MARGIN_RIGHT, writer.current_y + 0.05 * cm)
+    c.setStrokeColor(colors.black)
+    c.setLineWidth(1)
+
+def draw_inventory(writer, file_paths, hashes, file_info, first_number=1):
+    # Inventário em tabela compacta, desenhado arquivo a arquivo; o cabeçalho
+    # da tabela é repetido no topo de cada página. Devolve o volume total.
+    styles = get_styles()
+    writer.paragraph(
+        "<b>Inventário:</b> tamanho de cada arquivo; situação do hash (<i>calculado</i> nesta aquisição ou "
+        "reaproveitado do <i>cache</i>, com o arquivo inalterado); <i>conferida</i> indica que a cópia gravada "
+        "foi relida e apresentou hashes idênticos aos da origem. Em arquivos grandes, <i>Merkle</i> é a raiz da "
+        "árvore de hashes SHA-256 dos segmentos indicados, relacionados no manifesto. Os itens de arquivos "
+        "ZIP/TAR, lidos diretamente do pacote, são numerados a partir do número do pacote (ex.: 3.1, 3.2).",
+        styles["info"], 0.2 * cm
+    )
+    writer.check_space(3 * TABLE_LEADING)
+    draw_inventory_header(writer)
+    writer.on_new_page = lambda: draw_inventory_header(writer)
+    total_size = 0
+    for number, file_path in enumerate(file_paths, first_number):
+        info = (file_info or {}).get(file_path)
+        row = inventory_row(number, file_path, hashes[file_path], info)
+        draw_inventory_row(writer, row)
+        for k, member in enumerate(((info or {}).get("archive") or {}).get("members") or [], 1):
+            draw_inventory_row(writer, member_row(f"{number}.{k}", member))
+        total_size += info["size"] if info else os.path.getsize(file_path)
+    writer.on_new_page = None
+    writer.current_y -= 0.3 * cm
+    writer.paragraph(f"<b>Total:</b> {len(file_paths)} arquivo(s), {format_size(total_size)}", styles["info"], 0.2 * cm)
+    return total_size
+
+def draw_volume_summary(writer, volumes):
+    # volumes: [(caminho, primeiro nº, último nº, tamanho total, SHA-256 do volume)]
+    styles = get_styles()
+    c = writer.canvas
+    writer.paragraph(
+        f"<b>Inventário em {len(volumes)} volume(s):</b> a relação dos arquivos adquiridos, com tamanhos e hashes, "
+        "consta dos volumes abaixo, que integram esta certidão. O hash SHA-256 de cada volume permite conferir "
+        "que o volume apresentado é o gerado nesta aquisição.",
+        styles["info"], 0.3 * cm
+    )
+    total_files = total_size = 0
+    for path, first, last, size, digest in volumes:
+        writer.check_space(3 * TABLE_LEADING + 0.2 * cm)
+        y = writer.current_y - TABLE_LEADING
+        c.setFont("Helvetica-Bold", 8)
+        c.drawString(MARGIN_LEFT, y, os.path.basename(path))
+        c.setFont("Helvetica", 8)
+        c.drawRightString(MARGIN_RIGHT, y, f"arquivos {first} a {last} ({last - first + 1}), {format_size(size)}")
+        c.setFont("Helvetica-Bold", 7)
+        c.drawString(MARGIN_LEFT, y - TABLE_LEADING, "SHA-256")
+        c.setFont("Courier", 7)
+        c.drawString(MARGIN_LEFT + TABLE_LABEL_WIDTH, y - TABLE_LEADING, digest)
+        writer.current_y -= 2 * TABLE_LEADING + 0.3 * cm
+        total_files += last - first + 1
+        total_size += size
+    writer.current_y -= 0.2 * cm
+    writer.paragraph(f"<b>Total:</b> {total_files} arquivo(s), {format_size(total_size)}", styles["info"], 0.2 * cm)
+
+def draw_storage_summary(writer, file_paths, file_info):
+    # Organização por conteúdo: onde estão os arquivos e quantos eram repetidos
+    objects = {((file_info or {}).get(file_path) or {}).get("object") for file_path in file_paths}
+    objects.discard(None)
+    if not objects:
+        return
+    writer.paragraph(
+        "<b>Armazenamento por conteúdo:</b> os arquivos foram gravados em Arquivos/objetos, cada um com o nome "
+        "igual ao seu hash SHA-256; o manifesto relaciona o caminho de cada arquivo ao respectivo objeto. "
+        f"{len(file_paths)} arquivo(s) ocupam {len(objects)} objeto(s).",
+        get_styles()["info"], 0.3 * cm
+    )
+
+def draw_image_summary(writer, file_paths, file_info):
+    # Imagens de dispositivo: parâmetros da leitura e os intervalos de setores
+    # ilegíveis, preenchidos com zeros na imagem
+    for file_path in file_paths:
+        info = (file_info or {}).get(file_path) or {}
+        image = info.get("image")
+        if not image:
+            continue
+        sector = image["sector_size"]
+        bad_sectors = image["bad_bytes"] // sector
+        summary = (
+            f"<b>Imagem de dispositivo:</b> {escape(info['relative_path'])} é a imagem bruta de "
+            f"{escape(image['device'])} ({format_size(image['size'])}), lida em blocos de "
+            f"{format_size(image['block_size'])} com setores de {sector} bytes. "
+        )
+        if not bad_sectors:
+            writer.paragraph(summary + "Todos os setores foram lidos.", get_styles()["info"], 0.3 * cm)
+            continue
+        writer.paragraph(
+            summary + f"{bad_sectors} setor(es) permaneceram ilegíveis após {image['retries'] + 1} tentativa(s) e "
+            "foram preenchidos com zeros na imagem; os hashes referem-se à imagem assim gravada.",
+            get_styles()["info"], 0.1 * cm
+        )
+        draw_plain_list(writer, "Setores ilegíveis:", [
+            f"setores {start // sector} a {(start + length) // sector - 1} "
+            f"(bytes {start} a {start + length - 1}, {format_size(length)})"
+            for start, length in image["bad_ranges"]
+        ])
+
+def draw_hash_set_summary(writer, file_paths, file_info):
+    # Quantos arquivos (ou itens de pacotes) constam de cada conjunto de hashes consultado
+    counts = {}
+    for file_path in file_paths:
+        info = (file_info or {}).get(file_path) or {}
+        members = (info.get("archive") or {}).get("members") or []
+        for item in [info] + members:
+            for match in item.get("hash_set_matches") or []:
+                key = (match["name"], match["kind"])
+                counts[key] = counts.get(key, 0) + 1
+    if not counts:
+        return
+    lines = "<br/>".join(
+        f"{escape(name)} ({HASHSET_KINDS.get(kind, kind).lower()}): {count} arquivo(s)"
+        for (name, kind), count in sorted(counts.items())
+    )
+    writer.paragraph(f"<b>Correspondências com conjuntos de hashes:</b><br/>{lines}", get_styles()["info"], 0.3 * cm)
+
+def draw_signature(writer, user_data):
+    writer.current_y -= 2.5 * cm
+    assinatura_area = 3 * cm
+    writer.check_space(assinatura_area)
+
+    signature_y = MARGIN_BOTTOM + assinatura_area
+    sig_width = 8 * cm
+    writer.canvas.line(PAGE_WIDTH / 2 - 4 * cm, signature_y, PAGE_WIDTH / 2 + 4 * cm, signature_y)
+    p_assinatura = Paragraph(f"{user_data['Posto/Graduação']} {user_data['Nome']}", get_styles()["assinatura"])
+    w, h = p_assinatura.wrap(sig_width, AVAILABLE_HEIGHT)
+    p_assinatura.drawOn(writer.canvas, PAGE_WIDTH / 2 - w / 2, signature_y - (h + 0.7 * cm))
+
+# -------------------- Certidão em PDF --------------------
+def volume_path(output_path, index):
+    root, ext = os.path.splitext(output_path)
+    return f"{root}_Volume_{index:02d}{ext}"
+
+def generate_volume(file_paths, user_data, hashes, file_info, output_path, now, index, count, first_number,
+                    certificate_name):
+    writer = PageWriter(output_path, now, f"Inventário, volume {index} de {count}")
+    draw_header(writer, user_data, ["CERTIDÃO DE AQUISIÇÃO DE EVIDÊNCIA DIGITAL", f"INVENTÁRIO - VOLUME {index} DE {count}"])
+    writer.paragraph(
+        f"Volume integrante da certidão {certificate_name}, lavrada em {now.strftime('%d/%m/%Y %H:%M')} "
+        f"por {user_data['Posto/Graduação']} {user_data['Nome']}, Portaria {user_data['Portaria']}. "
+        f"Arquivos {first_number} a {first_number + len(file_paths) - 1}.",
+        get_styles()["certidao"], 0.5 * cm
+    )
+    writer.rule()
+    total_size = draw_inventory(writer, file_paths, hashes, file_info, first_number)
+    writer.save()
+    return total_size
+
+def generate_pdf(file_paths, user_data, proprietario_data, hashes, output_path, file_info=None, files_per_volume=0):
+    # Com files_per_volume, o inventário é dividido em volumes numerados
+    # (<certidão>_Volume_NN.pdf), cada um gravado e liberado antes do próximo,
+    # e a certidão traz uma página de resumo com o SHA-256 de cada volume.
+    # Devolve a lista de PDFs gerados, começando pela certidão.
+    styles = get_styles()
+    algorithms = list(next(iter(hashes.values()))) if hashes else ["SHA-256"]
+    algorithms_text = ", ".join(algorithms)
+    now = datetime.now()
+
+    volumes = []
+    if files_per_volume and len(file_paths) > files_per_volume:
+        count = (len(file_paths) + files_per_volume - 1) // files_per_volume
+        for index in range(1, count + 1):
+            first = (index - 1) * files_per_volume
+            part = file_paths[first:first + files_per_volume]
+            path = volume_path(output_path, index)
+            size = generate_volume(part, user_data, hashes, file_info, path, now, index, count, first + 1,
+                                   os.path.basename(output_path))
+            volumes.append((path, first + 1, first + len(part), size, hash_file(path)["SHA-256"]))
+
+    writer = PageWriter(output_path, now)
+    draw_header(writer, user_data, ["CERTIDÃO DE AQUISIÇÃO", "DE EVIDÊNCIA DIGITAL"])
+
+    cert_text = (
+        f"Certifico a aquisição da evidência digital abaixo relacionada em {now.strftime('%d/%m/%Y %H:%M')}, "
+        f"por {user_data['Posto/Graduação']} {user_data['Nome']}, em conformidade com os Artigos 158-A a 158-D "
+        "do CPP e Norma ABNT NBR ISO/IEC 27037:2013.<br/>"
+        f"O arquivo foi copiado para dispositivo seguro, com hash {algorithms_text} para integridade.<br/>"
+        "Esta aquisição observa os princípios da cadeia de custódia, conforme a legislação vigente, para preservar "
+        "a autenticidade e integridade da prova digital."
+    )
+    writer.paragraph(cert_text, styles["certidao"], 0.5 * cm)
+    writer.rule()
+    draw_parties(writer, user_data, proprietario_data)
+    writer.rule()
+
+    if volumes:
+        draw_volume_summary(writer, volumes)
+    else:
+        draw_inventory(writer, file_paths, hashes, file_info)
+    draw_storage_summary(writer, file_paths, file_info)
+    draw_image_summary(writer, file_paths, file_info)
+    draw_hash_set_summary(writer, file_paths, file_info)
+    writer.rule()
+
+    nota_text = (
+        "<b>Nota Técnica de Extração:</b><br/>"
+        f"A extração de hash ({algorithms_text}) é utilizada para garantir a integridade de arquivos digitais. "
+        "O software Hash BM utiliza linguagem Python e a biblioteca hashlib para ler o arquivo em blocos binários, "
+        "gerando um hash que funciona como uma 'impressão digital' do arquivo. "
+        "Cada bloco da origem é lido uma única vez, sendo utilizado simultaneamente para o cálculo de todos os hashes "
+        "e para a gravação da cópia; quando indicado, a cópia gravada é relida e conferida com o hash da origem."
+    )
+    writer.paragraph(nota_text, styles["file_info"], 0.5 * cm)
+    writer.rule()
+    draw_signature(writer, user_data)
+    writer.save()
+    return [output_path] + [volume[0] for volume in volumes]
+
+# -------------------- Certidão de Verificação --------------------
+def draw_plain_list(writer, title, lines):
+    # Lista de caminhos desenhada diretamente no canvas: nomes de arquivo não
+    # passam pelo Paragraph, cuja marcação interpretaria "<" e "&"
+    writer.paragraph(f"<b>{title}</b>", get_styles()["info"], 0.1 * cm)
+    c = writer.canvas
+    for line in lines:
+        for part in simpleSplit(line, "Helvetica", 8, AVAILABLE_WIDTH - 0.5 * cm):
+            writer.check_space(TABLE_LEADING)
+            writer.current_y -= TABLE_LEADING
+            c.setFont("Helvetica", 8)
+            c.drawString(MARGIN_LEFT + 0.5 * cm, writer.current_y, part)
+    writer.current_y -= 0.4 * cm
+
+def generate_verification_pdf(report, output_path, user_data=None):
+    # report: resultado de hashpm_verify.verify_evidence. Sem divergências a
+    # certidão traz apenas o resumo; caso contrário, relaciona cada arquivo
+    # modificado, ausente ou não registrado no manifesto.
+    styles = get_styles()
+    now = report["started_at"]
+    signed = user_data is not None and user_data.get("Nome") not in (None, "", "Não informado")
+    writer = PageWriter(output_path, now, "Verificação")
+    draw_header(writer, user_data if signed else None, ["CERTIDÃO DE VERIFICAÇÃO", "DE EVIDÊNCIA DIGITAL"])
+
+    mode_text = (
+        "com o recálculo dos hashes de todos os arquivos" if report["mode"] == "completo"
+        else "em modo rápido, pela comparação de tamanho e data de modificação (sem recálculo dos hashes)"
+    )
+    responsible = f", por {user_data['Posto/Graduação']} {user_data['Nome']}" if signed else ""
+    cert_text = (
+        f"Certifico que em {now.strftime('%d/%m/%Y %H:%M')}{responsible}, a pasta de evidências "
+        f"{os.path.basename(report['base_folder'])} foi conferida com o(s) manifesto(s) de aquisição abaixo, "
+        f"{mode_text}."
+    )
+    writer.paragraph(cert_text, styles["certidao"], 0.5 * cm)
+    writer.rule()
+
+    c = writer.canvas
+    writer.paragraph("<b>Manifesto(s) de referência:</b>", styles["info"], 0.1 * cm)
+    for path in report["manifest_paths"]:
+        writer.check_space(2 * TABLE_LEADING + 0.2 * cm)
+        y = writer.current_y - TABLE_LEADING
+        c.setFont("Helvetica", 8)
+        c.drawString(MARGIN_LEFT + 0.5 * cm, y, os.path.basename(path))
+        c.setFont("Courier", 7)
+        c.drawString(MARGIN_LEFT + 0.5 * cm, y - TABLE_LEADING, f"SHA-256  {hash_file(path)['SHA-256']}")
+        writer.current_y -= 2 * TABLE_LEADING + 0.2 * cm
+    writer.current_y -= 0.3 * cm
+
+    summary = (
+        f"<b>Arquivos registrados:</b> {report['expected']}<br/>"
+        f"<b>Conferidos sem divergência:</b> {len(report['ok'])}<br/>"
+        f"<b>Modificados:</b> {len(report['modified'])}<br/>"
+        f"<b>Ausentes:</b> {len(report['missing'])}<br/>"
+        f"<b>Não registrados no manifesto:</b> {len(report['extra'])}<br/>"
+        f"<b>Resultado:</b> {'EVIDÊNCIAS ÍNTEGRAS' if report['intact'] else 'DIVERGÊNCIAS ENCONTRADAS'}"
+    )
+    writer.paragraph(summary, styles["info"], 0.5 * cm)
+    writer.rule()
+
+    if report["modified"]:
+        draw_plain_list(writer, "Arquivos modificados:", [f"{relative} - {reason}" for relative, reason in report["modified"]])
+    if report["missing"]:
+        draw_plain_list(writer, "Arquivos ausentes:", report["missing"])
+    if report["extra"]:
+        draw_plain_list(writer, "Arquivos não registrados no manifesto:", report["extra"])
+
+    if signed:
+        draw_signature(writer, user_data)
+    writer.save()
+
+def generate_package_pdf(info, output_path, user_data=None):
+    # info: resultado de hashpm_package.create_package. A certidão traz o
+    # SHA-256 do pacote inteiro, conferível com qualquer ferramenta, e os
+    # arquivos que não conferiram com o manifesto de aquisição ao serem lidos.
+    styles = get_styles()
+    now = info["started_at"]
+    signed = user_data is not None and user_data.get("Nome") not in (None, "", "Não informado")
+    writer = PageWriter(output_path, now, "Empacotamento")
+    draw_header(writer, user_data if signed else None, ["CERTIDÃO DE EMPACOTAMENTO", "DE EVIDÊNCIA DIGITAL"])
+
+    responsible = f", por {user_data['Posto/Graduação']} {user_data['Nome']}" if signed else ""
+    cert_text = (
+        f"Certifico que em {now.strftime('%d/%m/%Y %H:%M')}{responsible}, as pastas Arquivos e Certidões da "
+        f"pasta de evidências {os.path.basename(info['base_folder'])} foram reunidas no pacote abaixo, "
+        f"compactado em blocos ({info['compression']}), com manifesto embutido dos hashes originais "
+        f"da aquisição. Cada arquivo é conferido com esses hashes na extração, e o pacote inteiro com o "
+        f"SHA-256 registrado nesta certidão."
+    )
+    writer.paragraph(cert_text, styles["certidao"], 0.5 * cm)
+    writer.rule()
+
+    c = writer.canvas
+    writer.paragraph("<b>Pacote:</b>", styles["info"], 0.1 * cm)
+    writer.check_space(2 * TABLE_LEADING + 0.2 * cm)
+    y = writer.current_y - TABLE_LEADING
+    c.setFont("Helvetica", 8)
+    c.drawString(MARGIN_LEFT + 0.5 * cm, y, os.path.basename(info["package_path"]))
+    c.setFont("Courier", 7)
+    c.drawString(MARGIN_LEFT + 0.5 * cm, y - TABLE_LEADING, f"SHA-256  {info['sha256']}")
+    writer.current_y -= 2 * TABLE_LEADING + 0.5 * cm
+
+    summary = (
+        f"<b>Arquivos no pacote:</b> {info['files']}<br/>"
+        f"<b>Tamanho original:</b> {format_size(info['bytes'])}<br/>"
+        f"<b>Tamanho do pacote:</b> {format_size(info['package_size'])}<br/>"
+        f"<b>Conferidos com o manifesto de aquisição:</b> {info['checked']}<br/>"
+        f"<b>Divergentes do manifesto:</b> {len(info['diverging'])}"
+    )
+    writer.paragraph(summary, styles["info"], 0.5 * cm)
+    writer.rule()
+
+    if info["diverging"]:
+        draw_plain_list(writer, "Arquivos divergentes do manifesto de aquisição:", info["diverging"])
+
+    if signed:
+        draw_signature(writer, user_data)
+    writer.save()
@@ -0,0 +1,174 @@
+import queue
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from hashpm_core import DEFAULT_WORKERS, choose_chunk_size, get_buffer, run_pipeline
+
+DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+# Blocos aguardando o worker de cada segmento; limita a memória e faz a
+# leitura esperar quando os workers ficam para trás
+SEGMENT_QUEUE_CHUNKS = 8
+MERKLE_SCHEME = "rfc6962"
+
+# -------------------- Hash por Segmentos (Merkle) --------------------
+# Arquivos maiores que um segmento (imagens de disco, por exemplo) também são
+# descritos pelo SHA-256 de cada segmento de tamanho fixo e pela raiz da
+# árvore de Merkle desses hashes. Na aquisição os segmentos são calculados
+# sobre os blocos lidos da origem (SegmentHasher), em paralelo e sem nova
+# leitura; na verificação, cada segmento é relido de forma independente
+# (hash_segments) e uma corrupção fica localizada no(s) segmento(s)
+# divergente(s).
+def segmented(file_size, segment_size):
+    return bool(segment_size) and file_size > segment_size
+
+def segment_ranges(file_size, segment_size):
+    return [(offset, min(segment_size, file_size - offset)) for offset in range(0, file_size, segment_size)]
+
+def hash_segment(file_path, offset, length, progress_callback=None):
+    hasher = hashlib.sha256()
+    view = get_buffer(choose_chunk_size(length))
+    with open(file_path, "rb", buffering=0) as f:
+        f.seek(offset)
+        remaining = length
+        while remaining:
+            n = f.readinto(view[:min(len(view), remaining)])
+            if not n:
+                raise OSError(f"arquivo menor que o esperado (segmento em {offset})")
+            hasher.update(view[:n])
+            remaining -= n
+            if progress_callback:
+                progress_callback(n)
+    return hasher.hexdigest()
+
+def merkle_root(segment_digests):
+    # Árvore da RFC 6962: folha = SHA-256(0x00 + hash do segmento) e nó =
+    # SHA-256(0x01 + esquerda + direita), com n folhas divididas na maior
+    # potência de 2 menor que n. Folhas e nós não se confundem e nenhum nó
+    # sobe inalterado, de modo que árvores de formatos diferentes não
+    # produzem a mesma raiz.
+    def root(nodes):
+        if len(nodes) == 1:
+            return nodes[0]
+        split = 1 << ((len(nodes) - 1).bit_length() - 1)
+        return hashlib.sha256(b"\x01" + root(nodes[:split]) + root(nodes[split:])).digest()
+
+    if not segment_digests:
+        return hashlib.sha256(b"").hexdigest()
+    return root([hashlib.sha256(b"\x00" + bytes.fromhex(digest)).digest() for digest in segment_digests]).hex()
+
+def record_consistent(record, file_size):
+    # O registro confere consigo mesmo: quantidade de segmentos e raiz da RFC 6962
+    count = len(segment_ranges(file_size, record["segment_size"]))
+    if len(record["segments"]) != count or record.get("segment_count") != count:
+        return False
+    return record.get("merkle") == MERKLE_SCHEME and merkle_root(record["segments"]) == record["merkle_root"]
+
+def consume_segment(chunks):
+    # Worker de um segmento: hash dos blocos na ordem em que chegam, até None
+    hasher = hashlib.sha256()
+    for chunk in iter(chunks.get, None):
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+class SegmentHasher:
+    # Hash dos segmentos calculado com os blocos que a aquisição já lê da
+    # origem. update() recebe os blocos em ordem, na thread de leitura, e
+    # entrega cópias deles (o buffer de leitura é reaproveitado) à fila do
+    # segmento correspondente, consumida por um worker do pool: o SHA-256
+    # dos segmentos roda em outros núcleos enquanto a leitura e o hash do
+    # arquivo inteiro prosseguem, e vários segmentos são calculados ao mesmo
+    # tempo quando a leitura é mais rápida que um núcleo.
+    def __init__(self, file_size, segment_size, workers=None):
+        self.file_size = file_size
+        self.segment_size = segment_size
+        self.workers = workers
+        self.start()
+
+    def start(self):
+        self.ranges = segment_ranges(self.file_size, self.segment_size)
+        self.pool = ThreadPoolExecutor(max_workers=max(1, min(self.workers or DEFAULT_WORKERS, len(self.ranges))))
+        self.futures = []
+        self.chunks = None
+        self.filled = 0
+
+    def update(self, chunk):
+        view = memoryview(chunk).cast("B")
+        while view:
+            if self.chunks is None:
+                if len(self.futures) == len(self.ranges):
+                    raise OSError("a origem cresceu durante a leitura (segmentos)")
+                self.chunks = queue.Queue(SEGMENT_QUEUE_CHUNKS)
+                self.futures.append(self.pool.submit(consume_segment, self.chunks))
+                self.filled = 0
+            length = self.ranges[len(self.futures) - 1][1]
+            n = min(len(view), length - self.filled)
+            # A cópia é necessária: o bloco está no buffer de leitura da thread
+            # (get_buffer/get_aligned_buffer), sobrescrito pelo próximo readinto
+            # enquanto o worker do segmento ainda pode estar na fila. Copiar em
+            # memória custa uma fração do SHA-256 do mesmo bloco e nada se relê do disco.
+            self.chunks.put(bytes(view[:n]))
+            self.filled += n
+            view = view[n:]
+            if self.filled == length:
+                self.chunks.put(None)
+                self.chunks = None
+
+    def close(self):
+        # Libera o worker do segmento em andamento (leitura interrompida) e encerra o pool
+        if self.chunks is not None:
+            self.chunks.put(None)
+            self.chunks = None
+        self.pool.shutdown()
+
+    def reset(self):
+        # Recomeça do início do arquivo (ex.: ponto de retomada descartado)
+        self.close()
+        self.start()
+
+    def digests(self):
+        # {índice: hash}; o arquivo precisa ter sido entregue por inteiro
+        complete = self.chunks is None and len(self.futures) == len(self.ranges)
+        self.close()
+        if not complete:
+            raise OSError("a origem terminou antes do tamanho esperado (segmentos)")
+        return {index: future.result() for index, future in enumerate(self.futures)}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def hash_segments(files, segment_size=DEFAULT_SEGMENT_SIZE, workers=None, use_processes=False,
+                  progress=None, indexes=None):
+    # files: [(chave, caminho, tamanho)]. Todos os segmentos de todos os
+    # arquivos passam pelo mesmo pool. Com indexes ({chave: [índices]}),
+    # apenas os segmentos indicados são recalculados. progress é um
+    # ByteProgress cujo total já inclui os bytes dos segmentos.
+    # Devolve {chave: {índice: hash}}.
+    tasks = []
+    for key, file_path, file_size in files:
+        ranges = segment_ranges(file_size, segment_size)
+        selected = indexes[key] if indexes is not None else range(len(ranges))
+        for index in selected:
+            offset, length = ranges[index]
+            tasks.append(((key, index), (file_path, offset, length), length))
+    results = run_pipeline(hash_segment, iter(tasks), workers, use_processes, progress)
+    digests = {key: {} for key, _, _ in files}
+    for (key, index), digest in results.items():
+        digests[key][index] = digest
+    return digests
+
+def piecewise_record(segment_digests, segment_size):
+    # Registro gravado no manifesto e em file_info
+    segments = [segment_digests[i] for i in range(len(segment_digests))]
+    return {
+        "segment_size": segment_size,
+        "segment_count": len(segments),
+        "segments": segments,
+        "merkle": MERKLE_SCHEME,
+        "merkle_root": merkle_root(segments),
+    }
+
+def damaged_segments(record, segment_digests):
+    # Índices cujos hashes recalculados não conferem com os registrados
+    return sorted(index for index, digest in segment_digests.items() if record["segments"][index] != digest)
@@ -0,0 +1,181 @@
+import os
+import glob
+import json
+import time
+import platform
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+# Locais de alocação registrados quando o rastreamento de memória está ativo
+TOP_ALLOCATIONS = 25
+
+# -------------------- Medição por Arquivo --------------------
+def timed_call(func, *args):
+    # Executado no worker (thread ou processo): devolve o resultado com o
+    # tempo de relógio e o tempo de CPU da própria thread
+    started = time.perf_counter()
+    cpu_started = time.thread_time()
+    result = func(*args)
+    return result, time.perf_counter() - started, time.thread_time() - cpu_started
+
+# -------------------- Registro de Desempenho da Aquisição --------------------
+# Opcional. Grava em Certidões/Perfil_<data>.jsonl um registro por linha:
+#
+#   {"type": "execucao", ...}   estação (nome, sistema, CPUs) e opções
+#   {"type": "etapa", ...}      tempo de relógio e de CPU, bytes e arquivos
+#                               de cada etapa (pastas, transferência, PDF...);
+#                               pre_varredura e segmentos ocorrem dentro da
+#                               transferência e estão contidas no tempo dela
+#   {"type": "arquivo", ...}    tempo de cada arquivo copiado, gravado assim
+#                               que o arquivo é concluído
+#   {"type": "memoria", ...}    maiores alocações (com rastreamento de memória)
+#   {"type": "resumo", ...}     totais da execução
+#
+# Com cprofile, a thread que coordena a aquisição (enumeração, diário,
+# manifesto, PDF) é perfilada e o resultado vai para Perfil_<data>.prof,
+# legível com pstats ou snakeviz. O tempo dos workers aparece por arquivo.
+class AcquisitionProfiler:
+    def __init__(self, cprofile=False, memory=False):
+        self.path = None
+        self.file = None
+        self.pending = []  # registros anteriores à criação da pasta de evidências
+        self.stages = []
+        self.files = 0
+        self.file_bytes = 0
+        self.started = time.perf_counter()
+        self.cpu_started = time.process_time()
+        self.memory = memory
+        # Só interrompe no fim o rastreamento que ele mesmo iniciou (não o de
+        # quem já rastreava, como python -X tracemalloc)
+        self.started_tracing = memory and not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+        self.profile = None
+        if cprofile:
+            import cProfile  # import local: só carregado quando solicitado
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+    def open(self, path, options):
+        self.path = path
+        self.file = open(path, "w", encoding="utf-8")
+        self.write({
+            "type": "execucao",
+            "station": platform.node(),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "options": options,
+        })
+        for record in self.pending:
+            self.write(record)
+        self.pending = []
+
+    def write(self, record):
+        if self.file is None:
+            self.pending.append(record)
+        else:
+            self.file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    @contextmanager
+    def stage(self, name):
+        # O bloco pode preencher "bytes" e "files" no registro devolvido
+        record = {"type": "etapa", "name": name, "bytes": 0, "files": 0}
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+        if self.memory and hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        try:
+            yield record
+        finally:
+            record["wall"] = round(time.perf_counter() - started, 6)
+            record["cpu"] = round(time.process_time() - cpu_started, 6)
+            if self.memory:
+                current, peak = tracemalloc.get_traced_memory()
+                record["memory_current"] = current
+                record["memory_peak"] = peak
+            self.stages.append(record)
+            self.write(record)
+
+    def file_done(self, relative, size, wall, cpu, origin):
+        self.files += 1
+        self.file_bytes += size
+        self.write({
+            "type": "arquivo", "relative": relative.replace(os.sep, "/"), "size": size,
+            "wall": round(wall, 6), "cpu": round(cpu, 6), "origin": origin,
+        })
+
+    def close(self, status="concluida"):
+        if self.profile:
+            self.profile.disable()
+            if self.path:
+                self.profile.dump_stats(os.path.splitext(self.path)[0] + ".prof")
+        if self.memory:
+            top = tracemalloc.take_snapshot().statistics("lineno")[:TOP_ALLOCATIONS]
+            self.write({
+                "type": "memoria",
+                "top": [
+                    {"location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                     "bytes": stat.size, "count": stat.count}
+                    for stat in top
+                ],
+            })
+            if self.started_tracing:
+                tracemalloc.stop()
+        self.write({
+            "type": "resumo",
+            "status": status,
+            "wall": round(time.perf_counter() - self.started, 6),
+            "cpu": round(time.process_time() - self.cpu_started, 6),
+            "files": self.files,
+            "bytes": self.file_bytes,
+            "stages": {stage["name"]: stage["wall"] for stage in self.stages},
+        })
+        if self.file:
+            self.file.close()
+            self.file = None
+
+@contextmanager
+def profile_stage(profiler, name):
+    # Como profiler.stage, mas aceita profiler None (registro desativado)
+    if profiler is None:
+        yield {}
+        return
+    with profiler.stage(name) as record:
+        yield record
+
+# -------------------- Consolidação entre Estações --------------------
+def find_profiles(paths):
+    # Aceita arquivos Perfil_*.jsonl ou pastas, percorridas recursivamente
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(glob.glob(os.path.join(path, "**", "Perfil_*.jsonl"), recursive=True))
+        else:
+            found.append(path)
+    return sorted(found)
+
+def aggregate_profiles(paths):
+    # {(estação, etapa): {"runs", "wall", "cpu", "bytes", "files"}}, somados
+    # entre todas as aquisições encontradas
+    totals = {}
+    for path in find_profiles(paths):
+        station = None
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record["type"] == "execucao":
+                    station = record["station"]
+                elif record["type"] == "etapa":
+                    total = totals.setdefault(
+                        (station, record["name"]), {"runs": 0, "wall": 0.0, "cpu": 0.0, "bytes": 0, "files": 0}
+                    )
+                    total["runs"] += 1
+                    for key in ("wall", "cpu", "bytes", "files"):
+                        total[key] += record.get(key, 0)
+    return totals
@@ -0,0 +1,183 @@
+import os
+import stat
+import time
+import threading
+from hashpm_core import (
+    DEFAULT_OPTIONS, AcquisitionError, IncompleteDataError, ProgressMonitor, evidence_folder_path,
+    run_acquisition, validate_acquisition_data
+)
+
+# Aquisições simultâneas, no total e por dispositivo de origem. Dois leitores
+# sequenciais no mesmo disco (sobretudo HD e pendrive) disputam a cabeça de
+# leitura e somam menos que um sozinho; dispositivos diferentes rendem em
+# paralelo.
+DEFAULT_MAX_JOBS = 2
+DEFAULT_PER_DEVICE = 1
+
+JOB_STATES = {
+    "fila": "Na fila",
+    "andamento": "Em andamento",
+    "concluida": "Concluída",
+    "falha": "Falhou",
+    "cancelada": "Cancelada",
+}
+
+def source_devices(file_paths):
+    # Dispositivo (st_dev) de cada arquivo ou pasta de origem ou, na imagem
+    # de um dispositivo de bloco, o próprio dispositivo (st_rdev); caminhos
+    # inacessíveis ficam para a própria aquisição relatar
+    devices = set()
+    for path in file_paths:
+        try:
+            info = os.stat(path)
+        except OSError:
+            continue
+        devices.add(info.st_rdev if stat.S_ISBLK(info.st_mode) else info.st_dev)
+    return devices
+
+# -------------------- Fila de Aquisições --------------------
+# Cada tarefa é uma aquisição completa (arquivos, dados do apreensor e do
+# proprietário, opções). A fila é percorrida em ordem, mas uma tarefa cujo
+# dispositivo de origem está ocupado não impede a seguinte de começar se a
+# dela estiver livre. Duas tarefas para a mesma pasta de evidências (mesma
+# portaria) nunca rodam juntas. Não há thread de agendamento: a fila é
+# reavaliada a cada inclusão e a cada término. O progresso de cada tarefa é
+# publicado no seu ProgressMonitor, lido pela interface como o da aquisição
+# avulsa; on_finished(tarefa) é chamado na thread da tarefa.
+class AcquisitionQueue:
+    def __init__(self, max_jobs=DEFAULT_MAX_JOBS, per_device=DEFAULT_PER_DEVICE, on_finished=None):
+        self.max_jobs = max(1, max_jobs)
+        self.per_device = max(1, per_device)
+        self.on_finished = on_finished
+        self.jobs = []
+        self.device_load = {}
+        self.busy_folders = set()
+        self.next_id = 1
+        self.condition = threading.Condition()
+
+    def submit(self, file_paths, user_data, proprietario_data, options=None):
+        # Dados incompletos ou inválidos são recusados já na inclusão
+        if not file_paths:
+            raise IncompleteDataError("Selecione pelo menos um arquivo ou pasta!")
+        validate_acquisition_data(user_data, proprietario_data)
+        options = dict(options or {})
+        job = {
+            "id": None,
+            "portaria": user_data["Portaria"],
+            "file_paths": list(file_paths),
+            "user_data": user_data,
+            "proprietario_data": proprietario_data,
+            "options": options,
+            "devices": source_devices(file_paths),
+            "folder": os.path.abspath(evidence_folder_path(
+                user_data["Portaria"], options.get("base_dir", DEFAULT_OPTIONS["base_dir"])
+            )),
+            "monitor": ProgressMonitor(),
+            "state": "fila",
+            "result": None,
+            "error": None,
+            "queued_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        with self.condition:
+            job["id"] = self.next_id
+            self.next_id += 1
+            self.jobs.append(job)
+            self.schedule()
+        return job
+
+    def cancel(self, job_id):
+        # Apenas tarefas ainda na fila; a aquisição em andamento pode ser
+        # interrompida e retomada depois pelo diário
+        with self.condition:
+            for job in self.jobs:
+                if job["id"] == job_id and job["state"] == "fila":
+                    job["state"] = "cancelada"
+                    job["finished_at"] = time.time()
+                    self.condition.notify_all()
+                    return True
+        return False
+
+    def clear_finished(self):
+        with self.condition:
+            self.jobs = [job for job in self.jobs if job["state"] in ("fila", "andamento")]
+
+    def can_start(self, job):
+        return (
+            job["folder"] not in self.busy_folders
+            and all(self.device_load.get(device, 0) < self.per_device for device in job["devices"])
+        )
+
+    def schedule(self):
+        # Chamado com self.condition adquirido
+        running = sum(job["state"] == "andamento" for job in self.jobs)
+        for job in self.jobs:
+            if running >= self.max_jobs:
+                break
+            if job["state"] == "fila" and self.can_start(job):
+                job["state"] = "andamento"
+                job["started_at"] = time.time()
+                for device in job["devices"]:
+                    self.device_load[device] = self.device_load.get(device, 0) + 1
+                self.busy_folders.add(job["folder"])
+                running += 1
+                threading.Thread(target=self.run_job, args=(job,), daemon=True).start()
+
+    def run_job(self, job):
+        monitor = job["monitor"]
+        monitor.reset()  # o tempo decorrido conta a partir do início, não da inclusão
+        state = "falha"
+        try:
+            job["result"] = run_acquisition(
+                job["file_paths"], job["user_data"], job["proprietario_data"], job["options"],
+                monitor, monitor.status
+            )
+            state = "concluida"
+        except AcquisitionError as e:
+            job["error"] = str(e)
+        except Exception as e:
+            # Um erro inesperado encerra só esta tarefa; a fila continua
+            job["error"] = f"{type(e).__name__}: {e}"
+        finally:
+            # Também numa BaseException (ex.: SystemExit na thread): o
+            # dispositivo e a pasta não podem ficar ocupados para sempre
+            if state == "falha" and job["error"] is None:
+                job["error"] = "aquisição interrompida"
+            with self.condition:
+                job["state"] = state
+                job["finished_at"] = time.time()
+                for device in job["devices"]:
+                    self.device_load[device] -= 1
+                self.busy_folders.discard(job["folder"])
+                self.schedule()
+                self.condition.notify_all()
+        if self.on_finished:
+            self.on_finished(job)
+
+    def pending(self):
+        with self.condition:
+            return sum(job["state"] in ("fila", "andamento") for job in self.jobs)
+
+    def wait(self):
+        # Bloqueia até que não haja tarefas na fila nem em andamento
+        with self.condition:
+            while any(job["state"] in ("fila", "andamento") for job in self.jobs):
+                self.condition.wait()
+
+    def snapshot(self):
+        # Estado de cada tarefa para exibição, sem expor os dicionários internos
+        with self.condition:
+            jobs = list(self.jobs)
+        return [
+            {
+                "id": job["id"],
+                "portaria": job["portaria"],
+                "items": len(job["file_paths"]),
+                "state": job["state"],
+                "error": job["error"],
+                "progress": job["monitor"].snapshot() if job["state"] == "andamento" else None,
+                "base_folder": job["result"]["base_folder"] if job["result"] else None,
+            }
+            for job in jobs
+        ]
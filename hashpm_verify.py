@@ -0,0 +1,250 @@
+import os
+import glob
+import json
+from datetime import datetime
+from hashpm_core import (
+    DEFAULT_WORKERS, AcquisitionError, ByteProgress, FileOperationError,
+    hash_file, iter_directory, run_parallel
+)
+
+VERIFY_MODES = {
+    "Completa (recalcula os hashes)": "completo",
+    "Rápida (tamanho e data de modificação)": "rapido",
+}
+# Sistemas de arquivos como FAT guardam a data de modificação com resolução de 2 s
+MTIME_TOLERANCE_NS = 2 * 10**9
+
+# -------------------- Leitura do Manifesto --------------------
+def find_manifests(base_folder):
+    # Manifestos de todas as aquisições feitas para a pasta, do mais antigo ao mais recente
+    return sorted(glob.glob(os.path.join(base_folder, "Certidões", "Manifesto_*.jsonl")))
+
+def load_manifests(manifest_paths):
+    # {caminho relativo: registro}; em aquisições repetidas para a mesma pasta
+    # vale o registro mais recente. Uma linha final truncada é ignorada.
+    records = {}
+    for path in manifest_paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                records[record["relative_path"]] = record
+    return records
+
+def evidence_base_folder(folder):
+    # Aceita tanto a pasta da portaria quanto a sua subpasta Arquivos
+    folder = os.path.normpath(folder)
+    return os.path.dirname(folder) if os.path.basename(folder) == "Arquivos" else folder
+
+# -------------------- Verificação --------------------
+def hash_for_verification(file_path, algorithms, progress_callback=None):
+    # Um arquivo ilegível é uma divergência a relatar, não motivo para interromper a verificação
+    try:
+        return hash_file(file_path, algorithms, progress_callback=progress_callback), None
+    except OSError as e:
+        return None, e.strerror or str(e)
+
+def verify_evidence(base_folder, mode="completo", manifest_paths=None, workers=DEFAULT_WORKERS,
+                    use_processes=False, progress_callback=None, recheck=None):
+    # Confere Arquivos/ com o manifesto. No modo rápido compara apenas tamanho
+    # e data de modificação; no completo recalcula em paralelo os hashes de
+    # todos os arquivos com o tamanho esperado. Arquivos adquiridos por
+    # segmentos são conferidos segmento a segmento, o que paraleliza a
+    # verificação de uma única imagem grande e localiza a corrupção.
+    # recheck: relatório de uma verificação anterior (ver save_report); só os
+    # arquivos então divergentes são conferidos e, nos segmentados, só os
+    # segmentos então danificados. Na organização por conteúdo, cada objeto
+    # é lido uma única vez.
+    from hashpm_piecewise import hash_segments, damaged_segments, record_consistent, segment_ranges
+
+    base_folder = evidence_base_folder(base_folder)
+    arquivos_folder = os.path.join(base_folder, "Arquivos")
+    if not os.path.isdir(arquivos_folder):
+        raise AcquisitionError(f"Pasta de evidências não encontrada: {arquivos_folder}")
+    manifest_paths = manifest_paths or find_manifests(base_folder)
+    if not manifest_paths:
+        raise AcquisitionError(
+            "Nenhum manifesto encontrado na pasta Certidões; a verificação exige uma aquisição "
+            "feita com manifesto."
+        )
+    records = load_manifests(manifest_paths)
+    segment_scope = None
+    if recheck is not None:
+        scope = {relative for relative, _ in recheck["modified"]} | set(recheck["missing"])
+        records = {relative: record for relative, record in records.items() if relative in scope}
+        segment_scope = recheck.get("damaged_segments", {})
+    # Local de cada registro em Arquivos/: o próprio caminho relativo ou, na
+    # organização por conteúdo, o objeto, que é conferido uma única vez para
+    # todos os arquivos que apontam para ele
+    locations = {}
+    for relative, record in records.items():
+        locations.setdefault(record.get("object") or relative, []).append(relative)
+
+    report = {
+        "base_folder": base_folder,
+        "manifest_paths": list(manifest_paths),
+        "mode": mode,
+        "started_at": datetime.now(),
+        "expected": len(records),
+        "ok": [],
+        "modified": [],  # (caminho relativo, motivo)
+        "missing": [],
+        "extra": [],
+        "damaged_segments": {},  # caminho relativo: [índices]
+    }
+
+    def mark_ok(location):
+        report["ok"].extend(locations[location])
+
+    def mark_modified(location, reason):
+        report["modified"].extend((relative, reason) for relative in locations[location])
+
+    def candidates():
+        if recheck is None:
+            yield from iter_directory(arquivos_folder)
+            return
+        for location in sorted(locations):
+            file_path = os.path.join(arquivos_folder, *location.split("/"))
+            if os.path.isfile(file_path):
+                yield file_path, location, os.path.getsize(file_path)
+
+    found = set()
+    to_hash = []  # (local, caminho, algoritmos, tamanho)
+    to_segment = []  # (local, caminho, tamanho)
+    segment_indexes = {}
+    piecewise_records = {}
+    for file_path, location, size in candidates():
+        location = location.replace(os.sep, "/")
+        if location not in locations:
+            report["extra"].append(location)
+            continue
+        found.add(location)
+        location_records = [records[relative] for relative in locations[location]]
+        record = location_records[0]
+        piecewise = next((r["piecewise"] for r in location_records if r.get("piecewise")), None)
+        if size != record["size"]:
+            mark_modified(location, f"tamanho {size} bytes, esperado {record['size']}")
+        elif mode == "rapido":
+            # Um objeto compartilhado tem uma só data de modificação: confere-se o tamanho
+            mtime_ns = os.stat(file_path).st_mtime_ns
+            if not record.get("object") and abs(mtime_ns - record["mtime_ns"]) > MTIME_TOLERANCE_NS:
+                mark_modified(location, "data de modificação diferente da registrada")
+            else:
+                mark_ok(location)
+        elif piecewise:
+            if not record_consistent(piecewise, size):
+                mark_modified(location, "registro de segmentos inconsistente com a raiz de Merkle")
+                continue
+            count = len(segment_ranges(size, piecewise["segment_size"]))
+            previous = next(
+                (segment_scope[relative] for relative in locations[location] if (segment_scope or {}).get(relative)),
+                None
+            )
+            segment_indexes[location] = previous if previous else list(range(count))
+            piecewise_records[location] = piecewise
+            to_segment.append((location, file_path, size))
+        else:
+            algorithms = []
+            for r in location_records:
+                algorithms.extend(name for name in (r["copy_hashes"] or r["hashes"]) if name not in algorithms)
+            to_hash.append((location, file_path, algorithms, size))
+    report["missing"] = sorted(
+        relative for location, relatives in locations.items() if location not in found for relative in relatives
+    )
+
+    segment_bytes = sum(
+        length
+        for location, _, size in to_segment
+        for offset, length in (
+            segment_ranges(size, piecewise_records[location]["segment_size"])[i] for i in segment_indexes[location]
+        )
+    )
+    progress = ByteProgress(sum(item[3] for item in to_hash) + segment_bytes, progress_callback)
+    try:
+        results = run_parallel(
+            hash_for_verification, [(file_path, algorithms) for _, file_path, algorithms, _ in to_hash],
+            [item[3] for item in to_hash], workers, use_processes, progress
+        )
+        # Arquivos com tamanhos de segmento diferentes são agrupados por tamanho
+        by_segment_size = {}
+        for item in to_segment:
+            by_segment_size.setdefault(piecewise_records[item[0]]["segment_size"], []).append(item)
+        segment_digests = {}
+        for segment_size, group in by_segment_size.items():
+            segment_digests.update(hash_segments(
+                group, segment_size, workers, use_processes, progress,
+                {location: segment_indexes[location] for location, _, _ in group}
+            ))
+    except FileOperationError as e:
+        raise AcquisitionError(f"Falha ao verificar {os.path.basename(e.file_path)}:\n{e.error}") from e
+
+    for (location, _, _, _), (digests, error) in zip(to_hash, results):
+        for relative in locations[location]:
+            record = records[relative]
+            expected = record["copy_hashes"] or record["hashes"]
+            if error:
+                report["modified"].append((relative, f"ilegível: {error}"))
+            elif any(digests[name] != expected[name] for name in expected):
+                names = [name for name in expected if digests[name] != expected[name]]
+                report["modified"].append((relative, f"hash divergente ({', '.join(names)})"))
+            else:
+                report["ok"].append(relative)
+    for location, _, _ in to_segment:
+        piecewise = piecewise_records[location]
+        damaged = damaged_segments(piecewise, segment_digests[location])
+        if damaged:
+            for relative in locations[location]:
+                report["damaged_segments"][relative] = damaged
+            listed = ", ".join(str(index) for index in damaged[:10]) + (" ..." if len(damaged) > 10 else "")
+            mark_modified(
+                location,
+                f"{len(damaged)} segmento(s) de {piecewise['segment_size']} bytes divergente(s): {listed}"
+            )
+        else:
+            mark_ok(location)
+    if progress_callback and not (to_hash or to_segment):
+        progress_callback(100)
+
+    report["modified"].sort()
+    report["extra"].sort()
+    report["intact"] = not (report["modified"] or report["missing"] or report["extra"])
+    return report
+
+def save_report(report, path):
+    # Relatório legível por máquina, que também serve de entrada para recheck
+    data = dict(report, started_at=report["started_at"].isoformat())
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1)
+
+def load_report(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def run_verification(folder, mode="completo", user_data=None, manifest_paths=None, workers=DEFAULT_WORKERS,
+                     use_processes=False, progress_callback=None, status_callback=None, recheck=None):
+    # Verifica a pasta e grava em Certidões/ a certidão de verificação e o
+    # relatório em JSON (Verificacao_<data>.json)
+    from hashpm_pdf import generate_verification_pdf  # import local, como em run_acquisition
+
+    def status(message):
+        if status_callback:
+            status_callback(message)
+
+    status("Verificando arquivos..." if mode == "rapido" else "Recalculando hashes para verificação...")
+    report = verify_evidence(folder, mode, manifest_paths, workers, use_processes, progress_callback, recheck)
+    timestamp = report["started_at"].strftime("%Y%m%d_%H%M%S")
+    pdf_path = os.path.join(report["base_folder"], "Certidões", f"Certidao_Verificacao_{timestamp}.pdf")
+    report_path = os.path.join(report["base_folder"], "Certidões", f"Verificacao_{timestamp}.json")
+    save_report(report, report_path)
+    try:
+        status("Gerando certidão de verificação...")
+        generate_verification_pdf(report, pdf_path, user_data)
+    except Exception as e:
+        raise AcquisitionError(f"Falha ao gerar a certidão de verificação:\n{e}") from e
+    status("Verificação concluída: evidências íntegras." if report["intact"]
+           else "Verificação concluída: divergências encontradas!")
+    report["pdf_path"] = pdf_path
+    report["report_path"] = report_path
+    return report
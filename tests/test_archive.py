@@ -0,0 +1,95 @@
+import io
+import tarfile
+import zipfile
+import hashlib
+import pytest
+from hashpm_archive import archive_format, archive_members, hash_archives
+
+ALGORITHMS = ["SHA-256", "MD5"]
+MEMBERS = {
+    "leia-me.txt": b"texto repetido " * 4000,
+    "midia/fotos/img_001.jpg": bytes(range(256)) * 300,
+    "midia/vazio.dat": b"",
+}
+
+def digests(data):
+    return {"SHA-256": hashlib.sha256(data).hexdigest(), "MD5": hashlib.md5(data).hexdigest()}
+
+def write_zip(path):
+    # Itens armazenados e comprimidos, em subpastas
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("midia/", b"")
+        for number, (name, data) in enumerate(MEMBERS.items()):
+            archive.writestr(name, data, zipfile.ZIP_DEFLATED if number % 2 == 0 else zipfile.ZIP_STORED)
+    return str(path)
+
+def write_tar(path, mode="w:gz", mtime=1700000000):
+    with tarfile.open(path, mode, format=tarfile.GNU_FORMAT) as archive:
+        folder = tarfile.TarInfo("midia")
+        folder.type = tarfile.DIRTYPE
+        archive.addfile(folder)
+        for name, data in MEMBERS.items():
+            info = tarfile.TarInfo(name)
+            info.size, info.mtime = len(data), mtime
+            archive.addfile(info, io.BytesIO(data))
+    return str(path)
+
+def hashed(files, workers=3):
+    return hash_archives([(key, path, archive_format(path)) for key, path in files], ALGORITHMS, workers)
+
+def test_archive_format_by_extension():
+    assert [archive_format(name) for name in ("a.ZIP", "b.tar.gz", "c.tgz", "d.docx", "e.gz")] == [
+        "zip", "tar", "tar", None, None
+    ]
+
+@pytest.mark.parametrize("name, writer", [
+    ("pacote.zip", write_zip),
+    ("pacote.tar", lambda path: write_tar(path, "w")),
+    ("pacote.tar.gz", write_tar),
+    ("pacote.tar.xz", lambda path: write_tar(path, "w:xz")),
+])
+def test_members_are_hashed_with_nested_paths(tmp_path, name, writer):
+    path = writer(tmp_path / name)
+    record = hashed([("p", path)])["p"]
+    assert record["error"] is None
+    assert {member["name"]: member["hashes"] for member in record["members"]} == {
+        name: digests(data) for name, data in MEMBERS.items()
+    }
+    assert [member["size"] for member in record["members"]] == [len(data) for data in MEMBERS.values()]
+    assert len(archive_members(record)) == len(MEMBERS)
+
+def test_corrupt_zip_member_is_isolated(tmp_path):
+    path = write_zip(tmp_path / "pacote.zip")
+    data = bytearray(open(path, "rb").read())
+    # Um byte do item armazenado: o CRC-32 acusa só esse item
+    sample = MEMBERS["midia/fotos/img_001.jpg"][1000:1032]
+    data[bytes(data).index(sample) + 3] ^= 0xFF
+    (tmp_path / "pacote.zip").write_bytes(bytes(data))
+    members = {member["name"]: member for member in hashed([("p", path)])["p"]["members"]}
+    assert members["midia/fotos/img_001.jpg"]["hashes"] is None
+    assert "BadZipFile" in members["midia/fotos/img_001.jpg"]["error"]
+    assert members["leia-me.txt"]["hashes"] == digests(MEMBERS["leia-me.txt"])
+
+def test_truncated_tar_keeps_the_members_read_before_the_error(tmp_path):
+    path = write_tar(tmp_path / "pacote.tar", "w")
+    data = open(path, "rb").read()
+    # Corte no meio do segundo item: cabeçalho da pasta, cabeçalho e dados do primeiro
+    first = 512 + 512 + -(-len(MEMBERS["leia-me.txt"]) // 512) * 512
+    (tmp_path / "pacote.tar").write_bytes(data[:first + 512 + 100])
+    record = hashed([("p", path)])["p"]
+    assert record["error"] and [member["name"] for member in record["members"]] == ["leia-me.txt"]
+    assert record["members"][0]["hashes"] == digests(MEMBERS["leia-me.txt"])
+
+def test_out_of_range_tar_mtime_is_recorded_as_unknown(tmp_path):
+    # Data fora do intervalo do time_t: o item continua listado e com hashes
+    record = hashed([("p", write_tar(tmp_path / "pacote.tar", "w", mtime=10 ** 20))])["p"]
+    assert record["error"] is None and len(record["members"]) == len(MEMBERS)
+    assert all(member["mtime"] is None and member["hashes"] for member in record["members"])
+    ok = hashed([("q", write_tar(tmp_path / "normal.tar", "w"))])["q"]
+    assert ok["members"][0]["mtime"] == "2023-11-14T22:13:20+00:00"
+
+def test_unreadable_zip_is_reported_without_members(tmp_path):
+    path = tmp_path / "falso.zip"
+    path.write_bytes(b"isto nao e um zip")
+    record = hashed([("p", str(path))])["p"]
+    assert record["members"] == [] and "BadZipFile" in record["error"]
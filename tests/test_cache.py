@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import hashlib
+import types
+import pytest
+import hashpm_cache
+from hashpm_cache import HashCache, cache_key
+from hashpm_core import acquire_files_to_evidence, hash_files
+
+ALGORITHMS = ["SHA-256", "MD5"]
+
+def digests(data):
+    return {"SHA-256": hashlib.sha256(data).hexdigest(), "MD5": hashlib.md5(data).hexdigest()}
+
+def fake_stat(ino, size=100, mtime_ns=1, dev=1):
+    return types.SimpleNamespace(st_dev=dev, st_ino=ino, st_size=size, st_mtime_ns=mtime_ns)
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = HashCache(str(tmp_path / "cache" / "hashes.sqlite3"))
+    yield cache
+    cache.close()
+
+def test_key_is_device_inode_size_and_mtime(cache):
+    stat = fake_stat(7, 100, 5)
+    cache.put_many([(stat, {"SHA-256": "a" * 64, "MD5": "b" * 32})])
+    assert cache.get(fake_stat(7, 100, 5), ALGORITHMS) == {"SHA-256": "a" * 64, "MD5": "b" * 32}
+    # Só há acerto com todos os algoritmos pedidos
+    assert cache.get(stat, ALGORITHMS + ["SHA-1"]) is None
+    for changed in (fake_stat(7, 100, 5, dev=2), fake_stat(8, 100, 5), fake_stat(7, 101, 5), fake_stat(7, 100, 6)):
+        assert cache.get(changed, ALGORITHMS) is None
+
+def test_changed_file_is_hashed_again(tmp_path, cache):
+    path = tmp_path / "arquivo.bin"
+    path.write_bytes(b"primeira versao")
+    assert hash_files([str(path)], ALGORITHMS, cache=cache) == [digests(b"primeira versao")]
+    assert cache.get(os.stat(path), ALGORITHMS) == digests(b"primeira versao")
+    # Mesmo tamanho, outra data de modificação: o hash antigo não é reaproveitado
+    stat = os.stat(path)
+    path.write_bytes(b"segunda versao!")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert cache.get(os.stat(path), ALGORITHMS) is None
+    assert hash_files([str(path)], ALGORITHMS, cache=cache) == [digests(b"segunda versao!")]
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    clock = iter(range(1, 1000))
+    monkeypatch.setattr(hashpm_cache, "time", types.SimpleNamespace(time=lambda: next(clock)))
+    cache = HashCache(str(tmp_path / "hashes.sqlite3"), max_bytes=0)
+    for batch in range(8):
+        cache.put_many([(fake_stat(batch * 1000 + i), {"SHA-256": f"{batch:064x}"}) for i in range(500)])
+    full = cache.used_bytes()
+    # A primeira leva volta a ser usada e passa à frente das demais
+    assert cache.get(fake_stat(0), ["SHA-256"]) == {"SHA-256": f"{0:064x}"}
+    cache.max_bytes = full // 2
+    cache.put_many([(fake_stat(9000), {"SHA-256": "f" * 64})])
+    assert cache.used_bytes() <= full // 2
+    assert cache.get(fake_stat(0), ["SHA-256"]) is not None
+    assert cache.get(fake_stat(9000), ["SHA-256"]) is not None
+    assert cache.get(fake_stat(1000), ["SHA-256"]) is None
+    cache.close()
+
+class LockedConnection:
+    # Conexão em que toda gravação falha como com outra instância segurando o banco
+    def __init__(self, connection):
+        self.connection = connection
+
+    def executemany(self, *args):
+        raise sqlite3.OperationalError("database is locked")
+
+    def __getattr__(self, name):
+        return getattr(self.connection, name)
+
+def test_cache_write_failures_do_not_fail_the_acquisition(tmp_path, cache):
+    source = tmp_path / "origem"
+    source.mkdir()
+    (source / "a.txt").write_bytes(b"conteudo")
+    cache.put_many([(os.stat(source / "a.txt"), digests(b"antigo"))])
+    cache.connection = LockedConnection(cache.connection)
+    assert cache.get(os.stat(source / "a.txt"), ALGORITHMS) == digests(b"antigo")
+    (source / "a.txt").write_bytes(b"conteudo novo")
+    dest = tmp_path / "Arquivos"
+    dest.mkdir()
+    copied, hashes, _ = acquire_files_to_evidence([str(source / "a.txt")], str(dest), {"algorithms": ALGORITHMS},
+                                                  cache=cache)
+    assert hashes[copied[0]] == digests(b"conteudo novo")
+    assert "database is locked" in str(cache.write_error)
@@ -0,0 +1,93 @@
+import json
+import struct
+import hashlib
+import pytest
+import hashpm_core
+import hashpm_hashset
+from hashpm_core import AcquisitionError, load_hash_sets
+from hashpm_hashset import MAGIC, HashSet, build_hash_set, match_hash_sets
+
+def write_list(path, digests):
+    path.write_text("\n".join(digests) + "\n", encoding="utf-8")
+    return str(path)
+
+def write_raw_set(path, header, payload=b""):
+    header_bytes = json.dumps(header).encode("utf-8")
+    path.write_bytes(MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes + payload)
+    return str(path)
+
+@pytest.mark.parametrize("header", [
+    {"name": "x", "kind": "conhecido"},
+    {"name": "x", "kind": "conhecido", "algorithm": "MD5", "digest_size": 16, "count": "1", "bloom_bits": 64},
+    [1, 2, 3],
+])
+def test_header_with_missing_or_mistyped_keys_is_invalid(tmp_path, header):
+    path = write_raw_set(tmp_path / "ruim.hpmset", header, bytes(64))
+    with pytest.raises(ValueError, match="Cabeçalho inválido"):
+        HashSet(path)
+
+def test_ambiguous_digest_length_requires_algorithm(tmp_path):
+    source = write_list(tmp_path / "lista.txt", [hashlib.sha512(b"a").hexdigest()])
+    output = tmp_path / "conjunto.hpmset"
+    with pytest.raises(ValueError, match="SHA-512 ou BLAKE2b"):
+        build_hash_set([source], str(output), "Lista", "conhecido")
+    assert not output.exists() and sorted(p.name for p in tmp_path.iterdir()) == ["lista.txt"]
+
+    digest = hashlib.blake2b(b"a").hexdigest()
+    write_list(tmp_path / "lista.txt", [digest])
+    assert build_hash_set([source], str(output), "Lista", "conhecido", "BLAKE2b")["algorithm"] == "BLAKE2b"
+    hash_set = HashSet(str(output))
+    assert hash_set.algorithm == "BLAKE2b" and digest in hash_set
+    hash_set.close()
+
+def test_round_trip_with_external_sort_and_duplicates(tmp_path, monkeypatch):
+    monkeypatch.setattr(hashpm_hashset, "RUN_RECORDS", 7)
+    digests = [hashlib.md5(str(i).encode()).hexdigest() for i in range(50)]
+    plain = write_list(tmp_path / "lista.txt", digests[:30] + digests[:5])
+    # CSV no formato do NSRL: o SHA-1 vem antes do MD5 e é descartado pelo tamanho
+    nsrl = tmp_path / "nsrl.csv"
+    nsrl.write_text('"SHA-1","MD5","FileName"\n' + "".join(
+        f'"{hashlib.sha1(d.encode()).hexdigest().upper()}","{d.upper()}","f{i}.dll"\n'
+        for i, d in enumerate(digests[25:])
+    ), encoding="utf-8")
+    output = str(tmp_path / "conjunto.hpmset")
+    header = build_hash_set([plain, str(nsrl)], output, "NSRL", "conhecido", "MD5")
+    assert (header["count"], header["algorithm"], header["digest_size"]) == (50, "MD5", 16)
+    assert not [p.name for p in tmp_path.iterdir() if p.name.startswith(".")]
+
+    hash_set = HashSet(output)
+    assert (hash_set.name, hash_set.kind, hash_set.count) == ("NSRL", "conhecido", 50)
+    assert all(d in hash_set and d.upper() in hash_set for d in digests)
+    assert hashlib.md5(b"fora").hexdigest() not in hash_set
+    assert hashlib.sha256(b"0").hexdigest() not in hash_set
+    assert match_hash_sets([hash_set], {"MD5": digests[3], "SHA-256": "0" * 64}) == [
+        {"name": "NSRL", "kind": "conhecido"}
+    ]
+    assert match_hash_sets([hash_set], {"SHA-256": "0" * 64}) == []
+    hash_set.close()
+
+def test_truncated_or_foreign_files_are_rejected(tmp_path, monkeypatch):
+    digests = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(100)]
+    output = tmp_path / "conjunto.hpmset"
+    build_hash_set([write_list(tmp_path / "lista.txt", digests)], str(output), "Lista", "alerta")
+    data = output.read_bytes()
+    cases = {
+        "vazio.hpmset": b"",
+        "cortado.hpmset": data[:-32],
+        "cabecalho.hpmset": data[:len(MAGIC) + 20],
+        "estranho.hpmset": b"PK\x03\x04" + data[4:],
+    }
+    for name, content in cases.items():
+        (tmp_path / name).write_bytes(content)
+        with pytest.raises(ValueError):
+            HashSet(str(tmp_path / name))
+
+    status = []
+    with pytest.raises(AcquisitionError):
+        load_hash_sets([str(output), str(tmp_path / "cortado.hpmset")], status.append)
+    # Na pasta padrão, o conjunto corrompido é apenas sinalizado
+    monkeypatch.setattr(hashpm_core, "find_hash_sets", lambda: [str(output), str(tmp_path / "cortado.hpmset")])
+    hash_sets = load_hash_sets(None, status.append)
+    assert [hash_set.name for hash_set in hash_sets] == ["Lista"]
+    assert status and "cortado.hpmset" in status[0]
+    hash_sets[0].close()
@@ -0,0 +1,185 @@
+import os
+import errno
+import ctypes
+import hashlib
+import pytest
+import hashpm_image
+from hashpm_core import get_aligned_buffer
+from hashpm_journal import AcquisitionJournal
+from hashpm_image import add_bad_range, completed_image, image_device
+
+pytestmark = pytest.mark.skipif(not hasattr(os, "preadv"), reason="leituras posicionais (os.preadv) indisponíveis")
+
+MIB = 1024 * 1024
+SECTOR = 512
+SIZE = 8 * MIB
+BLOCK = MIB
+# Capturada antes de qualquer monkeypatch, para que as injeções não se acumulem
+REAL_PREADV = getattr(os, "preadv", None)
+
+@pytest.fixture
+def sparse_image(tmp_path):
+    # Arquivo esparso de 8 MiB com dados apenas em alguns trechos
+    path = tmp_path / "origem.img"
+    with open(path, "wb") as f:
+        f.truncate(SIZE)
+        for offset in (0, 3 * MIB + 4096, 6 * MIB - 700, SIZE - 4096):
+            f.seek(offset)
+            f.write(os.urandom(4096))
+    return str(path)
+
+def inject_errors(monkeypatch, bad_sectors, transient=(), fatal_from=None):
+    # Leituras que tocam um setor de bad_sectors falham com EIO; as de
+    # transient falham só na primeira tentativa; a partir de fatal_from, ENODEV
+    attempts = {}
+
+    def preadv(fd, buffers, offset):
+        length = sum(len(buffer) for buffer in buffers)
+        touched = range(offset // SECTOR, (offset + length - 1) // SECTOR + 1)
+        if fatal_from is not None and offset + length > fatal_from:
+            raise OSError(errno.ENODEV, "dispositivo removido")
+        if any(sector in bad_sectors for sector in touched):
+            raise OSError(errno.EIO, "erro de E/S")
+        for sector in touched:
+            if sector in transient:
+                attempts[sector] = attempts.get(sector, 0) + 1
+                if attempts[sector] == 1:
+                    raise OSError(errno.EIO, "erro de E/S")
+        return REAL_PREADV(fd, buffers, offset)
+
+    monkeypatch.setattr(os, "preadv", preadv)
+    return attempts
+
+def expected_sha256(path, bad_ranges):
+    data = bytearray(open(path, "rb").read())
+    for start, length in bad_ranges:
+        data[start:start + length] = bytes(length)
+    return hashlib.sha256(bytes(data)).hexdigest()
+
+def test_bad_sectors_are_zero_filled_and_coalesced(sparse_image, tmp_path, monkeypatch):
+    first = (3 * MIB + 4096) // SECTOR
+    lone = (6 * MIB - 700) // SECTOR
+    attempts = inject_errors(monkeypatch, {first, first + 1, first + 2, lone}, transient={10})
+    dest = str(tmp_path / "imagem.dd")
+    hashes, image, _ = image_device(sparse_image, dest, ["SHA-256", "MD5"], BLOCK, retries=2)
+
+    assert image["bad_ranges"] == [[first * SECTOR, 3 * SECTOR], [lone * SECTOR, SECTOR]]
+    assert image["bad_bytes"] == 4 * SECTOR
+    assert image["size"] == SIZE and image["sector_size"] == SECTOR
+    # Setor com falha transitória: relido na segunda tentativa, fora dos intervalos
+    assert attempts[10] == 2
+    with open(dest, "rb") as f:
+        f.seek(first * SECTOR)
+        assert f.read(3 * SECTOR) == bytes(3 * SECTOR)
+    assert hashes["SHA-256"] == expected_sha256(sparse_image, image["bad_ranges"])
+    assert hashes["SHA-256"] == hashlib.sha256(open(dest, "rb").read()).hexdigest()
+
+def test_add_bad_range_merges_only_contiguous_ranges():
+    ranges = []
+    for offset in (0, 512, 1024, 4096, 4608):
+        add_bad_range(ranges, offset, 512)
+    assert ranges == [[0, 1536], [4096, 1024]]
+
+def test_certificate_lists_coalesced_sector_ranges(monkeypatch):
+    import hashpm_pdf
+    listed = []
+    monkeypatch.setattr(hashpm_pdf, "draw_plain_list", lambda writer, title, lines: listed.extend(lines))
+    monkeypatch.setattr(hashpm_pdf.PageWriter, "paragraph", lambda *args, **kwargs: None)
+    info = {"relative_path": "sdb.dd", "image": {
+        "device": "/dev/sdb", "size": SIZE, "sector_size": SECTOR, "block_size": BLOCK, "retries": 2,
+        "bad_ranges": [[1536, 1536], [8192, 512]], "bad_bytes": 2048,
+    }}
+    writer = hashpm_pdf.PageWriter.__new__(hashpm_pdf.PageWriter)
+    hashpm_pdf.draw_image_summary(writer, ["sdb.dd"], {"sdb.dd": info})
+    assert listed[0].startswith("setores 3 a 5 (bytes 1536 a 3071")
+    assert listed[1].startswith("setores 16 a 16 (bytes 8192 a 8703")
+
+def test_resume_after_interrupt_keeps_bad_ranges(sparse_image, tmp_path, monkeypatch):
+    monkeypatch.setattr(hashpm_image, "CHECKPOINT_INTERVAL", 2 * MIB)
+    bad = (3 * MIB + 4096) // SECTOR
+    dest = str(tmp_path / "imagem.dd")
+
+    inject_errors(monkeypatch, {bad}, fatal_from=5 * MIB)
+    journal = AcquisitionJournal(str(tmp_path))
+    with pytest.raises(OSError) as interrupted:
+        image_device(sparse_image, dest, ["SHA-256"], BLOCK, 1, journal.checkpointer("imagem.dd", sparse_image))
+    assert interrupted.value.errno == errno.ENODEV
+    journal.close()
+
+    inject_errors(monkeypatch, {bad})
+    journal = AcquisitionJournal(str(tmp_path))
+    hashes, image, _ = image_device(sparse_image, dest, ["SHA-256"], BLOCK, 1,
+                                    journal.checkpointer("imagem.dd", sparse_image))
+    journal.close()
+    assert image["resumed_from"] == 4 * MIB
+    assert image["bad_ranges"] == [[bad * SECTOR, SECTOR]]
+    assert hashes["SHA-256"] == expected_sha256(sparse_image, image["bad_ranges"])
+
+def test_resume_discards_checkpoint_when_image_changed(sparse_image, tmp_path, monkeypatch):
+    monkeypatch.setattr(hashpm_image, "CHECKPOINT_INTERVAL", 2 * MIB)
+    dest = str(tmp_path / "imagem.dd")
+    inject_errors(monkeypatch, set(), fatal_from=5 * MIB)
+    journal = AcquisitionJournal(str(tmp_path))
+    with pytest.raises(OSError):
+        image_device(sparse_image, dest, ["SHA-256"], BLOCK, 1, journal.checkpointer("imagem.dd", sparse_image))
+    journal.close()
+    with open(dest, "r+b") as f:
+        f.write(b"adulterado")
+
+    inject_errors(monkeypatch, set())
+    journal = AcquisitionJournal(str(tmp_path))
+    hashes, image, _ = image_device(sparse_image, dest, ["SHA-256"], BLOCK, 1,
+                                    journal.checkpointer("imagem.dd", sparse_image))
+    journal.close()
+    assert image["resumed_from"] == 0
+    assert hashes["SHA-256"] == expected_sha256(sparse_image, [])
+
+def test_segments_are_hashed_from_the_device_read(sparse_image, tmp_path):
+    hashes, _, digests = image_device(sparse_image, str(tmp_path / "imagem.dd"), ["SHA-256"], BLOCK, 0,
+                                      segment_size=3 * MIB)
+    data = open(sparse_image, "rb").read()
+    segments = range(0, SIZE, 3 * MIB)
+    assert digests == {i: hashlib.sha256(data[o:o + 3 * MIB]).hexdigest() for i, o in enumerate(segments)}
+    assert hashes["SHA-256"] == hashlib.sha256(data).hexdigest()
+
+def test_aligned_buffer_is_page_aligned():
+    view = get_aligned_buffer(BLOCK)
+    assert ctypes.addressof(ctypes.c_char.from_buffer(view)) % 4096 == 0
+
+def test_direct_mode_falls_back_when_filesystem_refuses(sparse_image, tmp_path, monkeypatch):
+    # tmpfs e alguns sistemas de arquivos recusam O_DIRECT na abertura ou na
+    # leitura (EINVAL); a imagem sai igual à do modo com cache
+    refused = []
+
+    def preadv(fd, buffers, offset):
+        import fcntl
+        if fcntl.fcntl(fd, fcntl.F_GETFL) & getattr(os, "O_DIRECT", 0):
+            refused.append(offset)
+            raise OSError(errno.EINVAL, "argumento inválido")
+        return REAL_PREADV(fd, buffers, offset)
+
+    monkeypatch.setattr(os, "preadv", preadv)
+    direct, image, _ = image_device(sparse_image, str(tmp_path / "direta.dd"), ["SHA-256"], BLOCK, 0,
+                                    io_mode="direto")
+    cached, _, _ = image_device(sparse_image, str(tmp_path / "cache.dd"), ["SHA-256"], BLOCK, 0)
+    assert direct == cached
+    assert image["bad_ranges"] == []
+    assert len(refused) <= 1
+
+def test_completed_image_is_reused_from_the_journal(sparse_image, tmp_path):
+    dest = tmp_path / "imagem.dd"
+    hashes, image, _ = image_device(sparse_image, str(dest), ["SHA-256"], BLOCK, 0)
+    journal = AcquisitionJournal(str(tmp_path))
+    journal.file_done("imagem.dd", sparse_image, None, hashes, hashes, str(dest), image=image)
+    journal.close()
+
+    journal = AcquisitionJournal(str(tmp_path))
+    assert completed_image(journal, "imagem.dd", sparse_image, SIZE, str(dest), ["SHA-256"], True) == (
+        hashes, hashes, image, None
+    )
+    # Outro tamanho de dispositivo, ou uma cópia incompleta, não são reaproveitados
+    assert completed_image(journal, "imagem.dd", sparse_image, SIZE - SECTOR, str(dest), ["SHA-256"], True) is None
+    with open(dest, "r+b") as f:
+        f.truncate(SIZE - SECTOR)
+    assert completed_image(journal, "imagem.dd", sparse_image, SIZE, str(dest), ["SHA-256"], True) is None
+    journal.close()
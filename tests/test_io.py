@@ -0,0 +1,195 @@
+import os
+import errno
+import hashlib
+import pytest
+import hashpm_core
+from hashpm_core import (
+    IO_MODES, ByteProgress, FileOperationError, acquire_file, acquire_files_to_evidence, copy_and_verify_file,
+    copy_file, copy_files_to_evidence, hash_file, open_for_hashing, run_pipeline
+)
+
+MIB = 1024 * 1024
+ALGORITHMS = ["SHA-256", "MD5", "SHA-1"]
+# Tamanhos vazios, menores que um setor, múltiplos do bloco e desalinhados
+SIZES = [0, 1, 511, 64 * 1024, 3 * MIB + 123]
+REAL_OS_OPEN = os.open
+
+def digests(data):
+    return {name: hashlib.new(name.replace("-", "").lower(), data).hexdigest() for name in ALGORITHMS}
+
+@pytest.fixture(params=SIZES)
+def source(request, tmp_path):
+    data = os.urandom(request.param)
+    path = tmp_path / f"origem_{request.param}.bin"
+    path.write_bytes(data)
+    return str(path), data
+
+@pytest.mark.parametrize("io_mode", list(IO_MODES.values()))
+def test_every_io_mode_gives_the_same_hashes_and_copies(source, tmp_path, io_mode):
+    path, data = source
+    expected = digests(data)
+    assert hash_file(path, ALGORITHMS, io_mode=io_mode) == expected
+    assert hash_file(path, ALGORITHMS, use_mmap=True, io_mode=io_mode) == expected
+    for transfer in (acquire_file, copy_and_verify_file):
+        dest = tmp_path / f"{transfer.__name__}.bin"
+        done = []
+        source_hashes, copy_hashes, _ = transfer(path, str(dest), True, ALGORITHMS, io_mode=io_mode,
+                                                 progress_callback=done.append)
+        assert source_hashes == copy_hashes == expected
+        assert dest.read_bytes() == data
+        assert os.stat(dest).st_mtime_ns == os.stat(path).st_mtime_ns
+        # acquire_file lê a origem uma vez; a cópia pelo kernel a relê para o hash
+        assert sum(done) == len(data) * (2 if transfer is acquire_file else 3)
+
+def test_tee_copy_hashes_the_source_in_one_read(tmp_path, monkeypatch):
+    data = os.urandom(2 * MIB + 7)
+    path = tmp_path / "origem.bin"
+    path.write_bytes(data)
+    opened = []
+    real_open_for_hashing = hashpm_core.open_for_hashing
+
+    def recording_open(file_path, io_mode="cache"):
+        opened.append(file_path)
+        return real_open_for_hashing(file_path, io_mode)
+
+    monkeypatch.setattr(hashpm_core, "open_for_hashing", recording_open)
+    source_hashes, copy_hashes, _ = acquire_file(str(path), str(tmp_path / "copia.bin"), False, ALGORITHMS)
+    assert source_hashes == digests(data) and copy_hashes is None
+    assert opened == [str(path)]
+    acquire_file(str(path), str(tmp_path / "copia.bin"), True, ALGORITHMS)
+    assert opened[1:] == [str(path), str(tmp_path / "copia.bin")]
+
+def refuse_direct_open(monkeypatch):
+    # Sistemas de arquivos que recusam O_DIRECT já na abertura (EINVAL)
+    refused = []
+
+    def fake_open(path, flags, *args, **kwargs):
+        if flags & getattr(os, "O_DIRECT", 0):
+            refused.append(path)
+            raise OSError(errno.EINVAL, "argumento inválido")
+        return REAL_OS_OPEN(path, flags, *args, **kwargs)
+
+    monkeypatch.setattr(os, "open", fake_open)
+    return refused
+
+@pytest.mark.skipif(not hasattr(os, "O_DIRECT"), reason="O_DIRECT indisponível")
+def test_direct_mode_falls_back_when_open_is_refused(source, tmp_path, monkeypatch):
+    path, data = source
+    refused = refuse_direct_open(monkeypatch)
+    f, io_mode = open_for_hashing(path, "direto")
+    f.close()
+    assert io_mode == "sem_cache"
+    assert hash_file(path, ALGORITHMS, io_mode="direto") == digests(data)
+    _, copy_hashes, _ = acquire_file(path, str(tmp_path / "copia.bin"), True, ALGORITHMS, io_mode="direto")
+    assert copy_hashes == digests(data) and refused
+
+class DirectRefusingFile:
+    # Aberto com O_DIRECT, mas a leitura é recusada (EINVAL) enquanto o
+    # descritor estiver nesse modo, como em alguns FUSE
+    def __init__(self, f):
+        self.f = f
+        self.refused = 0
+
+    def readinto(self, buffer):
+        import fcntl
+        if fcntl.fcntl(self.f.fileno(), fcntl.F_GETFL) & os.O_DIRECT:
+            self.refused += 1
+            raise OSError(errno.EINVAL, "argumento inválido")
+        return self.f.readinto(buffer)
+
+    def __getattr__(self, name):
+        return getattr(self.f, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.f.close()
+
+@pytest.mark.skipif(not hasattr(os, "O_DIRECT"), reason="O_DIRECT indisponível")
+def test_direct_mode_falls_back_when_reads_are_refused(source, monkeypatch):
+    path, data = source
+    opened = []
+    real_open_for_hashing = hashpm_core.open_for_hashing
+
+    def open_refusing(file_path, io_mode="cache"):
+        f, io_mode = real_open_for_hashing(file_path, io_mode)
+        opened.append((DirectRefusingFile(f), io_mode))
+        return opened[-1]
+
+    monkeypatch.setattr(hashpm_core, "open_for_hashing", open_refusing)
+    assert hash_file(path, ALGORITHMS, io_mode="direto") == digests(data)
+    f, io_mode = opened[0]
+    # Recusada uma única vez: o O_DIRECT é retirado do descritor e a leitura continua
+    if io_mode == "direto":
+        assert f.refused == 1
+
+def test_kernel_copy_falls_back_to_user_space(tmp_path, monkeypatch):
+    data = os.urandom(MIB + 5)
+    path = tmp_path / "origem.bin"
+    path.write_bytes(data)
+    calls = []
+
+    def refusing(name, code):
+        def refuse(*args):
+            calls.append(name)
+            raise OSError(code, os.strerror(code))
+        return refuse
+
+    for name in ("copy_file_range", "sendfile"):
+        if hasattr(os, name):
+            monkeypatch.setattr(os, name, refusing(name, errno.EXDEV))
+    done = []
+    copy_file(str(path), str(tmp_path / "copia.bin"), progress_callback=done.append)
+    assert (tmp_path / "copia.bin").read_bytes() == data and sum(done) == len(data)
+    assert calls == [name for name in ("copy_file_range", "sendfile") if hasattr(os, name)]
+
+    # Outro erro não é tratado como falta de suporte
+    if hasattr(os, "copy_file_range"):
+        monkeypatch.setattr(os, "copy_file_range", refusing("copy_file_range", errno.EIO))
+        with pytest.raises(OSError):
+            copy_file(str(path), str(tmp_path / "outra.bin"))
+
+@pytest.mark.parametrize("use_processes", [False, True])
+def test_run_pipeline_hashes_every_task(tmp_path, use_processes):
+    files = {}
+    for i in range(12):
+        data = os.urandom(1000 * i)
+        files[i] = str(tmp_path / f"f{i}.bin")
+        (tmp_path / f"f{i}.bin").write_bytes(data)
+    percents = []
+    progress = ByteProgress(sum(os.path.getsize(path) for path in files.values()), percents.append)
+    seen = []
+    results = run_pipeline(
+        hash_file, ((i, (path, ["SHA-256"], False, "cache"), os.path.getsize(path)) for i, path in files.items()),
+        workers=3, use_processes=use_processes, progress=progress, on_result=lambda key, _: seen.append(key)
+    )
+    assert results == {i: {"SHA-256": hashlib.sha256(open(path, "rb").read()).hexdigest()}
+                       for i, path in files.items()}
+    assert sorted(seen) == sorted(files) and percents[-1] == 100
+
+def test_run_pipeline_reports_the_failing_file(tmp_path):
+    tasks = [(0, (str(tmp_path / "inexistente.bin"), ["SHA-256"]), 1)]
+    with pytest.raises(FileOperationError) as failure:
+        run_pipeline(hash_file, iter(tasks), workers=2)
+    assert failure.value.file_path.endswith("inexistente.bin")
+
+@pytest.mark.parametrize("io_mode", list(IO_MODES.values()))
+def test_both_transfers_produce_the_same_evidence(tmp_path, io_mode):
+    source = tmp_path / "origem"
+    (source / "sub").mkdir(parents=True)
+    contents = {"a.txt": b"conteudo" * 1000, "sub/b.bin": os.urandom(MIB + 3), "vazio": b""}
+    for name, data in contents.items():
+        (source / name).write_bytes(data)
+    results = []
+    for transfer in (acquire_files_to_evidence, copy_files_to_evidence):
+        dest = tmp_path / transfer.__name__
+        dest.mkdir()
+        options = {"algorithms": ["SHA-256"], "io_mode": io_mode, "workers": 2}
+        copied, hashes, file_info = transfer([str(source)], str(dest), options)
+        results.append({file_info[path]["relative_path"].replace(os.sep, "/"): hashes[path] for path in copied})
+        for path in copied:
+            assert file_info[path]["copy_hashes"] == hashes[path]
+    assert results[0] == results[1] == {
+        f"origem/{name}": {"SHA-256": hashlib.sha256(data).hexdigest()} for name, data in contents.items()
+    }
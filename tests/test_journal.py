@@ -0,0 +1,104 @@
+import os
+import json
+import errno
+import hashlib
+import pytest
+import hashpm_core
+from hashpm_core import acquire_file
+from hashpm_journal import JOURNAL_NAME, AcquisitionJournal
+
+MIB = 1024 * 1024
+HASHES = {"SHA-256": "a" * 64}
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "origem.bin"
+    path.write_bytes(os.urandom(3 * MIB + 123))
+    return str(path)
+
+def write_done(journal, relative, source_path, dest_path):
+    journal.file_done(relative, source_path, os.stat(source_path), HASHES, HASHES, dest_path)
+
+def test_round_trip_of_completed_files_and_checkpoints(tmp_path, source):
+    dest = tmp_path / "copia.bin"
+    dest.write_bytes(open(source, "rb").read())
+    journal = AcquisitionJournal(str(tmp_path))
+    journal.start({"verify": True})
+    write_done(journal, "origem.bin", source, str(dest))
+    journal.checkpointer("grande.bin", "/origem/grande.bin").save(MIB, "b" * 64, {"size": 10})
+    journal.close()
+
+    journal = AcquisitionJournal(str(tmp_path))
+    result = journal.completed_result("origem.bin", source, os.stat(source), str(dest), ["SHA-256"], True)
+    assert result == (HASHES, HASHES, None)
+    checkpointer = journal.checkpointer("grande.bin", "/origem/grande.bin")
+    assert (checkpointer.resume_offset, checkpointer.resume_prefix, checkpointer.resume_details) == (
+        MIB, "b" * 64, {"size": 10}
+    )
+    # Outra origem com o mesmo caminho relativo não herda o ponto de retomada
+    assert journal.checkpointer("grande.bin", "/outra/grande.bin").resume_offset == 0
+    journal.close()
+
+def test_finished_acquisition_leaves_nothing_to_resume(tmp_path, source):
+    journal = AcquisitionJournal(str(tmp_path))
+    write_done(journal, "origem.bin", source, source)
+    journal.finish()
+    journal.close()
+    journal = AcquisitionJournal(str(tmp_path))
+    assert journal.completed == {} and journal.checkpoints == {}
+    journal.close()
+
+def test_truncated_and_corrupted_lines_are_ignored(tmp_path, source):
+    journal = AcquisitionJournal(str(tmp_path))
+    write_done(journal, "origem.bin", source, source)
+    journal.close()
+    path = os.path.join(str(tmp_path), JOURNAL_NAME)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("{não é json\n")
+        f.write(json.dumps({"type": "concluido", "relative": "outro.bin"})[:25])  # linha cortada pela queda
+    journal = AcquisitionJournal(str(tmp_path))
+    assert list(journal.completed) == ["origem.bin"]
+    journal.close()
+
+def test_completed_result_rejects_changed_source_or_short_copy(tmp_path, source):
+    dest = tmp_path / "copia.bin"
+    dest.write_bytes(open(source, "rb").read())
+    journal = AcquisitionJournal(str(tmp_path))
+    write_done(journal, "origem.bin", source, str(dest))
+    stat_result = os.stat(source)
+    assert journal.completed_result("origem.bin", source, stat_result, str(dest), ["SHA-256", "MD5"], True) is None
+    dest.write_bytes(b"curta")
+    assert journal.completed_result("origem.bin", source, stat_result, str(dest), ["SHA-256"], True) is None
+    dest.write_bytes(open(source, "rb").read())
+    os.utime(source, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + 10**9))
+    assert journal.completed_result("origem.bin", source, os.stat(source), str(dest), ["SHA-256"], True) is None
+    journal.close()
+
+def test_interrupted_copy_resumes_from_last_checkpoint(tmp_path, source, monkeypatch):
+    monkeypatch.setattr(hashpm_core, "CHECKPOINT_INTERVAL", MIB)
+    dest = str(tmp_path / "copia.bin")
+    real_io_chunks = hashpm_core.io_chunks
+
+    def failing_chunks(f, io_mode, chunk_size, offset=0):
+        read = offset
+        for chunk in real_io_chunks(f, io_mode, chunk_size, offset):
+            if read >= 2 * MIB + 100:
+                raise OSError(errno.EIO, "queda simulada")
+            read += len(chunk)
+            yield chunk
+
+    monkeypatch.setattr(hashpm_core, "io_chunks", failing_chunks)
+    journal = AcquisitionJournal(str(tmp_path))
+    with pytest.raises(OSError):
+        acquire_file(source, dest, True, ["SHA-256"], journal.checkpointer("origem.bin", source))
+    journal.close()
+    monkeypatch.setattr(hashpm_core, "io_chunks", real_io_chunks)
+
+    journal = AcquisitionJournal(str(tmp_path))
+    checkpointer = journal.checkpointer("origem.bin", source)
+    assert checkpointer.resume_offset >= MIB
+    source_hashes, copy_hashes, _ = acquire_file(source, dest, True, ["SHA-256"], checkpointer)
+    journal.close()
+    expected = hashlib.sha256(open(source, "rb").read()).hexdigest()
+    assert source_hashes["SHA-256"] == copy_hashes["SHA-256"] == expected
+    assert open(dest, "rb").read() == open(source, "rb").read()
@@ -0,0 +1,97 @@
+import os
+import csv
+import json
+import hashlib
+import pytest
+from hashpm_manifest import ManifestWriter
+from hashpm_verify import load_manifests, verify_evidence
+
+ALGORITHMS = ["SHA-256", "MD5"]
+
+def digests(data):
+    return {"SHA-256": hashlib.sha256(data).hexdigest(), "MD5": hashlib.md5(data).hexdigest()}
+
+@pytest.fixture
+def evidence(tmp_path):
+    # Pasta de portaria mínima: Arquivos/ com dois arquivos e Certidões/ para o manifesto
+    arquivos = tmp_path / "Arquivos"
+    (arquivos / "sub").mkdir(parents=True)
+    (tmp_path / "Certidões").mkdir()
+    files = {"a.txt": b"conteudo a" * 100, "sub/b.bin": os.urandom(5000)}
+    for relative, data in files.items():
+        (arquivos / relative).write_bytes(data)
+    return tmp_path, files
+
+def write_manifest(base, files, name="Manifesto_1"):
+    jsonl = str(base / "Certidões" / f"{name}.jsonl")
+    csv_path = str(base / "Certidões" / f"{name}.csv")
+    manifest = ManifestWriter(jsonl, ALGORITHMS, csv_path)
+    for number, (relative, data) in enumerate(files.items(), 1):
+        path = str(base / "Arquivos" / relative)
+        hashes = digests(data)
+        archive = None
+        if relative == "a.txt":
+            archive = {"format": "zip", "error": None, "members": [
+                {"name": "item.txt", "size": 3, "mtime": "2024-01-01T00:00:00", "hashes": digests(b"abc")},
+                {"name": "ruim.txt", "size": 9, "mtime": "2024-01-01T00:00:00", "hashes": None, "error": "CRC"},
+            ]}
+        manifest.write(number, relative.replace("/", os.sep), path, os.stat(path), hashes, hashes, "calculado",
+                       archive=archive)
+    manifest.close()
+    return jsonl, csv_path
+
+def test_jsonl_and_csv_round_trip(evidence):
+    base, files = evidence
+    jsonl, csv_path = write_manifest(base, files)
+    records = load_manifests([jsonl])
+    assert sorted(records) == sorted(files)
+    for relative, data in files.items():
+        record = records[relative]
+        assert record["size"] == len(data)
+        assert record["hashes"] == record["copy_hashes"] == digests(data)
+        assert record["verified"] is True and record["hash_set_matches"] == []
+    assert [member["name"] for member in records["a.txt"]["archive"]["members"]] == ["item.txt", "ruim.txt"]
+
+    with open(csv_path, encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["relative_path"] for row in rows] == ["a.txt", "a.txt!/item.txt", "a.txt!/ruim.txt", "sub/b.bin"]
+    assert rows[0]["SHA-256"] == rows[0]["SHA-256 (copy)"] == digests(files["a.txt"])["SHA-256"]
+    assert rows[1]["number"] == "1.1" and rows[1]["MD5"] == digests(b"abc")["MD5"]
+    assert rows[2]["hash_origin"] == "item ilegível (CRC)"
+
+    report = verify_evidence(str(base))
+    assert sorted(report["ok"]) == sorted(files)
+    assert not report["modified"] and not report["missing"] and not report["extra"]
+
+def test_truncated_last_record_is_ignored(evidence):
+    base, files = evidence
+    jsonl, _ = write_manifest(base, files)
+    with open(jsonl, "rb") as f:
+        lines = f.read().splitlines(keepends=True)
+    # Queda durante a gravação do último registro
+    with open(jsonl, "wb") as f:
+        f.write(lines[0] + lines[1][:40])
+    records = load_manifests([jsonl])
+    assert list(records) == [json.loads(lines[0])["relative_path"]]
+
+def test_latest_manifest_wins_for_repeated_acquisitions(evidence):
+    base, files = evidence
+    first, _ = write_manifest(base, files, "Manifesto_1")
+    changed = dict(files, **{"a.txt": b"nova versao"})
+    (base / "Arquivos" / "a.txt").write_bytes(changed["a.txt"])
+    second, _ = write_manifest(base, {"a.txt": changed["a.txt"]}, "Manifesto_2")
+    records = load_manifests([first, second])
+    assert records["a.txt"]["hashes"] == digests(b"nova versao")
+    assert records["sub/b.bin"]["hashes"] == digests(files["sub/b.bin"])
+
+def test_verification_flags_copies_that_diverge_from_the_manifest(evidence):
+    base, files = evidence
+    write_manifest(base, files)
+    data = bytearray(files["sub/b.bin"])
+    data[100] ^= 0xFF
+    (base / "Arquivos" / "sub" / "b.bin").write_bytes(bytes(data))
+    (base / "Arquivos" / "a.txt").unlink()
+    (base / "Arquivos" / "intruso.txt").write_bytes(b"x")
+    report = verify_evidence(str(base))
+    assert [relative for relative, _ in report["modified"]] == ["sub/b.bin"]
+    assert report["missing"] == ["a.txt"] and report["extra"] == ["intruso.txt"]
@@ -0,0 +1,252 @@
+import io
+import os
+import json
+import zlib
+import hashlib
+import pytest
+import hashpm_package
+from hashpm_cli import main
+from hashpm_core import AcquisitionError
+from hashpm_manifest import ManifestWriter
+from hashpm_package import (
+    CHUNK_HEADER, PACKAGE_MAGIC, RECORD_HEADER, DigestWriter, compress_chunk, create_package, read_package,
+    read_sidecar, safe_member_path
+)
+
+@pytest.fixture
+def evidence(tmp_path, monkeypatch):
+    # Blocos pequenos para que um arquivo ocupe vários registros C/R
+    monkeypatch.setattr(hashpm_package, "PACKAGE_CHUNK_SIZE", 64 * 1024)
+    base = tmp_path / "Evidencias_Adquiridas_Portaria_7"
+    (base / "Arquivos" / "sub").mkdir(parents=True)
+    (base / "Certidões").mkdir()
+    files = {
+        "Arquivos/texto.txt": b"linha repetida\n" * 20000,
+        "Arquivos/sub/aleatorio.bin": os.urandom(300 * 1024),
+        "Arquivos/vazio.dat": b"",
+    }
+    for name, data in files.items():
+        (base / name).write_bytes(data)
+    manifest = ManifestWriter(str(base / "Certidões" / "Manifesto_1.jsonl"), ["SHA-256"])
+    for number, name in enumerate(files, 1):
+        path = str(base / name)
+        hashes = {"SHA-256": hashlib.sha256(files[name]).hexdigest()}
+        manifest.write(number, name[len("Arquivos/"):], path, os.stat(path), hashes, hashes, "calculado")
+    manifest.close()
+    files["Certidões/Manifesto_1.jsonl"] = (base / "Certidões" / "Manifesto_1.jsonl").read_bytes()
+    return base, files
+
+def build(base, tmp_path, compression="zlib"):
+    package_path = str(tmp_path / f"pacote_{compression}.hpmpkg")
+    info = create_package(str(base), package_path, compression, workers=3)
+    return package_path, info
+
+@pytest.mark.parametrize("compression", ["zlib", "lzma"])
+def test_round_trip_extracts_identical_files(evidence, tmp_path, compression):
+    base, files = evidence
+    package_path, info = build(base, tmp_path, compression)
+    assert info["files"] == len(files) and info["checked"] == 3 and info["diverging"] == []
+    assert info["sha256"] == hashlib.sha256(open(package_path, "rb").read()).hexdigest()
+    assert info["package_size"] == os.path.getsize(package_path)
+
+    output = tmp_path / "extraido"
+    report = read_package(package_path, str(output), workers=2, expected_sha256=info["sha256"].upper())
+    assert report["intact"], report["errors"]
+    assert report["complete"] and report["trailer_ok"]
+    assert sorted(report["ok"]) == sorted(files) and report["expected"] == len(files)
+    for name, data in files.items():
+        extracted = output / base.name / name
+        assert extracted.read_bytes() == data
+        assert os.stat(extracted).st_mtime_ns == os.stat(base / name).st_mtime_ns
+    assert not list(output.rglob("*.parcial"))
+
+def test_files_diverging_from_the_acquisition_manifest_are_reported(evidence, tmp_path):
+    base, _ = evidence
+    (base / "Arquivos" / "texto.txt").write_bytes(b"alterado depois da aquisicao")
+    package_path, info = build(base, tmp_path)
+    assert info["diverging"] == ["Arquivos/texto.txt"]
+    output = tmp_path / "extraido"
+    report = read_package(package_path, str(output))
+    assert report["errors"] == [("Arquivos/texto.txt", "SHA-256 difere do manifesto de aquisição")]
+    assert (output / base.name / "Arquivos" / "texto.txt.divergente").exists()
+
+def test_truncated_package_is_reported_at_every_cut(evidence, tmp_path):
+    base, _ = evidence
+    package_path, _ = build(base, tmp_path)
+    data = open(package_path, "rb").read()
+    for cut in (len(PACKAGE_MAGIC) + 3, len(data) // 3, len(data) // 2, len(data) - 20, len(data) - 1):
+        truncated = tmp_path / f"cortado_{cut}.hpmpkg"
+        truncated.write_bytes(data[:cut])
+        report = read_package(str(truncated), str(tmp_path / f"saida_{cut}"))
+        assert not report["intact"] and not report["complete"]
+        assert ("(pacote)", "pacote truncado: fecho ausente") in report["errors"]
+
+def test_corrupted_block_is_isolated_and_trailer_fails(evidence, tmp_path):
+    base, files = evidence
+    package_path, info = build(base, tmp_path)
+    data = bytearray(open(package_path, "rb").read())
+    # Um byte no meio de um bloco do arquivo aleatório (gravado sem compressão)
+    sample = files["Arquivos/sub/aleatorio.bin"][100 * 1024:100 * 1024 + 32]
+    data[bytes(data).index(sample) + 5] ^= 0xFF
+    corrupted = tmp_path / "corrompido.hpmpkg"
+    corrupted.write_bytes(bytes(data))
+    report = read_package(str(corrupted), expected_sha256=info["sha256"])
+    names = [name for name, _ in report["errors"]]
+    assert "Arquivos/sub/aleatorio.bin" in names and "(pacote)" in names
+    assert not report["trailer_ok"]
+    assert "Arquivos/texto.txt" in report["ok"]
+
+def test_rebuilt_package_passes_trailer_but_not_the_recorded_digest(evidence, tmp_path):
+    base, _ = evidence
+    _, info = build(base, tmp_path)
+    (base / "Arquivos" / "vazio.dat").write_bytes(b"inserido")
+    (base / "Certidões" / "Manifesto_1.jsonl").unlink()
+    forged_path, _ = build(base, tmp_path, "lzma")
+    # Quem refaz o pacote recalcula o fecho: só o hash registrado fora dele acusa a troca
+    report = read_package(forged_path, expected_sha256=info["sha256"])
+    assert report["trailer_ok"] and report["ok"]
+    assert report["errors"] == [
+        ("(pacote)", "SHA-256 do pacote difere do registrado na certidão de empacotamento")
+    ]
+
+def test_read_sidecar(tmp_path):
+    package_path = str(tmp_path / "p.hpmpkg")
+    assert read_sidecar(package_path) is None
+    with open(package_path + ".sha256", "w", encoding="utf-8") as f:
+        f.write(f"{'AB' * 32}  p.hpmpkg\n")
+    assert read_sidecar(package_path) == "ab" * 32
+
+@pytest.mark.parametrize("name", [
+    "", "../fora.txt", "Arquivos/../../fora.txt", "/etc/passwd", "Arquivos//x", "Arquivos/./x",
+    "C:/Windows/x", "Arquivos\\..\\x", "Arquivos/",
+])
+def test_safe_member_path_rejects_escaping_names(tmp_path, name):
+    with pytest.raises(AcquisitionError):
+        safe_member_path(str(tmp_path), name)
+
+def test_safe_member_path_accepts_nested_names(tmp_path):
+    expected = os.path.join(str(tmp_path), "Arquivos", "sub", "a.txt")
+    assert safe_member_path(str(tmp_path), "Arquivos/sub/a.txt") == expected
+
+def forged_package(path, source, member):
+    # Pacote bem formado, com fecho válido, cujo arquivo tenta sair da pasta de destino
+    f = io.BytesIO()
+    writer = DigestWriter(f)
+    writer.write(PACKAGE_MAGIC)
+    writer.record(b"H", {"format": 1, "compression": "zlib", "chunk_size": 65536, "source": source})
+    writer.record(b"M", {"manifests": [], "files": [{"path": member, "size": 4, "hashes": None}]})
+    writer.record(b"F", {"path": member})
+    writer.chunk(b"mal!", compress_chunk(b"mal!", "zlib"))
+    writer.record(b"E", {"size": 4, "sha256": hashlib.sha256(b"mal!").hexdigest()})
+    writer.trailer()
+    path.write_bytes(f.getvalue())
+    return str(path)
+
+@pytest.mark.parametrize("source, member", [
+    ("Evidencias", "../../fora.txt"),
+    ("Evidencias", "Arquivos/../../fora.txt"),
+    ("..", "fora.txt"),
+])
+def test_extraction_refuses_members_outside_the_destination(tmp_path, source, member):
+    package_path = forged_package(tmp_path / "forjado.hpmpkg", source, member)
+    output = tmp_path / "destino" / "saida"
+    output.mkdir(parents=True)
+    with pytest.raises(AcquisitionError, match="Caminho inválido"):
+        read_package(package_path, str(output))
+    assert not list(tmp_path.rglob("fora.txt*"))
+
+def package_with_records(path, records):
+    # records: [(tipo, payload em bytes)], gravados sem passar pelo JSON do DigestWriter
+    f = io.BytesIO()
+    writer = DigestWriter(f)
+    writer.write(PACKAGE_MAGIC)
+    for kind, payload in records:
+        writer.write(kind + RECORD_HEADER.pack(len(payload)))
+        writer.write(payload)
+    writer.trailer()
+    path.write_bytes(f.getvalue())
+    return str(path)
+
+HEADER = json.dumps({"format": 1, "compression": "zlib", "chunk_size": 65536, "source": "Evidencias"}).encode()
+
+@pytest.mark.parametrize("records", [
+    [(b"H", b"\xff\xfe n\xe3o \xe9 utf-8")],
+    [(b"H", b"{cortado")],
+    [(b"H", b"[1, 2]")],
+    [(b"H", json.dumps({"format": 1, "compression": "zlib", "chunk_size": 65536}).encode())],
+    [(b"H", json.dumps({"format": 1, "compression": "bz2", "chunk_size": 65536, "source": "x"}).encode())],
+    [(b"H", HEADER), (b"M", json.dumps({"manifests": [], "files": [{"size": 1}]}).encode())],
+    [(b"H", HEADER), (b"M", json.dumps({"manifests": [], "files": [{"path": "a", "hashes": "x"}]}).encode())],
+    [(b"H", HEADER), (b"F", json.dumps({"path": 7}).encode())],
+    [(b"H", HEADER), (b"F", json.dumps({"path": "Arquivos/a", "mtime_ns": "ontem"}).encode())],
+    [(b"H", HEADER), (b"F", json.dumps({"path": "Arquivos/a"}).encode()), (b"E", b'{"size": 0}')],
+])
+def test_corrupted_records_raise_acquisition_error(tmp_path, records, capsys):
+    package_path = package_with_records(tmp_path / "corrompido.hpmpkg", records)
+    with pytest.raises(AcquisitionError, match="registro [HMFE] corrompido"):
+        read_package(package_path, str(tmp_path / "saida"))
+    # Na linha de comando: mensagem de erro, sem traceback
+    assert main(["pacote", "conferir", package_path, "-q"]) == 1
+    assert "corrompido" in capsys.readouterr().err
+
+def sized_package(path, raw_size, stored_size, data, chunk_size=65536):
+    # Bloco R/C com tamanhos declarados à mão, como depois de um bit trocado no cabeçalho do bloco
+    header = json.dumps({"format": 1, "compression": "zlib", "chunk_size": chunk_size, "source": "Evidencias"})
+    f = io.BytesIO()
+    writer = DigestWriter(f)
+    writer.write(PACKAGE_MAGIC)
+    for kind, payload in ((b"H", header.encode()), (b"F", b'{"path": "Arquivos/a"}')):
+        writer.write(kind + RECORD_HEADER.pack(len(payload)))
+        writer.write(payload)
+    writer.write((b"R" if raw_size == stored_size else b"C") + CHUNK_HEADER.pack(raw_size, stored_size))
+    writer.write(data)
+    writer.record(b"E", {"size": len(data), "sha256": hashlib.sha256(data).hexdigest()})
+    writer.trailer()
+    path.write_bytes(f.getvalue())
+    return str(path)
+
+@pytest.mark.parametrize("raw_size, stored_size, chunk_size", [
+    (1 << 30, 1 << 30, 65536),
+    (4, 1 << 30, 65536),
+    (1 << 31, 12, 65536),
+    (4, 4, 1 << 40),
+])
+def test_oversized_chunks_are_rejected_before_reading(tmp_path, monkeypatch, raw_size, stored_size, chunk_size):
+    # Nenhum bloco é lido nem alocado com o tamanho corrompido
+    requested = []
+    real_read = hashpm_package.DigestReader.read
+    monkeypatch.setattr(hashpm_package.DigestReader, "read",
+                        lambda self, n: requested.append(n) or real_read(self, n))
+    package_path = sized_package(tmp_path / "corrompido.hpmpkg", raw_size, stored_size, b"mal!", chunk_size)
+    with pytest.raises(AcquisitionError, match="corrompido"):
+        read_package(package_path, str(tmp_path / "saida"))
+    assert max(requested) < 65536
+
+def test_decompression_is_bounded_by_the_declared_size(tmp_path):
+    # Bloco C que expande além do tamanho declarado: dano isolado, sem expandir tudo
+    data = b"\0" * 65536
+    package_path = sized_package(tmp_path / "bomba.hpmpkg", 100, len(zlib.compress(data)), zlib.compress(data))
+    report = read_package(package_path, str(tmp_path / "saida"))
+    assert ("Arquivos/a", "bloco danificado no pacote") in report["errors"]
+    assert report["trailer_ok"] and not report["intact"]
+
+def package_with_record_length(path, kind, length):
+    # Registro cujo tamanho declarado não corresponde ao que vem depois dele
+    package_path = package_with_records(path, [(b"H", HEADER)])
+    data = bytearray(open(package_path, "rb").read())
+    trailer = 1 + RECORD_HEADER.size + 32
+    data[-trailer:-trailer] = kind + RECORD_HEADER.pack(length) + b"{}"
+    path.write_bytes(bytes(data))
+    return package_path
+
+@pytest.mark.parametrize("kind, length", [(b"M", 1 << 31), (b"Z", 1 << 20)])
+def test_record_lengths_beyond_the_limit_are_rejected(tmp_path, kind, length):
+    package_path = package_with_record_length(tmp_path / "corrompido.hpmpkg", kind, length)
+    with pytest.raises(AcquisitionError, match=f"registro {kind.decode()} corrompido"):
+        read_package(package_path, str(tmp_path / "saida"))
+
+def test_record_length_beyond_the_end_is_a_short_read(tmp_path):
+    package_path = package_with_record_length(tmp_path / "corrompido.hpmpkg", b"F", 1 << 20)
+    report = read_package(package_path, str(tmp_path / "saida"))
+    assert not report["complete"] and not report["intact"]
+    assert ("(pacote)", "registro incompleto: pacote truncado ou tamanho corrompido") in report["errors"]
@@ -0,0 +1,111 @@
+import os
+import glob
+import hashlib
+import pytest
+import hashpm_piecewise
+from hashpm_cli import main
+from hashpm_manifest import ManifestWriter
+from hashpm_piecewise import (
+    SegmentHasher, hash_segments, merkle_root, piecewise_record, record_consistent, segment_ranges
+)
+
+SEGMENT = 64 * 1024
+
+def sha256(data):
+    return hashlib.sha256(data).digest()
+
+def leaf(digest):
+    return sha256(b"\x00" + bytes.fromhex(digest))
+
+def node(left, right):
+    return sha256(b"\x01" + left + right)
+
+def test_merkle_root_of_empty_single_and_odd_trees():
+    digests = [hashlib.sha256(bytes([i])).hexdigest() for i in range(5)]
+    assert merkle_root([]) == hashlib.sha256(b"").hexdigest()
+    assert merkle_root(digests[:1]) == leaf(digests[0]).hex()
+    l0, l1, l2, l3, l4 = (leaf(d) for d in digests)
+    # RFC 6962: n folhas divididas na maior potência de 2 menor que n
+    assert merkle_root(digests[:3]) == node(node(l0, l1), l2).hex()
+    assert merkle_root(digests) == node(node(node(l0, l1), node(l2, l3)), l4).hex()
+    # O nó sem par não sobe inalterado: 3 folhas não dão a raiz de 2
+    assert merkle_root(digests[:3]) != merkle_root(digests[:2])
+    assert merkle_root(digests[:2]) != merkle_root([node(l0, l1).hex()])
+
+@pytest.mark.parametrize("chunk", [1000, SEGMENT, 3 * SEGMENT + 7])
+def test_segment_hasher_matches_ranges_for_any_block_size(chunk):
+    data = os.urandom(4 * SEGMENT + 123)
+    expected = {i: hashlib.sha256(data[o:o + n]).hexdigest()
+                for i, (o, n) in enumerate(segment_ranges(len(data), SEGMENT))}
+    with SegmentHasher(len(data), SEGMENT, workers=3) as segments:
+        buffer = bytearray(chunk)
+        for offset in range(0, len(data), chunk):
+            # O buffer é reaproveitado, como na leitura da aquisição
+            n = len(data[offset:offset + chunk])
+            buffer[:n] = data[offset:offset + chunk]
+            segments.update(memoryview(buffer)[:n])
+        assert segments.digests() == expected
+
+def test_segment_hasher_rejects_short_or_grown_sources():
+    segments = SegmentHasher(2 * SEGMENT, SEGMENT)
+    segments.update(bytes(SEGMENT + 1))
+    with pytest.raises(OSError):
+        segments.digests()
+    with SegmentHasher(SEGMENT + 1, SEGMENT) as segments:
+        with pytest.raises(OSError):
+            segments.update(bytes(2 * SEGMENT + 1))
+
+def test_hash_segments_and_record_consistency(tmp_path):
+    data = os.urandom(3 * SEGMENT + 5)
+    path = tmp_path / "imagem.dd"
+    path.write_bytes(data)
+    digests = hash_segments([("imagem", str(path), len(data))], SEGMENT, workers=2)["imagem"]
+    assert digests == {i: hashlib.sha256(data[o:o + n]).hexdigest()
+                       for i, (o, n) in enumerate(segment_ranges(len(data), SEGMENT))}
+    record = piecewise_record(digests, SEGMENT)
+    assert record["segment_count"] == 4 and record_consistent(record, len(data))
+    assert not record_consistent(dict(record, merkle_root="0" * 64), len(data))
+    assert not record_consistent(dict(record, segment_count=3), len(data))
+    assert not record_consistent({k: v for k, v in record.items() if k != "merkle"}, len(data))
+    assert not record_consistent(record, len(data) + SEGMENT)
+
+def test_recheck_hashes_only_the_divergent_segments(tmp_path, monkeypatch, capsys):
+    base = tmp_path / "Evidencias_Adquiridas_Portaria_9"
+    (base / "Arquivos").mkdir(parents=True)
+    (base / "Certidões").mkdir()
+    files = {"imagem.dd": os.urandom(5 * SEGMENT + 10), "outra.dd": os.urandom(2 * SEGMENT)}
+    manifest = ManifestWriter(str(base / "Certidões" / "Manifesto_1.jsonl"), ["SHA-256"])
+    for number, (name, data) in enumerate(files.items(), 1):
+        path = base / "Arquivos" / name
+        path.write_bytes(data)
+        hashes = {"SHA-256": hashlib.sha256(data).hexdigest()}
+        digests = hash_segments([(name, str(path), len(data))], SEGMENT)[name]
+        manifest.write(number, name, str(path), os.stat(path), hashes, hashes, "calculado",
+                       piecewise_record(digests, SEGMENT))
+    manifest.close()
+
+    image = base / "Arquivos" / "imagem.dd"
+    damaged = bytearray(files["imagem.dd"])
+    for index in (1, 3):
+        damaged[index * SEGMENT + 100] ^= 0xFF
+    image.write_bytes(bytes(damaged))
+    assert main(["verificar", str(base), "-q"]) == 2
+    assert "2 segmento(s) de 65536 bytes divergente(s): 1, 3" in capsys.readouterr().out
+    first_report = max(glob.glob(str(base / "Certidões" / "Verificacao_*.json")))
+
+    # Segmento 1 restaurado: a reconferência lê só os segmentos 1 e 3 da imagem
+    damaged[SEGMENT + 100] ^= 0xFF
+    image.write_bytes(bytes(damaged))
+    read = []
+    real_hash_segment = hashpm_piecewise.hash_segment
+
+    def recording_hash_segment(file_path, offset, length, progress_callback=None):
+        read.append((os.path.basename(file_path), offset))
+        return real_hash_segment(file_path, offset, length, progress_callback)
+
+    monkeypatch.setattr(hashpm_piecewise, "hash_segment", recording_hash_segment)
+    assert main(["verificar", str(base), "--rechecar", first_report, "-q"]) == 2
+    out = capsys.readouterr().out
+    assert sorted(read) == [("imagem.dd", SEGMENT), ("imagem.dd", 3 * SEGMENT)]
+    assert "1 segmento(s) de 65536 bytes divergente(s): 3" in out
+    assert "Conferidos: 0 de 1" in out
@@ -0,0 +1,34 @@
+import json
+import tracemalloc
+from hashpm_profile import AcquisitionProfiler
+
+def read_records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def test_profiler_records_stages_and_memory(tmp_path):
+    profiler = AcquisitionProfiler(memory=True)
+    assert tracemalloc.is_tracing()
+    with profiler.stage("transferencia") as stage:
+        stage["files"] = 1
+        data = bytearray(1024 * 1024)
+    profiler.file_done("a.bin", len(data), 0.5, 0.25, "calculado")
+    path = str(tmp_path / "Perfil.jsonl")
+    profiler.open(path, {"workers": 2})
+    profiler.close()
+    assert not tracemalloc.is_tracing()
+    records = read_records(path)
+    assert [record["type"] for record in records] == ["execucao", "etapa", "arquivo", "memoria", "resumo"]
+    assert records[1]["memory_peak"] >= len(data)
+    assert records[-1]["files"] == 1 and records[-1]["status"] == "concluida"
+
+def test_profiler_leaves_existing_tracing_running(tmp_path):
+    # Rastreamento iniciado por quem chamou (ex.: python -X tracemalloc)
+    tracemalloc.start()
+    try:
+        profiler = AcquisitionProfiler(memory=True)
+        profiler.open(str(tmp_path / "Perfil.jsonl"), {})
+        profiler.close("falha")
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
@@ -0,0 +1,46 @@
+import threading
+import hashpm_queue
+from hashpm_core import prepare_acquisition_data
+from hashpm_queue import AcquisitionQueue
+
+def acquisition_data(portaria):
+    return prepare_acquisition_data(
+        {"Nome": "Teste", "Posto/Graduação": "Agente", "CPF": "123.456.789-09", "Portaria": portaria},
+        {"Tipo": "Pessoa Física"},
+    )
+
+def test_interrupted_job_releases_device_and_folder(tmp_path, monkeypatch):
+    # Duas tarefas no mesmo dispositivo: a segunda só começa quando a primeira
+    # libera a vaga, mesmo que termine por BaseException
+    source = tmp_path / "origem.txt"
+    source.write_bytes(b"dados")
+    calls = []
+
+    def fake_acquisition(file_paths, user_data, proprietario_data, options, progress_callback, status_callback):
+        calls.append(user_data["Portaria"])
+        if user_data["Portaria"] == "1":
+            raise SystemExit("thread encerrada")
+        return {"base_folder": str(tmp_path)}
+
+    monkeypatch.setattr(hashpm_queue, "run_acquisition", fake_acquisition)
+    # A BaseException não é engolida pela fila: ela encerra a thread da tarefa
+    # e chega ao threading.excepthook, capturado aqui em vez de impresso
+    uncaught = []
+    hooked = threading.Event()
+    monkeypatch.setattr(threading, "excepthook", lambda args: (uncaught.append(args.exc_type), hooked.set()))
+    finished = []
+    queue = AcquisitionQueue(max_jobs=2, per_device=1, on_finished=finished.append)
+    options = {"base_dir": str(tmp_path)}
+    first = queue.submit([str(source)], *acquisition_data("1"), options)
+    second = queue.submit([str(source)], *acquisition_data("2"), options)
+
+    done = threading.Event()
+    threading.Thread(target=lambda: (queue.wait(), done.set()), daemon=True).start()
+    assert done.wait(10), "fila presa com o dispositivo ocupado"
+    assert calls == ["1", "2"]
+    assert (first["state"], first["error"]) == ("falha", "aquisição interrompida")
+    assert second["state"] == "concluida"
+    assert not any(queue.device_load.values()) and not queue.busy_folders
+    assert finished == [second]
+    # A vaga é liberada antes de a exceção sair da thread
+    assert hooked.wait(10) and uncaught == [SystemExit]